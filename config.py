@@ -37,11 +37,25 @@ for part in _admins.split(","):
 print(f"Loaded ADMIN_IDS: {ADMIN_IDS}")
 
 def is_user_admin(user_id: int) -> bool:
-    print("ADMIN_IDS in config:", ADMIN_IDS)
-    print("Checking user_id:", user_id, "type:", type(user_id))
-    print("Result:", int(user_id) in ADMIN_IDS)
     return int(user_id) in ADMIN_IDS
 
 # Список групп, куда шлём финансовые отчёты (через FIN_GROUP_IDS в .env, разделитель — запятая)
 _fin = os.getenv("FIN_GROUP_IDS", "")
 FIN_GROUP_IDS = [int(x) for x in _fin.split(",") if x.strip().startswith("-") and x.strip()[1:].isdigit()]
+
+# Минимальный интервал (сек) между перерисовками сводного фин. отчёта
+FIN_REPORT_INTERVAL = float(os.getenv("FIN_REPORT_INTERVAL", "30"))
+
+# Приём апдейтов: "polling" (по умолчанию) или "webhook"
+BOT_MODE = os.getenv("BOT_MODE", "polling").strip().lower()
+# Публичный адрес вебхука (https://host[:port]) и путь на нашем сервере
+WEBHOOK_BASE_URL = os.getenv("WEBHOOK_BASE_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram/webhook")
+# Проверяется по заголовку X-Telegram-Bot-Api-Secret-Token
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBAPP_HOST = os.getenv("WEBAPP_HOST", "0.0.0.0")
+WEBAPP_PORT = int(os.getenv("WEBAPP_PORT", "8080"))
+# Сколько апдейтов обрабатываются одновременно (порядок внутри чата сохраняется)
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "8"))
+# Свой сервер Bot API (локальный telegram-bot-api или фейковый для тестов)
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "")
@@ -0,0 +1,9 @@
+# constants/languages.py
+
+LANGUAGES = {
+    'en': 'English',
+    'ru': 'Русский',
+    'zh': '中文',
+}
+
+DEFAULT_LANGUAGE = 'ru'
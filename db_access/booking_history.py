@@ -0,0 +1,107 @@
+# db_access/booking_history.py
+
+import logging
+import re
+from datetime import date
+from typing import List
+
+import db
+
+logger = logging.getLogger(__name__)
+
+_HISTORY_COLUMNS = (
+    "group_key, slot_date, time_slot, user_id, status, status_code, "
+    "start_time, payment_method, amount, emoji"
+)
+
+# Секции, которые создаёт ensure_bookings_history_partition()
+_PARTITION_RE = re.compile(r"^bookings_history_(\d{4})(\d{2})$")
+
+# Секции месяцев, в которые попадают закрытые брони
+_ENSURE_SQL = """
+SELECT ensure_bookings_history_partition(m)
+FROM (
+    SELECT DISTINCT date_trunc('month', slot_date)::DATE AS m
+    FROM bookings
+    WHERE slot_date < (SELECT today FROM business_day)
+) months
+"""
+
+_ARCHIVE_SQL = f"""
+WITH moved AS (
+    DELETE FROM bookings
+    WHERE slot_date < (SELECT today FROM business_day)
+    RETURNING {_HISTORY_COLUMNS}
+), ins AS (
+    INSERT INTO bookings_history ({_HISTORY_COLUMNS})
+    SELECT {_HISTORY_COLUMNS} FROM moved
+    ON CONFLICT DO NOTHING
+), st AS (
+    DELETE FROM group_time_slot_statuses
+    WHERE slot_date < (SELECT today FROM business_day)
+)
+SELECT COUNT(*) FROM moved
+"""
+
+
+class BookingHistory:
+    """
+    Архив закрытых броней (bookings_history, секции по месяцам slot_date).
+
+    archive_closed() вызывается после смены рабочего дня: брони прошедших
+    дат переносятся из bookings в архив одним оператором, статусы этих
+    слотов удаляются. Горячая таблица остаётся в пределах двух дней,
+    а старые месяцы отключаются detach_before() без DELETE.
+    """
+    def __init__(self, pool=None):
+        self.pool = pool
+
+    def _pool(self):
+        return db.db_pool or self.pool
+
+    async def archive_closed(self, conn=None) -> int:
+        """Перенести брони с slot_date < business_day.today; возвращает их число."""
+        if conn is None:
+            async with self._pool().acquire() as conn:
+                async with conn.transaction():
+                    return await self._archive(conn)
+        return await self._archive(conn)
+
+    async def _archive(self, conn) -> int:
+        await conn.execute(_ENSURE_SQL)
+        moved = await conn.fetchval(_ARCHIVE_SQL)
+        logger.info("В архив перенесено броней: %s", moved)
+        return moved or 0
+
+    async def detach_before(self, cutoff: date) -> List[str]:
+        """
+        Отключить месячные секции, целиком лежащие до cutoff.
+        Отключённая таблица остаётся в БД — её можно выгрузить или удалить.
+        """
+        detached = []
+        async with self._pool().acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT c.relname
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'bookings_history'::regclass
+                """
+            )
+            for r in rows:
+                name = r["relname"]
+                m = _PARTITION_RE.match(name)
+                if not m:
+                    continue
+                year, month = int(m.group(1)), int(m.group(2))
+                end = date(year + month // 12, month % 12 + 1, 1)
+                if end > cutoff:
+                    continue
+                await conn.execute(f'ALTER TABLE bookings_history DETACH PARTITION "{name}"')
+                detached.append(name)
+        if detached:
+            logger.info("Отключены секции архива: %s", ", ".join(sorted(detached)))
+        return detached
+
+
+booking_history = BookingHistory()
@@ -1,17 +1,53 @@
 # db_access/booking_repo.py
 
 import logging
-from typing import Dict, Any, List, Tuple
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Tuple, Optional
 import db
 from constants.booking_const import groups_data
 from utils.time_utils import get_adjacent_time_slots
+from utils.slot_board import SlotBoard
 
 logger = logging.getLogger(__name__)
 
+# Поля брони, которые возвращают все изменяющие методы (day — метка из аргумента)
+_BOOKING_COLUMNS = "group_key, slot_date, time_slot, user_id, status, status_code, emoji"
+
+
 class BookingRepo:
+    """
+    Запись броней в БД.
+
+    Брони хранятся по календарной дате slot_date; методы принимают метку
+    'Сегодня'/'Завтра', а дату считает SQL-функция label_date() от
+    текущего рабочего дня (таблица business_day).
+
+    Каждое изменение — один SQL-оператор с CTE: bookings и
+    group_time_slot_statuses меняются атомарно за один round trip,
+    а итоговая строка брони возвращается вызывающему коду (для
+    обновления памяти без повторного SELECT). Несколько изменений
+    подряд можно объединить в одну транзакцию через unit_of_work().
+    """
     def __init__(self, pool):
         self.pool = pool
 
+    @asynccontextmanager
+    async def unit_of_work(self):
+        """Соединение с открытой транзакцией; передаётся в методы как conn=."""
+        pool = db.db_pool or self.pool
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                yield conn
+
+    async def _fetchrow(self, conn, query: str, *args) -> Optional[Dict[str, Any]]:
+        if conn is None:
+            pool = db.db_pool or self.pool
+            async with pool.acquire() as conn:
+                row = await conn.fetchrow(query, *args)
+        else:
+            row = await conn.fetchrow(query, *args)
+        return dict(row) if row else None
+
     async def load_data(self) -> None:
         pool = db.db_pool or self.pool
         if not pool:
@@ -26,18 +62,20 @@ class BookingRepo:
 
         async with pool.acquire() as conn:
             bookings = await conn.fetch(
-                "SELECT group_key, day, time_slot, user_id FROM bookings"
+                "SELECT group_key, day, time_slot, user_id FROM bookings_current"
             )
         for r in bookings:
             gk, day, slot, uid = r["group_key"], r["day"], r["time_slot"], r["user_id"]
             if gk in groups_data and day in groups_data[gk]["booked_slots"]:
                 groups_data[gk]["booked_slots"][day].append(slot)
                 groups_data[gk]["slot_bookers"][(day, slot)] = uid
+        for g in groups_data.values():
+            g["board"] = SlotBoard.from_slots(g["booked_slots"])
 
         async with pool.acquire() as conn:
             statuses = await conn.fetch(
                 "SELECT group_key, day, time_slot, status, user_id "
-                "FROM group_time_slot_statuses"
+                "FROM slot_statuses_current"
             )
         for r in statuses:
             gk, day, slot, st, uid = r["group_key"], r["day"], r["time_slot"], r["status"], r["user_id"]
@@ -49,81 +87,116 @@ class BookingRepo:
     async def add_booking(
         self, group_key: str, day: str,
         time_slot: str, user_id: int,
-        start_time
-    ) -> None:
-        pool = db.db_pool or self.pool
-        async with pool.acquire() as conn:
-            await conn.execute(
-                """
+        start_time, conn=None
+    ) -> Optional[Dict[str, Any]]:
+        return await self._fetchrow(
+            conn,
+            f"""
+            WITH b AS (
                 INSERT INTO bookings
-                  (group_key, day, time_slot, user_id, status, status_code, start_time)
-                VALUES ($1,$2,$3,$4,'booked','', $5)
-                """,
-                group_key, day, time_slot, user_id, start_time
+                  (group_key, slot_date, time_slot, user_id, status, status_code, start_time)
+                VALUES ($1, label_date($2), $3, $4, 'booked', '', $5)
+                RETURNING {_BOOKING_COLUMNS}
+            ), s AS (
+                INSERT INTO group_time_slot_statuses
+                  (group_key, slot_date, time_slot, status, user_id)
+                SELECT group_key, slot_date, time_slot, status, user_id FROM b
+                ON CONFLICT (group_key, slot_date, time_slot)
+                DO UPDATE SET status=excluded.status, user_id=excluded.user_id
             )
-            await conn.execute(
-                """
+            SELECT b.*, $2::TEXT AS day FROM b
+            """,
+            group_key, day, time_slot, user_id, start_time
+        )
+
+    async def book_slot(
+        self, group_key: str, day: str,
+        time_slot: str, user_id: int, emoji: str, conn=None
+    ) -> Optional[Dict[str, Any]]:
+        """Бронь с эмодзи (upsert по слоту) + статус 'booked' одним оператором."""
+        return await self._fetchrow(
+            conn,
+            f"""
+            WITH b AS (
+                INSERT INTO bookings
+                  (group_key, slot_date, time_slot, user_id, status, emoji)
+                VALUES ($1, label_date($2), $3, $4, 'booked', $5)
+                ON CONFLICT (group_key, slot_date, time_slot)
+                DO UPDATE SET user_id=EXCLUDED.user_id,
+                              status=EXCLUDED.status,
+                              emoji=EXCLUDED.emoji
+                RETURNING {_BOOKING_COLUMNS}
+            ), s AS (
                 INSERT INTO group_time_slot_statuses
-                  (group_key, day, time_slot, status, user_id)
-                VALUES ($1,$2,$3,'booked',$4)
-                ON CONFLICT (group_key, day, time_slot)
+                  (group_key, slot_date, time_slot, status, user_id)
+                SELECT group_key, slot_date, time_slot, status, user_id FROM b
+                ON CONFLICT (group_key, slot_date, time_slot)
                 DO UPDATE SET status=excluded.status, user_id=excluded.user_id
-                """,
-                group_key, day, time_slot, user_id
             )
+            SELECT b.*, $2::TEXT AS day FROM b
+            """,
+            group_key, day, time_slot, user_id, emoji
+        )
 
     async def mark_unavailable(
-        self, group_key: str, day: str, slot: str, user_id: int
+        self, group_key: str, day: str, slot: str, user_id: int, conn=None
     ) -> None:
-        pool = db.db_pool or self.pool
-        async with pool.acquire() as conn:
-            await conn.execute(
-                """
-                INSERT INTO group_time_slot_statuses
-                  (group_key, day, time_slot, status, user_id)
-                VALUES ($1,$2,$3,'unavailable',$4)
-                ON CONFLICT (group_key, day, time_slot)
-                DO UPDATE SET status='unavailable', user_id=excluded.user_id
-                """,
-                group_key, day, slot, user_id
-            )
+        await self._fetchrow(
+            conn,
+            """
+            INSERT INTO group_time_slot_statuses
+              (group_key, slot_date, time_slot, status, user_id)
+            VALUES ($1, label_date($2), $3, 'unavailable', $4)
+            ON CONFLICT (group_key, slot_date, time_slot)
+            DO UPDATE SET status='unavailable', user_id=excluded.user_id
+            """,
+            group_key, day, slot, user_id
+        )
 
     async def cancel_booking(
-        self, group_key: str, day: str, slot: str
-    ) -> None:
-        pool = db.db_pool or self.pool
-        async with pool.acquire() as conn:
-            await conn.execute(
-                "DELETE FROM bookings WHERE group_key=$1 AND day=$2 AND time_slot=$3",
-                group_key, day, slot
-            )
-            await conn.execute(
-                "DELETE FROM group_time_slot_statuses "
-                "WHERE group_key=$1 AND day=$2 AND time_slot=$3",
-                group_key, day, slot
+        self, group_key: str, day: str, slot: str, conn=None
+    ) -> Optional[Dict[str, Any]]:
+        """Удаляет бронь и статус слота; возвращает удалённую бронь (или None)."""
+        return await self._fetchrow(
+            conn,
+            f"""
+            WITH b AS (
+                DELETE FROM bookings
+                WHERE group_key=$1 AND slot_date=label_date($2) AND time_slot=$3
+                RETURNING {_BOOKING_COLUMNS}
+            ), s AS (
+                DELETE FROM group_time_slot_statuses
+                WHERE group_key=$1 AND slot_date=label_date($2) AND time_slot=$3
             )
+            SELECT b.*, $2::TEXT AS day FROM b
+            """,
+            group_key, day, slot
+        )
 
     async def update_status(
         self, group_key: str, day: str,
-        slot: str, status_code: str, emoji: str, user_id: int
-    ) -> None:
-        pool = db.db_pool or self.pool
-        async with pool.acquire() as conn:
-            await conn.execute(
-                """
+        slot: str, status_code: str, emoji: str, user_id: int, conn=None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Финальный статус слота в bookings и group_time_slot_statuses.
+        Возвращает обновлённую бронь (None — если брони нет, статус всё равно пишется).
+        """
+        return await self._fetchrow(
+            conn,
+            f"""
+            WITH b AS (
                 UPDATE bookings
                 SET status_code=$1, status=$2
-                WHERE group_key=$3 AND day=$4 AND time_slot=$5
-                """,
-                status_code, emoji, group_key, day, slot
-            )
-            await conn.execute(
-                """
+                WHERE group_key=$3 AND slot_date=label_date($4) AND time_slot=$5
+                RETURNING {_BOOKING_COLUMNS}
+            ), s AS (
                 INSERT INTO group_time_slot_statuses
-                  (group_key, day, time_slot, status, user_id)
-                VALUES ($1,$2,$3,$4,$5)
-                ON CONFLICT (group_key, day, time_slot)
+                  (group_key, slot_date, time_slot, status, user_id)
+                VALUES ($3, label_date($4), $5, $2, COALESCE((SELECT user_id FROM b), $6::BIGINT))
+                ON CONFLICT (group_key, slot_date, time_slot)
                 DO UPDATE SET status=excluded.status, user_id=excluded.user_id
-                """,
-                group_key, day, slot, emoji, user_id
             )
+            SELECT b.*, $4::TEXT AS day FROM b
+            """,
+            status_code, emoji, group_key, day, slot, user_id
+        )
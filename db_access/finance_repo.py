@@ -0,0 +1,144 @@
+# db_access/finance_repo.py
+
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+import db
+from db_access.ledger import Ledger, user_account, group_account, chat_account
+
+logger = logging.getLogger(__name__)
+
+
+class FinanceRepo:
+    """
+    Денежные счётчики: users.balance/profit, group_financial_data.salary/cash
+    и балансы чатов (balances).
+
+    Счётчик меняется одним UPSERT вида x = x + $delta ... RETURNING:
+    сложение делает PostgreSQL под блокировкой строки, поэтому параллельные
+    оплаты не теряют друг друга, а новое значение возвращается без
+    отдельного SELECT. В той же транзакции изменение проводится через
+    журнал (db_access/ledger.py) против встречного счёта equity:<kind> —
+    все денежные хендлеры пишут только через этот класс.
+    """
+    def __init__(self, pool=None):
+        self.pool = pool
+        self.ledger = Ledger(pool)
+
+    @asynccontextmanager
+    async def _transaction(self, conn):
+        """Своя транзакция или savepoint внутри транзакции вызывающего."""
+        if conn is None:
+            pool = db.db_pool or self.pool
+            if not pool:
+                logger.error("db_pool is None — счётчик не обновлён")
+                yield None
+                return
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    yield conn
+        else:
+            async with conn.transaction():
+                yield conn
+
+    async def _apply(self, conn, query: str, args, kind: str, legs: Dict[str, Any],
+                     ref: Optional[str]) -> Optional[Dict[str, Any]]:
+        async with self._transaction(conn) as conn:
+            if conn is None:
+                return None
+            row = await conn.fetchrow(query, *args)
+            await self.ledger.post(kind, legs, ref, conn=conn)
+        return dict(row) if row else None
+
+    async def add_user_balance(self, user_id: int, delta, username: Optional[str] = None,
+                               with_profit: bool = False, kind: str = "user_balance",
+                               ref: Optional[str] = None, conn=None) -> Optional[Dict[str, Any]]:
+        """
+        balance += delta (и profit/monthly_profit, если with_profit).
+        Новый пользователь создаётся с balance = profit = monthly_profit = delta.
+        username обновляется, только если передан.
+        """
+        profit_sql = (
+            ", profit = users.profit + EXCLUDED.balance"
+            ", monthly_profit = users.monthly_profit + EXCLUDED.balance"
+            if with_profit else ""
+        )
+        return await self._apply(
+            conn,
+            f"""
+            INSERT INTO users (user_id, username, balance, profit, monthly_profit)
+            VALUES ($1, $2, $3, $3, $3)
+            ON CONFLICT (user_id) DO UPDATE
+              SET balance = users.balance + EXCLUDED.balance{profit_sql},
+                  username = COALESCE($4, users.username)
+            RETURNING user_id, username, balance, profit, monthly_profit,
+                      (xmax = 0) AS inserted
+            """,
+            (user_id, username or "Special User", delta, username),
+            kind, {user_account(user_id): delta, f"equity:{kind}": -delta}, ref
+        )
+
+    async def add_group_totals(self, group_key: str, salary_delta=0, cash_delta=0,
+                               kind: str = "group_totals", ref: Optional[str] = None,
+                               conn=None) -> Optional[Dict[str, Any]]:
+        """salary += salary_delta, cash += cash_delta; возвращает новые значения."""
+        return await self._apply(
+            conn,
+            """
+            INSERT INTO group_financial_data (group_key, salary, cash)
+            VALUES ($1, $2, $3)
+            ON CONFLICT (group_key) DO UPDATE
+              SET salary = group_financial_data.salary + EXCLUDED.salary,
+                  cash   = group_financial_data.cash + EXCLUDED.cash
+            RETURNING group_key, salary, cash
+            """,
+            (group_key, salary_delta, cash_delta),
+            kind,
+            {
+                group_account(group_key, "salary"): salary_delta,
+                group_account(group_key, "cash"): cash_delta,
+                f"equity:{kind}": -(salary_delta + cash_delta),
+            },
+            ref
+        )
+
+    async def set_group_totals(self, group_key: str, salary=None, cash=None,
+                               kind: str = "group_reset", ref: Optional[str] = None,
+                               conn=None) -> Optional[Dict[str, Any]]:
+        """
+        Установить salary/cash группы в заданные значения (None — не трогать).
+        Счётчики не перезаписываются: разница с текущими значениями
+        проводится обычной проводкой, и журнал сходится с таблицей.
+        """
+        async with self._transaction(conn) as conn:
+            if conn is None:
+                return None
+            row = await conn.fetchrow(
+                "SELECT salary, cash FROM group_financial_data WHERE group_key=$1 FOR UPDATE",
+                group_key
+            )
+            cur_salary = row["salary"] if row else 0
+            cur_cash = row["cash"] if row else 0
+            return await self.add_group_totals(
+                group_key,
+                salary_delta=0 if salary is None else salary - cur_salary,
+                cash_delta=0 if cash is None else cash - cur_cash,
+                kind=kind, ref=ref, conn=conn
+            )
+
+    async def add_chat_balance(self, chat_id: int, delta, kind: str = "chat_balance",
+                               ref: Optional[str] = None, conn=None) -> Optional[Dict[str, Any]]:
+        """Баланс чата (andry) += delta; возвращает balance до и после."""
+        return await self._apply(
+            conn,
+            """
+            INSERT INTO balances (chat_id, balance)
+            VALUES ($1, $2)
+            ON CONFLICT (chat_id) DO UPDATE
+              SET balance = balances.balance + EXCLUDED.balance, updated_at = NOW()
+            RETURNING chat_id, balance, balance - $2 AS old_balance
+            """,
+            (chat_id, delta),
+            kind, {chat_account(chat_id): delta, f"equity:{kind}": -delta}, ref
+        )
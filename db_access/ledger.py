@@ -0,0 +1,148 @@
+# db_access/ledger.py
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional
+
+import db
+
+logger = logging.getLogger(__name__)
+
+# Встречные счета: их баланс не материализуется (все проводки бьют в одну
+# строку — она стала бы точкой сериализации), а считается по журналу.
+EQUITY_PREFIX = "equity:"
+
+
+def user_account(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def group_account(group_key: str, column: str) -> str:
+    """column — 'salary' или 'cash'."""
+    return f"group:{group_key}:{column}"
+
+
+def chat_account(chat_id: int) -> str:
+    return f"chat:{chat_id}"
+
+
+_POST_SQL = f"""
+WITH legs AS (
+    SELECT account, amount
+    FROM unnest($1::TEXT[], $2::NUMERIC[]) AS l(account, amount)
+), txn AS (
+    SELECT nextval('ledger_txn_seq') AS txn_id
+), ins AS (
+    INSERT INTO ledger_entries (txn_id, account, amount, kind, ref)
+    SELECT txn.txn_id, legs.account, legs.amount, $3, $4
+    FROM legs CROSS JOIN txn
+)
+INSERT INTO account_balances (account, balance)
+SELECT account, amount FROM legs
+WHERE account NOT LIKE '{EQUITY_PREFIX}%'
+ON CONFLICT (account) DO UPDATE
+  SET balance = account_balances.balance + EXCLUDED.balance, updated_at = NOW()
+RETURNING account, balance
+"""
+
+
+class Ledger:
+    """
+    Журнал движения денег с двойной записью.
+
+    post() записывает проводку (сумма ног = 0) одним оператором: все строки
+    ledger_entries вставляются пачкой через unnest, а балансы счетов в
+    account_balances обновляются инкрементально в том же операторе.
+    Баланс счёта — чтение одной строки, сумма за период — диапазон по
+    индексу (account, created_at).
+    """
+    def __init__(self, pool=None):
+        self.pool = pool
+
+    def _pool(self):
+        return db.db_pool or self.pool
+
+    async def post(self, kind: str, legs: Mapping[str, Any], ref: Optional[str] = None,
+                   conn=None) -> Dict[str, Any]:
+        """
+        Записать проводку. legs — {счёт: сумма}; нулевые ноги отбрасываются.
+        Возвращает новые балансы затронутых (нематериализованные — не возвращаются).
+        """
+        legs = {a: v for a, v in legs.items() if v}
+        if not legs:
+            return {}
+        if sum(legs.values()) != 0:
+            raise ValueError(f"Проводка {kind} не сбалансирована: {legs}")
+
+        # фиксированный порядок строк — параллельные проводки не взаимоблокируются
+        accounts = sorted(legs)
+        amounts = [legs[a] for a in accounts]
+        if conn is None:
+            async with self._pool().acquire() as conn:
+                rows = await conn.fetch(_POST_SQL, accounts, amounts, kind, ref)
+        else:
+            rows = await conn.fetch(_POST_SQL, accounts, amounts, kind, ref)
+        return {r["account"]: r["balance"] for r in rows}
+
+    async def transfer(self, kind: str, account: str, amount, contra: str,
+                       ref: Optional[str] = None, conn=None) -> Dict[str, Any]:
+        """Простая проводка: amount на account, -amount на contra."""
+        return await self.post(kind, {account: amount, contra: -amount}, ref, conn=conn)
+
+    async def balance(self, account: str, conn=None):
+        query = "SELECT balance FROM account_balances WHERE account=$1"
+        if account.startswith(EQUITY_PREFIX):
+            query = "SELECT COALESCE(SUM(amount), 0) FROM ledger_entries WHERE account=$1"
+        if conn is None:
+            async with self._pool().acquire() as conn:
+                value = await conn.fetchval(query, account)
+        else:
+            value = await conn.fetchval(query, account)
+        return value or 0
+
+    async def period_total(self, account: str, start: datetime, end: datetime,
+                           kind: Optional[str] = None, direction: Optional[str] = None):
+        """
+        Сумма движений по счёту за [start, end) (опционально — только одного
+        вида). direction: 'in' — только поступления, 'out' — только списания
+        (по модулю), None — чистое изменение.
+        """
+        async with self._pool().acquire() as conn:
+            value = await conn.fetchval(
+                """
+                SELECT COALESCE(SUM(CASE WHEN $5 = 'out' THEN -amount ELSE amount END), 0)
+                FROM ledger_entries
+                WHERE account=$1 AND created_at >= $2 AND created_at < $3
+                  AND ($4::TEXT IS NULL OR kind = $4)
+                  AND ($5::TEXT IS NULL
+                       OR ($5 = 'in' AND amount > 0)
+                       OR ($5 = 'out' AND amount < 0))
+                """,
+                account, start, end, kind, direction
+            )
+        return value or 0
+
+    async def daily_totals(self, account: str, start: datetime, end: datetime,
+                           kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Поступления и списания (по модулю) по счёту за [start, end) по дням UTC:
+        [{"d": date, "plus": ..., "minus": ...}] по возрастанию даты.
+        """
+        async with self._pool().acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT (created_at AT TIME ZONE 'UTC')::DATE AS d,
+                       COALESCE(SUM(amount) FILTER (WHERE amount > 0), 0) AS plus,
+                       COALESCE(-SUM(amount) FILTER (WHERE amount < 0), 0) AS minus
+                FROM ledger_entries
+                WHERE account=$1 AND created_at >= $2 AND created_at < $3
+                  AND ($4::TEXT IS NULL OR kind = $4)
+                GROUP BY d
+                ORDER BY d
+                """,
+                account, start, end, kind
+            )
+        return [dict(r) for r in rows]
+
+
+ledger = Ledger()
@@ -0,0 +1,110 @@
+# db_access/migrator.py
+
+import logging
+import re
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+
+# Имя файла миграции: 0001_initial.sql, 0002_add_something.sql, ...
+_MIGRATION_RE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+# Ключ pg_advisory_lock: одновременно мигрирует только один процесс
+MIGRATION_LOCK_KEY = 7_205_001
+
+SCHEMA_VERSION_DDL = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+"""
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    path: Path
+
+
+def load_migrations(directory: Optional[Path] = None) -> List[Migration]:
+    """
+    Возвращает список файлов миграций, отсортированный по версии.
+    Дубликаты номеров считаются ошибкой разработчика.
+    """
+    directory = directory or MIGRATIONS_DIR
+    migrations: dict[int, Migration] = {}
+    for path in directory.glob("*.sql"):
+        m = _MIGRATION_RE.match(path.name)
+        if not m:
+            logger.warning("Пропускаю файл с неверным именем миграции: %s", path.name)
+            continue
+        version = int(m.group(1))
+        if version in migrations:
+            raise RuntimeError(
+                f"Две миграции с версией {version}: "
+                f"{migrations[version].path.name} и {path.name}"
+            )
+        migrations[version] = Migration(version, m.group(2), path)
+    return [migrations[v] for v in sorted(migrations)]
+
+
+async def current_version(conn) -> int:
+    """Текущая версия схемы (0 — если таблицы schema_version ещё нет)."""
+    try:
+        version = await conn.fetchval("SELECT max(version) FROM schema_version")
+    except asyncpg.UndefinedTableError:
+        return 0
+    return version or 0
+
+
+async def migrate(pool, target: Optional[int] = None) -> int:
+    """
+    Применяет все миграции с версией <= target (по умолчанию — все).
+
+    Быстрый путь: один SELECT версии; если схема актуальна, никакой DDL
+    не выполняется. Иначе берём advisory-lock, перечитываем версию
+    (её мог поднять соседний процесс) и применяем недостающие миграции,
+    каждую — в своей транзакции вместе с записью в schema_version.
+    """
+    migrations = load_migrations()
+    if target is None:
+        target = migrations[-1].version if migrations else 0
+
+    async with pool.acquire() as conn:
+        version = await current_version(conn)
+        if version >= target:
+            return version
+
+        await conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_KEY)
+        try:
+            await conn.execute(SCHEMA_VERSION_DDL)
+            version = await current_version(conn)
+            for mig in migrations:
+                if mig.version <= version or mig.version > target:
+                    continue
+                logger.info("Применяю миграцию %04d_%s", mig.version, mig.name)
+                sql = mig.path.read_text(encoding="utf-8")
+                async with conn.transaction():
+                    await conn.execute(sql)
+                    await conn.execute(
+                        "INSERT INTO schema_version (version, name) VALUES ($1, $2)",
+                        mig.version, mig.name
+                    )
+                version = mig.version
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_KEY)
+
+    return version
+
+
+async def pending_migrations(pool) -> List[Migration]:
+    """Миграции, которые ещё не применены к базе."""
+    async with pool.acquire() as conn:
+        version = await current_version(conn)
+    return [m for m in load_migrations() if m.version > version]
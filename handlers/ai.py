@@ -1,15 +1,21 @@
 # handlers/ai.py
 
 import os
-import asyncio
-import openai
 
 from aiogram import Router, F
 from aiogram.filters.command import Command
 from aiogram.types import Message, CallbackQuery
 from utils.bot_utils import safe_answer
+from utils.send_scheduler import Priority, PriorityMiddleware
+from utils.lanes import LaneMiddleware, AI
+from utils.openai_client import openai_client
 
 router = Router()
+router.message.middleware(PriorityMiddleware(Priority.LOW))
+router.callback_query.middleware(PriorityMiddleware(Priority.LOW))
+# Запросы к OpenAI — ограниченная полоса: под нагрузкой откладываются/отбрасываются
+router.message.middleware(LaneMiddleware(AI))
+router.callback_query.middleware(LaneMiddleware(AI))
 
 @router.message(Command("ai"))
 async def cmd_ai(message: Message):
@@ -18,13 +24,8 @@ async def cmd_ai(message: Message):
         await safe_answer(message, "❌ OpenAI API key is not set.")
         return
 
-    def list_models():
-        openai.api_key = api_key
-        resp = openai.Model.list()
-        return [m.id for m in resp.data]
-
     try:
-        models = await asyncio.to_thread(list_models)
+        models = await openai_client.list_models()
         if not models:
             await safe_answer(message, "⚠️ Не найдено доступных моделей.")
         else:
@@ -40,13 +41,8 @@ async def list_models_for_menu(query: CallbackQuery):
         await safe_answer(query, "❌ OpenAI API key is not set.")
         return
 
-    def list_models():
-        openai.api_key = api_key
-        resp = openai.Model.list()
-        return [m.id for m in resp.data]
-
     try:
-        models = await asyncio.to_thread(list_models)
+        models = await openai_client.list_models()
         if not models:
             await safe_answer(query, "⚠️ Не найдено доступных моделей.")
         else:
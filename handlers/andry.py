@@ -1,5 +1,6 @@
 # handlers/andry.py
 
+import asyncio
 import re
 import logging
 import os
@@ -17,6 +18,9 @@ from aiogram.types import FSInputFile
 from aiogram.filters import Command
 from config import FIN_GROUP_IDS, ADMIN_IDS
 import db
+from utils.fin_report import fin_report
+from db_access.finance_repo import FinanceRepo
+from db_access.ledger import Ledger, chat_account
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -25,58 +29,20 @@ TRANSACTION_PATTERN = re.compile(r'^([+-])\s?(\d+)$')
 UTC = timezone.utc
 
 async def get_balance(pool, chat_id: int) -> float:
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow("SELECT balance FROM balances WHERE chat_id=$1", chat_id)
-        if row:
-            return float(row["balance"])
-        else:
-            await conn.execute("INSERT INTO balances (chat_id, balance) VALUES ($1, 0)", chat_id)
-            return 0.0
-
-async def update_balance(pool, chat_id: int, delta: float) -> float:
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow("SELECT balance FROM balances WHERE chat_id=$1", chat_id)
-        if row:
-            new_balance = float(row["balance"]) + delta
-            await conn.execute(
-                "UPDATE balances SET balance=$1, updated_at=NOW() WHERE chat_id=$2",
-                new_balance, chat_id
-            )
-            return new_balance
-        else:
-            await conn.execute(
-                "INSERT INTO balances (chat_id, balance) VALUES ($1, $2)",
-                chat_id, delta
-            )
-            return delta
-
-async def insert_transaction(pool, chat_id: int, user_id: int, ttype: str, amount: float):
-    async with pool.acquire() as conn:
-        await conn.execute("""
-            INSERT INTO transactions (chat_id, user_id, type, amount)
-            VALUES ($1, $2, $3, $4)
-        """, chat_id, user_id, ttype, amount)
+    return float(await Ledger(pool).balance(chat_account(chat_id)))
 
 async def get_daily_stats(pool, chat_id: int, date: datetime) -> dict:
     start_of_day = datetime(date.year, date.month, date.day, 0, 0, 0, tzinfo=UTC)
     end_of_day = start_of_day + timedelta(days=1)
-    async with pool.acquire() as conn:
-        rows = await conn.fetch("""
-            SELECT type, SUM(amount) as total
-            FROM transactions
-            WHERE chat_id=$1
-              AND created_at >= $2
-              AND created_at <  $3
-            GROUP BY type
-        """, chat_id, start_of_day, end_of_day)
-    plus_total = 0.0
-    minus_total = 0.0
-    for row in rows:
-        if row["type"] == '+':
-            plus_total = float(row["total"])
-        else:
-            minus_total = float(row["total"])
-    current_balance = await get_balance(pool, chat_id)
+    ledger = Ledger(pool)
+    account = chat_account(chat_id)
+    plus_total, minus_total, current_balance = await asyncio.gather(
+        ledger.period_total(account, start_of_day, end_of_day, kind="andry", direction="in"),
+        ledger.period_total(account, start_of_day, end_of_day, kind="andry", direction="out"),
+        ledger.balance(account),
+    )
+    plus_total, minus_total = float(plus_total), float(minus_total)
+    current_balance = float(current_balance)
     net = plus_total - minus_total
     start_balance = current_balance - net
     return {
@@ -90,31 +56,10 @@ async def get_daily_stats(pool, chat_id: int, date: datetime) -> dict:
 async def generate_charts_example(pool, chat_id: int):
     end_date = datetime.now(tz=UTC)
     start_date = end_date - timedelta(days=7)
-    async with pool.acquire() as conn:
-        rows = await conn.fetch("""
-            SELECT date(created_at) AS d, type, SUM(amount) as total
-            FROM transactions
-            WHERE chat_id=$1
-              AND created_at >= $2
-              AND created_at <= $3
-            GROUP BY date(created_at), type
-            ORDER BY d
-        """, chat_id, start_date, end_date)
-    data_by_day = {}
-    for row in rows:
-        day = row["d"]
-        ttype = row["type"]
-        total = float(row["total"])
-        if day not in data_by_day:
-            data_by_day[day] = {"plus": 0.0, "minus": 0.0}
-        if ttype == '+':
-            data_by_day[day]["plus"] += total
-        else:
-            data_by_day[day]["minus"] += total
-    sorted_days = sorted(data_by_day.keys())
-    plus_values = [data_by_day[d]["plus"] for d in sorted_days]
-    minus_values = [data_by_day[d]["minus"] for d in sorted_days]
-    day_labels = [d.strftime("%m-%d") for d in sorted_days]
+    rows = await Ledger(pool).daily_totals(chat_account(chat_id), start_date, end_date, kind="andry")
+    plus_values = [float(r["plus"]) for r in rows]
+    minus_values = [float(r["minus"]) for r in rows]
+    day_labels = [r["d"].strftime("%m-%d") for r in rows]
     fig, axes = plt.subplots(1, 3, figsize=(14, 4))
     axes[0].plot(day_labels, plus_values, marker='o', label='Доходы')
     axes[0].plot(day_labels, minus_values, marker='o', label='Расходы')
@@ -180,14 +125,13 @@ async def on_text(message: Message):
         return
     sign, number_str = match.groups()
     amount = float(number_str)
-    old_balance = await get_balance(db.db_pool, message.chat.id)
-    if sign == '+':
-        delta = amount
-        await insert_transaction(db.db_pool, message.chat.id, message.from_user.id, '+', amount)
-    else:
-        delta = -amount
-        await insert_transaction(db.db_pool, message.chat.id, message.from_user.id, '-', amount)
-    new_balance = await update_balance(db.db_pool, message.chat.id, delta)
+    delta = amount if sign == '+' else -amount
+    # движение пишется только проводкой журнала — графики строятся по ней же
+    row = await FinanceRepo(db.db_pool).add_chat_balance(
+        message.chat.id, delta, kind="andry", ref=str(message.from_user.id)
+    )
+    old_balance, new_balance = float(row["old_balance"]), float(row["balance"])
+    fin_report.set_fin_balance(message.chat.id, new_balance)
     if delta >= 0:
         status_line = "💰 Баланс пополнен!"
         change_text = f"➕ Пополнение: {abs(delta):,.0f} ¥"
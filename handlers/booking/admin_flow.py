@@ -8,13 +8,18 @@ from aiogram.utils.keyboard import InlineKeyboardMarkup, InlineKeyboardButton
 import logging
 
 from constants.booking_const import status_mapping, groups_data
-from handlers.booking.reporting import update_group_message
+from handlers.booking.reporting import update_group_message, forget_group_message
 from utils.bot_utils import safe_answer
+from utils.admin_roster import admin_roster
 from aiogram import Router
 
 from handlers.booking.rewards import apply_special_user_reward
+from handlers.booking.data_manager import BookingDataManager
+from db_access.booking_repo import BookingRepo
 
 router = Router()
+data_mgr = BookingDataManager(groups_data)
+repo = BookingRepo(None)
 logger = logging.getLogger(__name__)
 PHOTO_ID = "photo/IMG_2585.JPG"
 
@@ -26,14 +31,16 @@ async def admin_click_slot(cb: CallbackQuery):
     if not ginfo or cb.message.chat.id != ginfo["chat_id"]:
         return await cb.answer("Нет прав!", show_alert=True)
 
-    member = await cb.bot.get_chat_member(cb.message.chat.id, cb.from_user.id)
-    if member.status not in ("administrator", "creator"):
+    if not await admin_roster.is_admin(cb.bot, cb.message.chat.id, cb.from_user.id):
         return await cb.answer("Только админ!", show_alert=True)
 
     try:
         await cb.message.delete()
     except Exception:
         pass
+    # клик пришёл с табло группы — после выбора статуса его нужно отрисовать заново
+    if cb.message.message_id == ginfo.get("message_id"):
+        forget_group_message(gk)
 
     codes = list(status_mapping.items())
     status_buttons = [
@@ -78,8 +85,7 @@ async def admin_click_status(cb: CallbackQuery):
     if not ginfo or cb.message.chat.id != ginfo["chat_id"]:
         return await cb.answer("Нет прав!", show_alert=True)
 
-    member = await cb.bot.get_chat_member(cb.message.chat.id, cb.from_user.id)
-    if member.status not in ("administrator", "creator"):
+    if not await admin_roster.is_admin(cb.bot, cb.message.chat.id, cb.from_user.id):
         return await cb.answer("Нет прав!", show_alert=True)
 
     try:
@@ -92,34 +98,12 @@ async def admin_click_status(cb: CallbackQuery):
         return await cb.answer()
 
     if code == "-1":
-        uid = ginfo["slot_bookers"].pop((day, slot), None)
-        if uid and slot in ginfo["booked_slots"].get(day, []):
-            ginfo["booked_slots"][day].remove(slot)
-
-        from utils.time_utils import get_adjacent_time_slots
-
-        adjs = get_adjacent_time_slots(slot)
-        for adj in adjs:
-            if adj in ginfo["unavailable_slots"][day]:
-                ginfo["unavailable_slots"][day].remove(adj)
-                ginfo["time_slot_statuses"].pop((day, adj), None)
-                if ginfo["slot_bookers"].get((day, adj)) == uid:
-                    ginfo["slot_bookers"].pop((day, adj), None)
-
-        ginfo["time_slot_statuses"].pop((day, slot), None)
+        data_mgr.release_slot(gk, day, slot)
 
         import db
         try:
             if db.db_pool:
-                async with db.db_pool.acquire() as con:
-                    await con.execute(
-                        "DELETE FROM bookings WHERE group_key=$1 AND day=$2 AND time_slot=$3",
-                        gk, day, slot
-                    )
-                    await con.execute(
-                        "DELETE FROM group_time_slot_statuses WHERE group_key=$1 AND day=$2 AND time_slot=$3",
-                        gk, day, slot
-                    )
+                await repo.cancel_booking(gk, day, slot)
         except Exception as e:
             logger.error(f"DB error on delete: {e}")
 
@@ -132,21 +116,12 @@ async def admin_click_status(cb: CallbackQuery):
     import db
     try:
         if db.db_pool:
-            async with db.db_pool.acquire() as con:
-                await con.execute(
-                    "UPDATE bookings SET status_code=$1, status=$2 WHERE group_key=$3 AND day=$4 AND time_slot=$5",
-                    code, emoji, gk, day, slot
-                )
-                await con.execute(
-                    """
-                    INSERT INTO group_time_slot_statuses
-                      (group_key, day, time_slot, status, user_id)
-                    VALUES ($1,$2,$3,$4,$5)
-                    ON CONFLICT (group_key, day, time_slot)
-                    DO UPDATE SET status=excluded.status, user_id=excluded.user_id
-                    """,
-                    gk, day, slot, emoji, ginfo["slot_bookers"].get((day, slot))
-                )
+            row = await repo.update_status(
+                gk, day, slot, code, emoji, ginfo["slot_bookers"].get((day, slot))
+            )
+            # владелец брони из БД — источник истины для памяти
+            if row:
+                ginfo["slot_bookers"][(day, slot)] = row["user_id"]
     except Exception as e:
         logger.error(f"DB error: {e}")
 
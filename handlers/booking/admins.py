@@ -0,0 +1,25 @@
+# handlers/booking/admins.py
+
+import logging
+
+from aiogram import Router
+from aiogram.types import ChatMemberUpdated
+
+from utils.admin_roster import admin_roster
+
+logger = logging.getLogger(__name__)
+router = Router()
+
+
+@router.chat_member()
+async def on_chat_member(event: ChatMemberUpdated):
+    """Назначили/сняли админа, участник вышел — обновляем кэш админов."""
+    admin_roster.update_member(
+        event.chat.id, event.new_chat_member.user.id, event.new_chat_member.status
+    )
+
+
+@router.my_chat_member()
+async def on_my_chat_member(event: ChatMemberUpdated):
+    """Права самого бота изменились — список админов перечитаем при следующей проверке."""
+    admin_roster.forget(event.chat.id)
@@ -12,9 +12,10 @@ import handlers.language as lang_mod        # <--- import the entire handlers.la
 import db
 from constants.booking_const import groups_data
 from handlers.booking.reporting import update_group_message
-from utils.time_utils import get_adjacent_time_slots
+from handlers.booking.data_manager import BookingDataManager
 
 router = Router()
+data_mgr = BookingDataManager(groups_data)
 PHOTO_ID = "photo/IMG_2585.JPG"
 
 
@@ -26,11 +27,6 @@ async def cmd_off(event):
     """
     # Определяем uid и куда отвечать
     if isinstance(event, CallbackQuery):
-        # Игнорируем колбэки от самого бота
-        me = await event.bot.get_me()
-        if event.from_user.id == me.id:
-            return
-
         uid = event.from_user.id
         answer_target = event
     elif isinstance(event, Message):
@@ -55,9 +51,9 @@ async def cmd_off(event):
         rows = await conn.fetch(
             """
             SELECT id, group_key, day, time_slot
-            FROM bookings
+            FROM bookings_current
             WHERE user_id = $1
-            ORDER BY day, time_slot
+            ORDER BY slot_date, time_slot
             """,
             uid
         )
@@ -113,8 +109,8 @@ async def cmd_off_admin(message: Message):
         rows = await conn.fetch(
             """
             SELECT id, group_key, day, time_slot
-            FROM bookings
-            ORDER BY day, time_slot
+            FROM bookings_current
+            ORDER BY slot_date, time_slot
             """
         )
 
@@ -146,11 +142,6 @@ async def cmd_off_admin(message: Message):
 # ───────────────────── Callback: пользователь отменяет свою бронь ─────────────
 @router.callback_query(F.data.startswith("off_cancel_user_"))
 async def off_cancel_user(callback: CallbackQuery, state: FSMContext):
-    # Игнорируем колбэки от самого бота
-    me = await callback.bot.get_me()
-    if callback.from_user.id == me.id:
-        return
-
     uid = callback.from_user.id
     lang = await lang_mod.get_user_language(uid)
     bid = int(callback.data.removeprefix("off_cancel_user_"))
@@ -159,7 +150,7 @@ async def off_cancel_user(callback: CallbackQuery, state: FSMContext):
         row = await conn.fetchrow(
             """
             SELECT group_key, day, time_slot
-            FROM bookings
+            FROM bookings_current
             WHERE id = $1 AND user_id = $2
             """,
             bid, uid
@@ -178,22 +169,13 @@ async def off_cancel_user(callback: CallbackQuery, state: FSMContext):
         await conn.execute(
             """
             DELETE FROM group_time_slot_statuses
-            WHERE group_key = $1 AND day = $2 AND time_slot = $3
+            WHERE group_key = $1 AND slot_date = label_date($2) AND time_slot = $3
             """,
             gk, day, slot
         )
 
     # Обновляем in-memory groups_data
-    g = groups_data[gk]
-    if slot in g["booked_slots"][day]:
-        g["booked_slots"][day].remove(slot)
-    g["slot_bookers"].pop((day, slot), None)
-    g["time_slot_statuses"].pop((day, slot), None)
-    g["unavailable_slots"][day].discard(slot)
-    for adj in get_adjacent_time_slots(slot):
-        if adj not in g["booked_slots"][day]:
-            g["unavailable_slots"][day].discard(adj)
-            g["time_slot_statuses"].pop((day, adj), None)
+    data_mgr.release_slot(gk, day, slot)
 
     # Обновляем групповое сообщение (если есть)
     await update_group_message(callback.bot, gk)
@@ -207,11 +189,6 @@ async def off_cancel_user(callback: CallbackQuery, state: FSMContext):
 # ───────────────────── Callback: админ отменяет чужую бронь ───────────────────
 @router.callback_query(F.data.startswith("off_cancel_admin_"))
 async def off_cancel_admin(callback: CallbackQuery, state: FSMContext):
-    # Игнорируем колбэки от самого бота
-    me = await callback.bot.get_me()
-    if callback.from_user.id == me.id:
-        return
-
     lang = await lang_mod.get_user_language(callback.from_user.id)
     bid = int(callback.data.removeprefix("off_cancel_admin_"))
 
@@ -219,7 +196,7 @@ async def off_cancel_admin(callback: CallbackQuery, state: FSMContext):
         row = await conn.fetchrow(
             """
             SELECT group_key, day, time_slot
-            FROM bookings
+            FROM bookings_current
             WHERE id = $1
             """,
             bid
@@ -234,6 +211,10 @@ async def off_cancel_admin(callback: CallbackQuery, state: FSMContext):
         gk = row["group_key"]
         await conn.execute("DELETE FROM bookings WHERE id = $1", bid)
 
+    # Освобождаем слот в памяти, иначе он останется занятым до перезапуска
+    if gk in groups_data:
+        data_mgr.release_slot(gk, row["day"], row["time_slot"])
+
     # Обновляем групповое сообщение (если есть)
     await update_group_message(callback.bot, gk)
     await safe_answer(
@@ -1,20 +1,24 @@
 # handlers/booking/data_manager.py
 
 import logging
-from typing import Dict, Any
-from utils.time_utils import get_adjacent_time_slots
+from typing import Dict, Any, Optional
+from utils.slot_board import SlotBoard
 import db
+from db_access.booking_repo import BookingRepo
 from handlers.startemoji import get_next_emoji
 
 logger = logging.getLogger(__name__)
+repo = BookingRepo(db.db_pool)
 
 class BookingDataManager:
     """
-    Менеджер локальной in-memory структуры groups_data:
-      - booked_slots
-      - slot_bookers
-      - time_slot_statuses
-      - unavailable_slots
+    Менеджер локальной in-memory структуры groups_data.
+
+    Источник истины о занятости — SlotBoard (битовые маски по дням)
+    в ginfo["board"]. Поля booked_slots / unavailable_slots / статусы
+    "unavailable" / slot_bookers соседних слотов — производные
+    представления, которые пересчитываются после каждого изменения,
+    чтобы отчёты и старые обработчики читали их как раньше.
     """
     def __init__(self, groups: Dict[str, Any]):
         # храним прямую ссылку на константу constants.booking_const.groups_data
@@ -26,52 +30,114 @@ class BookingDataManager:
     def get_group_info(self, group_key: str) -> Dict[str, Any]:
         return self.groups[group_key]
 
+    def board(self, group_key: str) -> SlotBoard:
+        """SlotBoard группы; при первом обращении строится из booked_slots."""
+        g = self.groups[group_key]
+        board = g.get("board")
+        if board is None:
+            board = SlotBoard.from_slots(g.get("booked_slots", {}))
+            g["board"] = board
+        return board
+
+    def can_book(self, group_key: str, day: str, slot: str) -> bool:
+        return self.board(group_key).can_book(day, slot)
+
     def book_slot(self, group_key: str, day: str, slot: str, user_id: int, emoji_for_slot: str = None):
         g = self.groups[group_key]
-        # 1) отмечаем сам слот
-        g["booked_slots"].setdefault(day, []).append(slot)
+        self.board(group_key).book(day, slot)
         g["slot_bookers"][(day, slot)] = user_id
         g["time_slot_statuses"][(day, slot)] = "booked"
         # для отладки или если надо видеть emoji в памяти:
         if emoji_for_slot:
             g.setdefault("slot_emojis", {})[(day, slot)] = emoji_for_slot
-        # 2) блокируем соседние
-        for adj in get_adjacent_time_slots(slot):
-            if adj not in g["booked_slots"].get(day, []):
-                g["unavailable_slots"].setdefault(day, set()).add(adj)
-                g["time_slot_statuses"][(day, adj)] = "unavailable"
-                g["slot_bookers"][(day, adj)] = user_id
+        self._sync_day(g, day, holder=user_id)
+
+    def release_slot(self, group_key: str, day: str, slot: str) -> Optional[int]:
+        """Снимает бронь слота и освободившиеся соседние; возвращает user_id брони."""
+        g = self.groups[group_key]
+        self.board(group_key).release(day, slot)
+        uid = g["slot_bookers"].pop((day, slot), None)
+        g["time_slot_statuses"].pop((day, slot), None)
+        g.get("slot_emojis", {}).pop((day, slot), None)
+        self._sync_day(g, day)
+        return uid
+
+    def clear_group(self, group_key: str):
+        """Полностью очищает слоты группы на все дни."""
+        g = self.groups[group_key]
+        self.board(group_key).clear()
+        g["booked_slots"] = {day: [] for day in g.get("booked_slots", {})}
+        g["unavailable_slots"] = {day: set() for day in g.get("unavailable_slots", {})}
+        g["time_slot_statuses"] = {}
+        g["slot_bookers"] = {}
+        g["slot_emojis"] = {}
+
+    def roll_day(self, group_key: str, src: str = "Завтра", dst: str = "Сегодня"):
+        """Переносит брони src → dst; старые данные dst отбрасываются, src пустеет."""
+        g = self.groups[group_key]
+        self.board(group_key).move_day(src, dst)
+        for field in ("time_slot_statuses", "slot_bookers", "slot_emojis"):
+            old = g.get(field, {})
+            g[field] = {
+                ((dst if d == src else d), s): v
+                for (d, s), v in old.items()
+                if d != dst
+            }
+        g["unavailable_slots"][dst] = set()
+        g["unavailable_slots"][src] = set()
+        for day in (src, dst):
+            self._sync_day(g, day)
+
+    def _sync_day(self, g: Dict[str, Any], day: str, holder: Optional[int] = None):
+        """Пересчитывает производные поля дня по маске SlotBoard."""
+        board = g["board"]
+        statuses = g["time_slot_statuses"]
+        bookers = g["slot_bookers"]
+        before = g["unavailable_slots"].get(day, set())
+        after = board.unavailable_slots(day)
+
+        for adj in before - after:
+            if statuses.get((day, adj)) == "unavailable":
+                statuses.pop((day, adj), None)
+            if not board.is_booked(day, adj):
+                bookers.pop((day, adj), None)
+        for adj in after - before:
+            statuses[(day, adj)] = "unavailable"
+            if holder is not None:
+                bookers[(day, adj)] = holder
+
+        g["booked_slots"][day] = board.booked_slots(day)
+        g["unavailable_slots"][day] = after
 
 # --- Асинхронная функция для бронирования слота с записью в БД и ротацией эмодзи ---
-async def async_book_slot(group_key: str, day: str, slot: str, user_id: int):
+async def async_book_slot(group_key: str, day: str, slot: str, user_id: int) -> Optional[str]:
     """
-    Асинхронное бронирование: делает ротацию эмодзи,
-    записывает бронирование в БД и обновляет in-memory.
+    Асинхронное бронирование: проверяет конфликт по SlotBoard,
+    занимает слот in-memory, делает ротацию эмодзи и записывает бронь
+    и статус слота в БД одним оператором.
+    Возвращает emoji брони или None, если слот уже занят/заблокирован.
     """
-    emoji_for_slot = await get_next_emoji(user_id)
-
-    # 1. Записываем в БД, конфликтуем по (group_key, day, time_slot)
-    if db.db_pool:
-        async with db.db_pool.acquire() as conn:
-            await conn.execute(
-                """
-                INSERT INTO bookings
-                    (group_key, day, time_slot, user_id, status, emoji)
-                VALUES ($1, $2, $3, $4, $5, $6)
-                ON CONFLICT (group_key, day, time_slot)
-                DO UPDATE
-                  SET
-                    user_id = EXCLUDED.user_id,
-                    status  = EXCLUDED.status,
-                    emoji   = EXCLUDED.emoji
-                """,
-                group_key, day, slot, user_id, "booked", emoji_for_slot
-            )
-
-    # 2. Обновляем in-memory
     from constants.booking_const import groups_data
     mgr = BookingDataManager(groups_data)
-    mgr.book_slot(group_key, day, slot, user_id, emoji_for_slot=emoji_for_slot)
+
+    # 1. Проверка и захват слота без await между ними — параллельный
+    #    клик другого пользователя увидит слот уже занятым
+    if not mgr.can_book(group_key, day, slot):
+        logger.info(f"Slot conflict: {group_key} {day} {slot} for user {user_id}")
+        return None
+    mgr.book_slot(group_key, day, slot, user_id)
+
+    emoji_for_slot = await get_next_emoji(user_id)
+    groups_data[group_key].setdefault("slot_emojis", {})[(day, slot)] = emoji_for_slot
+
+    # 2. Бронь и статус слота — один оператор (CTE) в БД
+    try:
+        if db.db_pool:
+            await repo.book_slot(group_key, day, slot, user_id, emoji_for_slot)
+    except Exception:
+        # бронь не сохранилась — освобождаем слот в памяти
+        mgr.release_slot(group_key, day, slot)
+        raise
 
     logger.info(f"Booked slot: {group_key} {day} {slot} for user {user_id} with emoji {emoji_for_slot}")
     return emoji_for_slot
@@ -3,6 +3,7 @@
 import logging
 import db
 from constants.booking_const import groups_data
+from utils.slot_board import SlotBoard
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +13,7 @@ async def load_slots_from_db():
       - booked_slots и slot_bookers и slot_emojis из таблицы bookings
       - time_slot_statuses из таблицы group_time_slot_statuses
       - unavailable_slots для статусов 'unavailable'
+      - board (SlotBoard) по загруженным броням
     """
     pool = db.db_pool
     if not pool:
@@ -29,7 +31,7 @@ async def load_slots_from_db():
     # 2) Загружаем bookings c emoji
     async with pool.acquire() as conn:
         rows = await conn.fetch(
-            "SELECT group_key, day, time_slot, user_id, emoji FROM bookings"
+            "SELECT group_key, day, time_slot, user_id, emoji FROM bookings_current"
         )
     for row in rows:
         gk, day, slot, uid, emoji = row["group_key"], row["day"], row["time_slot"], row["user_id"], row["emoji"]
@@ -37,11 +39,13 @@ async def load_slots_from_db():
             groups_data[gk]["booked_slots"][day].append(slot)
             groups_data[gk]["slot_bookers"][(day, slot)] = uid
             groups_data[gk]["slot_emojis"][(day, slot)] = emoji or "❓"
+    for g in groups_data.values():
+        g["board"] = SlotBoard.from_slots(g["booked_slots"])
 
     # 3) Загружаем статусы
     async with pool.acquire() as conn:
         rows = await conn.fetch(
-            "SELECT group_key, day, time_slot, status FROM group_time_slot_statuses"
+            "SELECT group_key, day, time_slot, status FROM slot_statuses_current"
         )
     for row in rows:
         gk, day, slot, st = (
@@ -14,6 +14,8 @@ from handlers.booking.reporting import update_group_message, send_financial_repo
 from handlers.booking.rewards import update_user_financial_info
 from handlers.states import BookPaymentStates
 from utils.bot_utils import safe_answer
+from utils.admin_roster import admin_roster
+from db_access.finance_repo import FinanceRepo
 
 import db
 import asyncio
@@ -23,6 +25,8 @@ router = Router()
 
 SPECIAL_USER_IDS = {7935161063, 7281089930, 7894353415}
 
+finance = FinanceRepo()
+
 
 @router.callback_query(F.data.startswith("payment_method|"))
 async def process_payment_method(cb: CallbackQuery, state: FSMContext):
@@ -33,8 +37,7 @@ async def process_payment_method(cb: CallbackQuery, state: FSMContext):
     if not ginfo or cb.message.chat.id != ginfo["chat_id"]:
         return await safe_answer(cb, get_message(lang, "no_permission"), show_alert=True)
 
-    member = await cb.bot.get_chat_member(cb.message.chat.id, cb.from_user.id)
-    if member.status not in ("administrator", "creator"):
+    if not await admin_roster.is_admin(cb.bot, cb.message.chat.id, cb.from_user.id):
         return await safe_answer(cb, get_message(lang, "no_permission"), show_alert=True)
 
     if method in ("cash", "beznal"):
@@ -70,7 +73,7 @@ async def process_payment_amount(message: Message, state: FSMContext):
 
     async with db.db_pool.acquire() as conn:
         row = await conn.fetchrow(
-            "SELECT user_id FROM bookings WHERE group_key=$1 AND day=$2 AND time_slot=$3",
+            "SELECT user_id FROM bookings WHERE group_key=$1 AND slot_date=label_date($2) AND time_slot=$3",
             gk, day, slot
         )
     if not row:
@@ -95,19 +98,21 @@ async def update_booking_payment(booked, gk, day, slot, method, amt, code, bot,
     deduct = special_deduct.get(str(code), 0) if is_special else standard_deduct.get(str(code), 0)
     net = (amt - deduct) / 2 if is_special else amt - deduct
 
-    groups_data[gk]["salary"] += base
-    if method == "cash":
-        groups_data[gk]["cash"] += amt
-
+    cash_delta = amt if method == "cash" else 0
     async with db.db_pool.acquire() as conn:
-        await conn.execute(
-            "UPDATE group_financial_data SET salary=$1, cash=$2 WHERE group_key=$3",
-            groups_data[gk]["salary"], groups_data[gk]["cash"], gk
-        )
-        await conn.execute(
-            "UPDATE bookings SET payment_method=$1, amount=$2 WHERE group_key=$3 AND day=$4 AND time_slot=$5 AND user_id=$6",
-            method, amt, gk, day, slot, booked
-        )
+        async with conn.transaction():
+            await conn.execute(
+                "UPDATE bookings SET payment_method=$1, amount=$2 "
+                "WHERE group_key=$3 AND slot_date=label_date($4) AND time_slot=$5 AND user_id=$6",
+                method, amt, gk, day, slot, booked
+            )
+            totals = await finance.add_group_totals(
+                gk, base, cash_delta, kind="booking_payment", ref=f"{gk}|{day}|{slot}", conn=conn
+            )
+            # память — из значений, посчитанных БД, сразу после UPSERT: строка
+            # заблокирована до COMMIT, поэтому более свежий итог придёт позже
+            groups_data[gk]["salary"] = totals["salary"]
+            groups_data[gk]["cash"] = totals["cash"]
 
     # Notify user of their new balance
     await update_user_financial_info(booked, net, bot)
@@ -117,7 +122,7 @@ async def update_booking_payment(booked, gk, day, slot, method, amt, code, bot,
     variant = groups_data[gk].get("distribution_variant") or "variant_400"
     dist_amt = distribution_variants[variant].get(str(code), 0)
     if dist_amt and target_id:
-        await update_user_financial_info(target_id, dist_amt, bot)
+        await update_user_financial_info(target_id, dist_amt, bot, kind="distribution")
 
     # Update reports
     await update_group_message(bot, gk)
@@ -135,21 +140,20 @@ async def handle_agent_payment(cb: CallbackQuery, gk: str, day: str, slot: str,
     deduct_map = {"0": 1500, "1": 2100, "2": 3000, "3": 4500}
     deduct = deduct_map.get(code, 0)
 
-    groups_data[gk]["salary"] += base
     async with db.db_pool.acquire() as conn:
-        await conn.execute(
-            "UPDATE group_financial_data SET salary=$1 WHERE group_key=$2",
-            groups_data[gk]["salary"], gk
+        totals = await finance.add_group_totals(
+            gk, base, 0, kind="agent_payment", ref=f"{gk}|{day}|{slot}", conn=conn
         )
+        groups_data[gk]["salary"] = totals["salary"]
         row = await conn.fetchrow(
-            "SELECT user_id FROM bookings WHERE group_key=$1 AND day=$2 AND time_slot=$3",
+            "SELECT user_id FROM bookings WHERE group_key=$1 AND slot_date=label_date($2) AND time_slot=$3",
             gk, day, slot
         )
     if not row:
         return await safe_answer(cb, get_message(lang, "no_such_booking"), show_alert=True)
 
     booked = row["user_id"]
-    await update_user_financial_info(booked, -deduct, cb.bot)
+    await update_user_financial_info(booked, -deduct, cb.bot, kind="agent_deduct")
 
     await update_group_message(cb.bot, gk)
     await send_financial_report(cb.bot)
@@ -6,17 +6,20 @@ from aiogram.types import CallbackQuery, Message
 from aiogram.enums import ParseMode
 from aiogram.exceptions import TelegramBadRequest
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from config import is_user_admin, FIN_GROUP_IDS, FINANCIAL_REPORT_GROUP_ID
+import asyncio
+import hashlib
 import logging, html
-from handlers.language import get_user_language, get_message
+from handlers.language import get_message
 import db
 from constants.booking_const import (
     BOOKING_REPORT_GROUP_ID,
-    FINANCIAL_REPORT_GROUP_ID,
     groups_data
 )
 from utils.text_utils import format_html_pre
+from utils.fin_report import fin_report
+from utils.send_scheduler import Priority, send_priority
 from utils.time_utils import generate_daily_time_slots as generate_time_slots
+from utils.user_context import UserContext
 from aiogram import Router
 
 router = Router()
@@ -34,7 +37,7 @@ async def send_booking_report(bot: Bot, uid: int, gk: str, slot: str, day: str):
                 row = await con.fetchrow(
                     "SELECT u.username, b.emoji "
                     "FROM users u JOIN bookings b ON u.user_id=b.user_id "
-                    "WHERE u.user_id=$1 AND b.group_key=$2 AND b.day=$3 AND b.time_slot=$4",
+                    "WHERE u.user_id=$1 AND b.group_key=$2 AND b.slot_date=label_date($3) AND b.time_slot=$4",
                     uid, gk, day, slot
                 )
                 if row:
@@ -49,17 +52,28 @@ async def send_booking_report(bot: Bot, uid: int, gk: str, slot: str, day: str):
         f"🌹 Группа: {gk}\n"
         f"⏰ Время: {slot} ({day})"
     )
-    await bot.send_message(
-        chat_id=BOOKING_REPORT_GROUP_ID,
-        text=f"<pre>{body}</pre>",
-        parse_mode=ParseMode.HTML,
-    )
+    with send_priority(Priority.LOW):
+        await bot.send_message(
+            chat_id=BOOKING_REPORT_GROUP_ID,
+            text=f"<pre>{body}</pre>",
+            parse_mode=ParseMode.HTML,
+        )
 
 
-async def update_group_message(bot: Bot, group_key: str):
+# ───────────────────── Табло группы (редактируется на месте) ─────────────────────
+# Всплеск изменений по группе (бронь → статус → оплата) сводится к одному
+# редактированию сообщения через BOARD_DEBOUNCE секунд после первого запроса.
+BOARD_DEBOUNCE = 0.7
+
+_board_tasks: dict[str, asyncio.Task] = {}
+# Группы, табло которых изменилось, пока задача отрисовки уже запланирована
+_board_dirty: set[str] = set()
+# group_key -> (message_id, хэш текста и клавиатуры последнего отрисованного табло)
+_board_rendered: dict[str, tuple[int, str]] = {}
+
+
+def _build_group_board(group_key: str):
     ginfo = groups_data[group_key]
-    chat_id = ginfo["chat_id"]
-    user_lang = "ru"
 
     lines = [
         "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━",
@@ -78,19 +92,11 @@ async def update_group_message(bot: Bot, group_key: str):
         for slot in generate_time_slots():
             st = ginfo["time_slot_statuses"].get((day, slot))
             if st in final_statuses:
-                uid = ginfo["slot_bookers"].get((day, slot))
                 emoji = ginfo.get("slot_emojis", {}).get((day, slot), "❓")
                 lines.append(f"{slot} {st} {emoji}")
 
     text = format_html_pre("\n".join(lines))
 
-    old_id = ginfo.get("message_id")
-    if old_id:
-        try:
-            await bot.delete_message(chat_id, old_id)
-        except:
-            pass
-
     builder = InlineKeyboardBuilder()
     for day in ("Сегодня","Завтра"):
         for slot in generate_time_slots():
@@ -103,10 +109,46 @@ async def update_group_message(bot: Bot, group_key: str):
     builder.adjust(1)
     kb = builder.as_markup()
 
+    digest = hashlib.sha1((text + kb.model_dump_json()).encode()).hexdigest()
+    return text, kb, digest
+
+
+async def _render_group_board(bot: Bot, group_key: str):
+    """
+    Отрисовывает табло группы: если ничего не изменилось — ничего не делает,
+    иначе редактирует текущее сообщение. Новое сообщение отправляется,
+    только если старого нет или его нельзя отредактировать.
+    """
+    ginfo = groups_data[group_key]
+    chat_id = ginfo["chat_id"]
+    text, kb, digest = _build_group_board(group_key)
+
+    old_id = ginfo.get("message_id")
+    if old_id:
+        if _board_rendered.get(group_key) == (old_id, digest):
+            return
+        try:
+            await bot.edit_message_text(
+                text=text, chat_id=chat_id, message_id=old_id,
+                parse_mode=ParseMode.HTML, reply_markup=kb
+            )
+            _board_rendered[group_key] = (old_id, digest)
+            return
+        except TelegramBadRequest as e:
+            if "message is not modified" in str(e):
+                _board_rendered[group_key] = (old_id, digest)
+                return
+            logger.info("Табло %s не отредактировать (%s), отправляю заново", group_key, e)
+        try:
+            await bot.delete_message(chat_id, old_id)
+        except Exception:
+            pass
+
     msg = await bot.send_message(
         chat_id, text=text, parse_mode=ParseMode.HTML, reply_markup=kb
     )
     ginfo["message_id"] = msg.message_id
+    _board_rendered[group_key] = (msg.message_id, digest)
 
     if db.db_pool:
         async with db.db_pool.acquire() as conn:
@@ -115,72 +157,69 @@ async def update_group_message(bot: Bot, group_key: str):
                 msg.message_id, group_key
             )
 
+
+async def _render_later(bot: Bot, group_key: str):
+    """
+    Одна задача на группу: пока она не завершилась, новые запросы только
+    помечают табло изменённым, и отрисовки никогда не идут параллельно
+    (иначе более старый edit мог бы прийти в Telegram последним).
+    Изменения во время отрисовки — ещё один проход после паузы.
+    """
+    while True:
+        await asyncio.sleep(BOARD_DEBOUNCE)
+        _board_dirty.discard(group_key)
+        try:
+            with send_priority(Priority.LOW):
+                await _render_group_board(bot, group_key)
+        except Exception as e:
+            logger.error(f"Ошибка обновления табло группы {group_key}: {e}")
+        if group_key not in _board_dirty:
+            return
+
+
+async def update_group_message(bot: Bot, group_key: str):
+    """
+    Запрашивает перерисовку табло группы. Повторные вызовы в пределах
+    BOARD_DEBOUNCE сливаются в одну отрисовку с актуальным состоянием.
+    """
+    task = _board_tasks.get(group_key)
+    if task is None or task.done():
+        _board_tasks[group_key] = asyncio.create_task(_render_later(bot, group_key))
+    else:
+        _board_dirty.add(group_key)
+
+
+def forget_group_message(group_key: str):
+    """Табло удалено вручную (например, по клику админа) — следующая отрисовка не пропускается."""
+    _board_rendered.pop(group_key, None)
+
+
+async def drain_group_messages():
+    """Дожидается всех запланированных перерисовок табло (завершение работы, тесты)."""
+    while True:
+        pending = [t for t in _board_tasks.values() if not t.done()]
+        if not pending:
+            return
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
 async def send_financial_report(bot: Bot):
-    if not db.db_pool:
-        return
-    total_sal = sum(g["salary"] for g in groups_data.values())
-    total_cash = sum(g["cash"] for g in groups_data.values())
-
-    async with db.db_pool.acquire() as conn:
-        rows = await conn.fetch("SELECT balance FROM users")
-    users_total = sum(r["balance"] for r in rows) if rows else 0
-
-    # ——— ДОБАВЛЯЕМ ФИНАНСОВЫЕ ГРУППЫ В СПИСОК ПОЛЬЗОВАТЕЛЕЙ ———
-    async with db.db_pool.acquire() as conn:
-        fin_group_rows = []
-        for group_id in FIN_GROUP_IDS:
-            row = await conn.fetchrow(
-                "SELECT balance FROM balances WHERE chat_id=$1", group_id)
-            fin_group_rows.append({"user_id": group_id, "username": f"Group {group_id}", "balance": row["balance"] if row else 0, "emojis": "🏦"})
-
-        user_rows = await conn.fetch("""
-            SELECT u.user_id, u.username, u.balance, e.emojis
-            FROM users u LEFT JOIN user_emojis e ON u.user_id=e.user_id
-            ORDER BY u.user_id
-        """)
-    all_rows = list(user_rows) + fin_group_rows
-
-    itog1 = total_cash - total_sal
-    lines = ["═══ 📊 Сводный фин. отчёт 📊 ═══\n"]
-    for k, g in groups_data.items():
-        lines += [f"[{k}] Зп: {g['salary']}¥ | Нал: {g['cash']}¥",
-                  "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"]
-    lines += [
-        f"\nИтого зарплата: {total_sal}¥",
-        f"Итого наличные: {total_cash}¥",
-        f"Итог1 (cash - salary): {itog1}¥",
-        "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-    ]
-    if all_rows:
-        lines.append("═════ 👥 Пользователи 👥 ═════\n")
-        for r in all_rows:
-            emoji = r.get("emojis") or "❓"
-            uname = r["username"] or f"User {r['user_id']}"
-            balance = r["balance"]
-            lines += [f"{emoji} {uname}: {balance}¥",
-                      "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"]
-
-    lines += [
-        "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n",
-        f"Сумма балансов пользователей: {users_total}¥",
-        f"━━━━ TOTAL (итог1 - балансы) = {itog1 - users_total}¥ ━━━━"
-    ]
-    report = "<pre>" + "\n".join(lines) + "</pre>"
-    try:
-        await bot.send_message(FINANCIAL_REPORT_GROUP_ID, report, parse_mode=ParseMode.HTML)
-    except Exception as e:
-        logger.error(f"Ошибка фин. отчёта: {e}")
+    """
+    Обновляет сводный фин. отчёт: данные уже в памяти (utils.fin_report),
+    сообщение перерисовывается не чаще FIN_REPORT_INTERVAL.
+    """
+    fin_report.request(bot)
 
 @router.callback_query(F.data == "view_all_bookings")
-async def cmd_all(cb: CallbackQuery):
+async def cmd_all(cb: CallbackQuery, user_ctx: UserContext):
     # 1) Ограничиваем только админам
-    if not is_user_admin(cb.from_user.id):
+    if not user_ctx.is_admin:
         return await cb.answer(
             "⚠️ У вас нет прав для выполнения этого действия",
             show_alert=True
         )
 
-    lang = await get_user_language(cb.from_user.id)
+    lang = user_ctx.lang
     group_times = {}
     for gk, g in groups_data.items():
         for d in ("Сегодня", "Завтра"):
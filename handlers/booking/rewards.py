@@ -6,6 +6,11 @@ import db
 from constants.booking_const import special_payments, SPECIAL_USER_ID
 from utils.bot_utils import last_bot_message
 from utils.text_utils import format_html_pre
+from utils.fin_report import fin_report
+from utils.user_context import user_contexts
+from db_access.finance_repo import FinanceRepo
+
+finance = FinanceRepo()
 
 async def send_tracked(bot: Bot, chat_id: int, **kwargs):
     """
@@ -32,62 +37,30 @@ async def apply_special_user_reward(status_code: str, bot: Bot):
     if amount <= 0 or not db.db_pool:
         return
 
-    async with db.db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            "SELECT balance FROM users WHERE user_id=$1",
-            SPECIAL_USER_ID
-        )
-        balance = row.get("balance") if row else 0
-        balance = balance if isinstance(balance, (int, float)) else 0
-        new = balance + amount
-
-        if row:
-            await conn.execute(
-                "UPDATE users SET balance=$1 WHERE user_id=$2",
-                new, SPECIAL_USER_ID
-            )
-        else:
-            await conn.execute(
-                "INSERT INTO users (user_id, username, balance, profit, monthly_profit) "
-                "VALUES ($1, $2, $3, $3, $3)",
-                SPECIAL_USER_ID, "Special User", amount
-            )
+    row = await finance.add_user_balance(SPECIAL_USER_ID, amount, kind="special_reward", ref=status_code)
+    new = row["balance"]
+    fin_report.user_delta(SPECIAL_USER_ID, amount, row["username"] if row["inserted"] else None)
 
     text = f"Вам начислено дополнительно {amount}¥.\nТекущий баланс: {new}¥"
     await send_tracked(bot, SPECIAL_USER_ID, text=text)
 
-async def update_user_financial_info(user_id: int, net_amount: int, bot: Bot):
+async def update_user_financial_info(user_id: int, net_amount: int, bot: Bot, kind: str = "booking_net"):
     if not db.db_pool:
         return
 
-    try:
-        member = await bot.get_chat_member(user_id, user_id)
-        uname = member.user.username or f"{member.user.first_name} {member.user.last_name}"
-    except:
-        uname = f"User_{user_id}"
-
-    async with db.db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            "SELECT balance, profit, monthly_profit FROM users WHERE user_id=$1",
-            user_id
-        )
+    # имя — из кэша UserContext; к Telegram идём, только если в users его ещё нет
+    uname = (await user_contexts.get(user_id)).username
+    if not uname:
+        try:
+            member = await bot.get_chat_member(user_id, user_id)
+            uname = member.user.username or f"{member.user.first_name} {member.user.last_name}"
+        except:
+            uname = f"User_{user_id}"
 
-        if row:
-            b = row.get("balance", 0) or 0
-            p = row.get("profit", 0) or 0
-            m = row.get("monthly_profit", 0) or 0
-            nb, np, nm = b + net_amount, p + net_amount, m + net_amount
-            await conn.execute(
-                "UPDATE users SET balance=$1, profit=$2, monthly_profit=$3, username=$4 WHERE user_id=$5",
-                nb, np, nm, uname, user_id
-            )
-        else:
-            nb = net_amount
-            await conn.execute(
-                "INSERT INTO users (user_id, username, balance, profit, monthly_profit) "
-                "VALUES ($1,$2,$3,$3,$3)",
-                user_id, uname, net_amount
-            )
+    row = await finance.add_user_balance(user_id, net_amount, uname, with_profit=True, kind=kind)
+    nb = row["balance"]
+    fin_report.user_delta(user_id, net_amount, uname)
+    user_contexts.invalidate(user_id)
 
     # Notify user of their updated balance
     msg = format_html_pre(f"Ваш баланс изменён на {net_amount:+}. Текущий баланс: {nb}")
@@ -101,26 +74,9 @@ async def apply_additional_payment(user_id: int, status_code: str, bot: Bot):
     if extra <= 0 or not db.db_pool:
         return
 
-    async with db.db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            "SELECT balance FROM users WHERE user_id=$1",
-            user_id
-        )
-        balance = row.get("balance") if row else 0
-        balance = balance if isinstance(balance, (int, float)) else 0
-        newb = balance + extra
-
-        if row:
-            await conn.execute(
-                "UPDATE users SET balance=$1 WHERE user_id=$2",
-                newb, user_id
-            )
-        else:
-            await conn.execute(
-                "INSERT INTO users (user_id, username, balance, profit, monthly_profit) "
-                "VALUES ($1, $2, $3, $3, $3)",
-                user_id, "Special User", extra
-            )
+    row = await finance.add_user_balance(user_id, extra, kind="special_payment", ref=status_code)
+    newb = row["balance"]
+    fin_report.user_delta(user_id, extra, row["username"] if row["inserted"] else None)
 
     text = f"<pre>Вам начислено дополнительно {extra}¥.\nВаш текущий баланс: {newb}¥</pre>"
     await send_tracked(bot, user_id, text=text, parse_mode="HTML")
@@ -6,11 +6,15 @@ import db
 from db_access.booking_repo import BookingRepo
 from handlers.booking.data_manager import BookingDataManager
 from constants.booking_const import groups_data
+from utils.lanes import LaneMiddleware, CRITICAL
 
 logger = logging.getLogger(__name__)
 
 # Создаём один «сборный» роутер для всего модуля бронирования:
 router = Router()
+# Бронь и оплаты — приоритетная полоса обработки (utils/lanes.py)
+router.message.middleware(LaneMiddleware(CRITICAL))
+router.callback_query.middleware(LaneMiddleware(CRITICAL))
 
 # Инициализируем репозиторий и менеджер данных (для FSM):
 repo = BookingRepo(db.db_pool)
@@ -22,6 +26,7 @@ from handlers.booking.admin_flow import router as admin_flow_router
 from handlers.booking.payment_flow import router as payment_flow_router
 from handlers.booking.reporting import router as reporting_router
 from handlers.booking.cancelbook import router as cancelbook_router
+from handlers.booking.admins import router as admins_router
 
 # Подключаем их **внутрь** общего booking-роутера:
 router.include_router(user_flow_router)
@@ -29,3 +34,4 @@ router.include_router(admin_flow_router)
 router.include_router(payment_flow_router)
 router.include_router(reporting_router)
 router.include_router(cancelbook_router)
+router.include_router(admins_router)
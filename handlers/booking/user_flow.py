@@ -1,5 +1,7 @@
 # handlers/booking/user_flow.py
 
+from functools import lru_cache
+
 from aiogram import Router, F
 from aiogram.types import (
     Message,
@@ -22,16 +24,17 @@ from handlers.language import get_user_language, get_message
 from handlers.booking.reporting import send_booking_report, update_group_message
 from handlers.booking.data_manager import BookingDataManager
 from db_access.booking_repo import BookingRepo
-from utils.time_utils import (
-    generate_daily_time_slots as generate_time_slots,
-    get_adjacent_time_slots,
-)
+from utils.slot_board import slots_from_mask
 from handlers.booking.data_manager import async_book_slot
 from handlers.states import BookUserStates
 from utils.bot_utils import safe_answer
+from utils.send_scheduler import Priority, PriorityMiddleware
 import db
 
 router = Router()
+# ответы пользователю в сценарии брони идут впереди отчётов и уборки
+router.message.middleware(PriorityMiddleware(Priority.HIGH))
+router.callback_query.middleware(PriorityMiddleware(Priority.HIGH))
 data_mgr = BookingDataManager(groups_data)
 repo = BookingRepo(db.db_pool)
 
@@ -61,11 +64,6 @@ async def cmd_book(message: Message, state: FSMContext):
 
 @router.callback_query(StateFilter(BookUserStates.waiting_for_group), F.data.startswith("bkgrp_"))
 async def user_select_group(cb: CallbackQuery, state: FSMContext):
-    # Игнорируем колбэки от самого бота
-    me = await cb.bot.get_me()
-    if cb.from_user.id == me.id:
-        return
-
     gk = cb.data.removeprefix("bkgrp_")
     if gk not in groups_data:
         return await safe_answer(cb, get_message(await get_user_language(cb.from_user.id), "no_such_group"), show_alert=True)
@@ -87,11 +85,6 @@ async def user_select_group(cb: CallbackQuery, state: FSMContext):
 
 @router.callback_query(StateFilter(BookUserStates.waiting_for_day), F.data.startswith("bkday_"))
 async def user_select_day(cb: CallbackQuery, state: FSMContext):
-    # Игнорируем колбэки от самого бота
-    me = await cb.bot.get_me()
-    if cb.from_user.id == me.id:
-        return
-
     day = cb.data.removeprefix("bkday_")
     await state.update_data(selected_day=day)
     await send_time_slots(cb, day, state)
@@ -99,11 +92,6 @@ async def user_select_day(cb: CallbackQuery, state: FSMContext):
 
 @router.callback_query(StateFilter(BookUserStates.waiting_for_day), F.data == "bkgroup_back")
 async def back_to_group_choice(cb: CallbackQuery, state: FSMContext):
-    # Игнорируем колбэки от самого бота
-    me = await cb.bot.get_me()
-    if cb.from_user.id == me.id:
-        return
-
     keys = data_mgr.list_group_keys()
     kb = InlineKeyboardMarkup(
         inline_keyboard=[
@@ -123,11 +111,6 @@ async def back_to_group_choice(cb: CallbackQuery, state: FSMContext):
 
 @router.callback_query(StateFilter(BookUserStates.waiting_for_group), F.data == "bkmain_back")
 async def back_to_main_menu(cb: CallbackQuery, state: FSMContext):
-    # Игнорируем колбэки от самого бота
-    me = await cb.bot.get_me()
-    if cb.from_user.id == me.id:
-        return
-
     await cb.answer()
     await state.clear()
 
@@ -137,40 +120,12 @@ async def send_time_slots(
     selected_day: str,
     state: FSMContext,
 ):
-    # Игнорируем колбэки от самого бота
-    me = await callback_query.bot.get_me()
-    if callback_query.from_user.id == me.id:
-        return
-
     data = await state.get_data()
     gk = data["selected_group"]
-    ginfo = groups_data[gk]
 
-    # 1. Реально забронированные слоты
-    busy: set[str] = set(ginfo["booked_slots"].get(selected_day, []))
-
-    # 2. Соседние ±30 минут
-    for booked_slot in list(busy):
-        for adj in get_adjacent_time_slots(booked_slot):
-            busy.add(adj)
-
-    # 3. Формируем клавиатуру из всех слотов, которые НЕ в busy
-    buttons = []
-    row = []
-    for slot in generate_time_slots():
-        if slot not in busy:
-            row.append(
-                InlineKeyboardButton(
-                    text=slot, callback_data=f"bkslot_{slot.replace(':','_')}"
-                )
-            )
-            if len(row) == 4:
-                buttons.append(row)
-                row = []
-    if row:
-        buttons.append(row)
-    buttons.append([InlineKeyboardButton(text="« Назад", callback_data="bkday_back")])
-    kb = InlineKeyboardMarkup(inline_keyboard=buttons)
+    # Свободные слоты = все минус забронированные и соседние ±30 минут
+    free_mask = data_mgr.board(gk).free_mask(selected_day)
+    kb = _time_slots_keyboard(free_mask)
 
     lang = await get_user_language(callback_query.from_user.id)
     day_label = get_message(lang, "today") if selected_day == "Сегодня" else get_message(lang, "tomorrow")
@@ -187,19 +142,38 @@ async def send_time_slots(
     await state.set_state(BookUserStates.waiting_for_time)
 
 
+@lru_cache(maxsize=256)
+def _time_slots_keyboard(free_mask: int) -> InlineKeyboardMarkup:
+    """Клавиатура свободных слотов (по 4 в ряд); одинаковые маски дают один объект."""
+    buttons = []
+    row = []
+    for slot in slots_from_mask(free_mask):
+        row.append(
+            InlineKeyboardButton(
+                text=slot, callback_data=f"bkslot_{slot.replace(':','_')}"
+            )
+        )
+        if len(row) == 4:
+            buttons.append(row)
+            row = []
+    if row:
+        buttons.append(row)
+    buttons.append([InlineKeyboardButton(text="« Назад", callback_data="bkday_back")])
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
 @router.callback_query(StateFilter(BookUserStates.waiting_for_time), F.data.startswith("bkslot_"))
 async def user_select_time(cb: CallbackQuery, state: FSMContext):
-    # Игнорируем колбэки от самого бота
-    me = await cb.bot.get_me()
-    if cb.from_user.id == me.id:
-        return
-
     slot = cb.data.removeprefix("bkslot_").replace("_", ":")
     data = await state.get_data()
     gk, day, uid = data["selected_group"], data["selected_day"], cb.from_user.id
 
-    # 1+2) Бронирование с ротацией эмодзи
-    await async_book_slot(gk, day, slot, uid)
+    # 1+2) Бронирование с ротацией эмодзи (None — слот успели занять)
+    if await async_book_slot(gk, day, slot, uid) is None:
+        lang = await get_user_language(uid)
+        await cb.answer(get_message(lang, "slot_unavailable"), show_alert=True)
+        # показываем актуальную сетку свободных слотов
+        return await send_time_slots(cb, day, state)
 
     # 3) Отправляем личный отчёт о брони
     await send_booking_report(cb.bot, uid, gk, slot, day)
@@ -226,11 +200,6 @@ async def user_select_time(cb: CallbackQuery, state: FSMContext):
 
 @router.callback_query(StateFilter(BookUserStates.waiting_for_time), F.data == "bkday_back")
 async def back_to_day_choice(cb: CallbackQuery, state: FSMContext):
-    # Игнорируем колбэки от самого бота
-    me = await cb.bot.get_me()
-    if cb.from_user.id == me.id:
-        return
-
     data = await state.get_data()
     gk = data["selected_group"]
     kb = InlineKeyboardMarkup(
@@ -1,7 +1,6 @@
 # handlers/clean.py
 
 import logging
-import os                                  # ← добавлено
 from aiogram import Router, F
 from aiogram.types import (
     Message,
@@ -9,21 +8,28 @@ from aiogram.types import (
     InlineKeyboardMarkup,
     InlineKeyboardButton,
 )
-from aiogram.types.input_file import FSInputFile   # ← добавлено
 from aiogram.filters.command import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.exceptions import TelegramBadRequest
 
 import db
-from config import is_user_admin
 from constants.booking_const import groups_data
-from handlers.language import get_user_language, get_message
+from handlers.language import get_message
 from handlers.booking.reporting import update_group_message
+from handlers.booking.data_manager import BookingDataManager
 from handlers.states import CleanupStates
+from utils.assets import assets
+from utils.lanes import LaneMiddleware, ADMIN
+from utils.user_context import UserContext
+from db_access.finance_repo import FinanceRepo
 
 logger = logging.getLogger(__name__)
 router = Router()
+router.message.middleware(LaneMiddleware(ADMIN))
+router.callback_query.middleware(LaneMiddleware(ADMIN))
+data_mgr = BookingDataManager(groups_data)
+finance = FinanceRepo()
 
 PHOTO_ID = "photo/IMG_2585.JPG"
 last_bot_message: dict[int, int] = {}
@@ -50,18 +56,14 @@ async def safe_answer(entity, text: str | None = None, **kwargs):
         except TelegramBadRequest:
             pass
 
-    # ── 3. подготовить фото-параметр
-    photo: str | FSInputFile = PHOTO_ID
-    if isinstance(photo, str) and os.path.exists(photo):      # ★ фикс
-        photo = FSInputFile(photo)
-
     caption = text or kwargs.get("caption") or ""
     reply_markup = kwargs.get("reply_markup")
 
-    # ── 4. отправить новое меню
-    sent = await bot.send_photo(
+    # ── 3. отправить новое меню (картинка — по кэшированному file_id)
+    sent = await assets.send_photo(
+        bot,
         chat_id,
-        photo=photo,
+        PHOTO_ID,
         caption=caption,
         reply_markup=reply_markup,
         parse_mode="HTML",
@@ -71,10 +73,9 @@ async def safe_answer(entity, text: str | None = None, **kwargs):
 
 @router.message(Command("clean"))
 @router.callback_query(F.data == "clean")
-async def cmd_clean(entry: Message | CallbackQuery, state: FSMContext):
-    user_id = entry.from_user.id
-    lang    = await get_user_language(user_id)
-    if not is_user_admin(user_id):
+async def cmd_clean(entry: Message | CallbackQuery, state: FSMContext, user_ctx: UserContext):
+    lang    = user_ctx.lang
+    if not user_ctx.is_admin:
         txt = get_message(lang, "no_permission")
         return await safe_answer(entry, txt)
 
@@ -101,8 +102,8 @@ async def cmd_clean(entry: Message | CallbackQuery, state: FSMContext):
     await state.set_state(CleanupStates.waiting_for_main_menu)
 
 @router.callback_query(CleanupStates.waiting_for_main_menu, F.data.startswith("clean_menu_"))
-async def process_clean_menu(cb: CallbackQuery, state: FSMContext):
-    lang   = await get_user_language(cb.from_user.id)
+async def process_clean_menu(cb: CallbackQuery, state: FSMContext, user_ctx: UserContext):
+    lang   = user_ctx.lang
     choice = cb.data.removeprefix("clean_menu_")
 
     if choice == "all":
@@ -124,38 +125,50 @@ async def process_clean_menu(cb: CallbackQuery, state: FSMContext):
     await state.update_data(clean_section=choice)
     await state.set_state(CleanupStates.waiting_for_group_choice)
 
+async def _reset_totals(grp: str, salary: bool, cash: bool, admin_id: int):
+    """Обнулить зарплату/наличные группы компенсирующей проводкой (kind='clean')."""
+    if not (salary or cash):
+        return
+    if salary:
+        groups_data[grp]["salary"] = 0
+    if cash:
+        groups_data[grp]["cash"] = 0
+    if db.db_pool:
+        await finance.set_group_totals(
+            grp, salary=0 if salary else None, cash=0 if cash else None,
+            kind="clean", ref=str(admin_id)
+        )
+
 @router.callback_query(CleanupStates.waiting_for_confirmation, F.data.startswith("confirm_all_"))
-async def confirm_all_section(cb: CallbackQuery, state: FSMContext):
-    lang    = await get_user_language(cb.from_user.id)
+async def confirm_all_section(cb: CallbackQuery, state: FSMContext, user_ctx: UserContext):
+    lang    = user_ctx.lang
     section = cb.data.removeprefix("confirm_all_")
     logger.info(f"[CLEAN] confirm all {section}")
 
     for grp in groups_data:
-        groups_data[grp].update({
-            'booked_slots': {'Сегодня':[], 'Завтра':[]},
-            'unavailable_slots': {'Сегодня':set(), 'Завтра':set()},
-            'time_slot_statuses': {},
-            'slot_bookers': {},
-            'salary': 0,
-            'cash': 0,
-        })
-        if db.db_pool:
+        data_mgr.clear_group(grp)
+        if db.db_pool and section in ("time","all"):
             async with db.db_pool.acquire() as conn:
-                if section in ("time","all"):
-                    await conn.execute("DELETE FROM bookings WHERE group_key=$1", grp)
-                    await conn.execute("DELETE FROM group_time_slot_statuses WHERE group_key=$1", grp)
-                if section in ("salary","all"):
-                    await conn.execute("UPDATE group_financial_data SET salary=0 WHERE group_key=$1", grp)
-                if section in ("cash","all"):
-                    await conn.execute("UPDATE group_financial_data SET cash=0 WHERE group_key=$1", grp)
+                await conn.execute(
+                    "DELETE FROM bookings WHERE group_key=$1 AND slot_date >= label_date('Сегодня')", grp
+                )
+                await conn.execute(
+                    "DELETE FROM group_time_slot_statuses WHERE group_key=$1 AND slot_date >= label_date('Сегодня')", grp
+                )
+        await _reset_totals(
+            grp,
+            salary=section in ("salary", "all"),
+            cash=section in ("cash", "all"),
+            admin_id=cb.from_user.id,
+        )
         await update_group_message(cb.bot, grp)
 
     await safe_answer(cb, get_message(lang, "clean_done_all", section=get_message(lang, f"clean_{section}")))
     await state.clear()
 
 @router.callback_query(CleanupStates.waiting_for_group_choice, F.data.startswith("sect_grp_"))
-async def process_section_group_choice(cb: CallbackQuery, state: FSMContext):
-    lang = await get_user_language(cb.from_user.id)
+async def process_section_group_choice(cb: CallbackQuery, state: FSMContext, user_ctx: UserContext):
+    lang = user_ctx.lang
     _, _, section, grp = cb.data.split("_",3)
     if grp not in groups_data:
         return await safe_answer(cb, get_message(lang, "no_such_group"), show_alert=True)
@@ -170,31 +183,24 @@ async def process_section_group_choice(cb: CallbackQuery, state: FSMContext):
     await state.set_state(CleanupStates.waiting_for_confirmation)
 
 @router.callback_query(CleanupStates.waiting_for_confirmation, F.data.startswith("confirm_grp_"))
-async def confirm_group_section(cb: CallbackQuery, state: FSMContext):
-    lang = await get_user_language(cb.from_user.id)
+async def confirm_group_section(cb: CallbackQuery, state: FSMContext, user_ctx: UserContext):
+    lang = user_ctx.lang
     _, _, section, grp = cb.data.split("_",3)
 
     if section == "time":
-        groups_data[grp].update({
-            'booked_slots': {'Сегодня':[], 'Завтра':[]},
-            'unavailable_slots': {'Сегодня':set(), 'Завтра':set()},
-            'time_slot_statuses': {},
-            'slot_bookers': {},
-        })
+        data_mgr.clear_group(grp)
         if db.db_pool:
             async with db.db_pool.acquire() as conn:
-                await conn.execute("DELETE FROM bookings WHERE group_key=$1", grp)
-                await conn.execute("DELETE FROM group_time_slot_statuses WHERE group_key=$1", grp)
-    elif section == "salary":
-        groups_data[grp]["salary"] = 0
-        if db.db_pool:
-            async with db.db_pool.acquire() as conn:
-                await conn.execute("UPDATE group_financial_data SET salary=0 WHERE group_key=$1", grp)
+                await conn.execute(
+                    "DELETE FROM bookings WHERE group_key=$1 AND slot_date >= label_date('Сегодня')", grp
+                )
+                await conn.execute(
+                    "DELETE FROM group_time_slot_statuses WHERE group_key=$1 AND slot_date >= label_date('Сегодня')", grp
+                )
     else:
-        groups_data[grp]["cash"] = 0
-        if db.db_pool:
-            async with db.db_pool.acquire() as conn:
-                await conn.execute("UPDATE group_financial_data SET cash=0 WHERE group_key=$1", grp)
+        await _reset_totals(
+            grp, salary=section == "salary", cash=section != "salary", admin_id=cb.from_user.id
+        )
 
     await update_group_message(cb.bot, grp)
     await safe_answer(cb, get_message(lang, "clean_done_group",
@@ -203,11 +209,11 @@ async def confirm_group_section(cb: CallbackQuery, state: FSMContext):
     await state.clear()
 
 @router.callback_query(F.data == "clean_cancel")
-async def process_clean_cancel(cb: CallbackQuery, state: FSMContext):
-    lang = await get_user_language(cb.from_user.id)
+async def process_clean_cancel(cb: CallbackQuery, state: FSMContext, user_ctx: UserContext):
+    lang = user_ctx.lang
     await safe_answer(cb, get_message(lang, "cancelled"))
     await state.clear()
 
 @router.callback_query(F.data == "clean")
-async def clean_via_button(cb: CallbackQuery, state: FSMContext):
-    await cmd_clean(cb, state)
+async def clean_via_button(cb: CallbackQuery, state: FSMContext, user_ctx: UserContext):
+    await cmd_clean(cb, state, user_ctx)
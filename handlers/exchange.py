@@ -1,8 +1,12 @@
 # handlers/exchange.py
 
 import logging
-import requests
 import os
+import re
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
 
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message
@@ -13,6 +17,7 @@ from aiogram.fsm.state import StatesGroup, State
 from handlers.language import get_user_language, get_message
 from utils.bot_utils import safe_answer
 from utils.text_utils import format_html_pre  # используем готовую обёртку
+from utils.rates import rate_service
 
 logger = logging.getLogger(__name__)
 router = Router()
@@ -28,96 +33,100 @@ CURRENCIES = {
 }
 
 
-def get_usdt_rate_coingecko():
-    """
-    Запрашивает курс USDT через CoinGecko API (в USD) и возвращает обратное значение.
-    """
-    url = "https://api.coingecko.com/api/v3/simple/price?ids=tether&vs_currencies=usd"
-    try:
-        resp = requests.get(url, timeout=10)
-        if resp.status_code == 200:
-            data = resp.json()
-            logger.info("CoinGecko response for USDT: %s", data)
-            usd_value = data.get("tether", {}).get("usd")
-            if usd_value and usd_value != 0:
-                return 1.0 / float(usd_value)
-    except Exception as e:
-        logger.error("Ошибка при получении курса USDT с CoinGecko: %s", e)
-    return None
-
-
-def get_fiat_rates():
-    """
-    Запрашивает базовые курсы (USD → RUB, UAH, CNY, EUR) через open.er-api.com.
-    """
-    url = "https://open.er-api.com/v6/latest/USD"
-    try:
-        resp = requests.get(url, timeout=10)
-        if resp.status_code == 200:
-            data = resp.json()
-            logger.info("open.er-api.com response: %s", data)
-            rates = data.get("rates", {})
-            filtered = {
-                key: rates.get(key)
-                for key in ["RUB", "UAH", "CNY", "EUR"]
-            }
-            filtered["USD"] = 1.0
-            logger.info("Фиатные курсы: %s", filtered)
-            return filtered
-    except Exception as e:
-        logger.error("Ошибка при получении курсов с open.er-api.com: %s", e)
-    return {}
-
-
-def get_all_rates(base_currency: str):
+# Готовые ответы для частых запросов текущего снимка курсов
+FORMAT_CACHE_SIZE = 256
+_format_cache: "OrderedDict[Tuple[Tuple[float, str], ...], str]" = OrderedDict()
+_format_version: Optional[float] = None
+
+# Сколько сумм конвертируем за один запрос, и лимит подписи к фото в Telegram
+MAX_PAIRS = 5
+CAPTION_LIMIT = 1024
+
+# Пары разделяются «;», переносом или запятой после кода валюты / с пробелом
+# (запятая внутри числа — десятичная: «100,5 USD»)
+_PAIR_SEPARATORS = re.compile(r"[;\n]+|(?<=[A-Za-z]),|,\s+")
+
+
+async def get_all_rates(base_currency: str):
     """
-    Возвращает словарь всех курсов относительно base_currency.
-    Сначала запрашивает фиатные курсы, затем добавляет USDT.
+    Возвращает словарь всех курсов относительно base_currency —
+    строка готовой матрицы кросс-курсов (без сетевых запросов).
     """
-    rates = get_fiat_rates()
-    usdt_rate = get_usdt_rate_coingecko()
-    if usdt_rate is not None:
-        rates["USDT"] = usdt_rate
-    if not rates:
+    cross = await rate_service.get_cross()
+    if cross is None:
         return {}
+    return cross.row(base_currency.upper())
 
-    base_currency = base_currency.upper()
-    # Если базовая валюта — USD, возвращаем «как есть»
-    if base_currency == "USD":
-        return rates
 
-    if base_currency in rates:
-        base_to_usd = 1.0 / rates[base_currency]
-        converted = {}
-        for code, r in rates.items():
-            converted[code] = base_to_usd * r
-        return converted
+def parse_amounts(text: str) -> Optional[List[Tuple[float, str]]]:
+    """
+    «100 USD» или несколько пар через запятую/точку с запятой/перенос:
+    «100 USD, 5000 RUB». None — если формат неверный.
+    """
+    pairs = []
+    for chunk in _PAIR_SEPARATORS.split(text.strip()):
+        parts = chunk.split()
+        if not parts:
+            continue
+        if len(parts) != 2:
+            return None
+        amount_str, code = parts
+        try:
+            amount = float(amount_str.replace(",", "."))
+        except ValueError:
+            return None
+        pairs.append((amount, code.upper()))
+    return pairs or None
+
+
+def _format_block(amount: float, base: str, codes, converted) -> str:
+    lines = [f"💱 {amount} {base} ="]
+    for code, value in zip(codes, converted):
+        if code == base:
+            continue
+        flag = CURRENCIES.get(code, {}).get("flag", "")
+        name = CURRENCIES.get(code, {}).get("name", code)
+        lines.append(f"{flag} {value} {code} — {name}")
+    return "\n".join(lines)
 
-    return {}
 
+async def convert_many(pairs: List[Tuple[float, str]]) -> str:
+    """
+    Конвертирует все пары (сумма, валюта) во все валюты одной векторной
+    операцией по матрице кросс-курсов; результат — HTML в <pre>…</pre>.
+    """
+    global _format_version
+    cross = await rate_service.get_cross()
+    if cross is None or any(code not in cross.index for _, code in pairs):
+        return format_html_pre("❌ Не удалось получить курсы валют.")
 
-def convert_and_format(amount: float, base_currency: str) -> str:
+    if cross.version != _format_version:
+        _format_cache.clear()
+        _format_version = cross.version
+    key = tuple(pairs)
+    cached = _format_cache.get(key)
+    if cached is not None:
+        _format_cache.move_to_end(key)
+        return cached
+
+    table = np.round(cross.convert([a for a, _ in pairs], [c for _, c in pairs]), 2)
+    blocks = [
+        _format_block(amount, base, cross.codes, row.tolist())
+        for (amount, base), row in zip(pairs, table)
+    ]
+    result = format_html_pre("\n\n".join(blocks))
+    _format_cache[key] = result
+    if len(_format_cache) > FORMAT_CACHE_SIZE:
+        _format_cache.popitem(last=False)
+    return result
+
+
+async def convert_and_format(amount: float, base_currency: str) -> str:
     """
     Конвертирует amount из base_currency во все доступные валюты
     и возвращает строку с HTML-разметкой, обёрнутую в <pre>…</pre>.
     """
-    base_currency = base_currency.upper()
-    rates = get_all_rates(base_currency)
-    if not rates:
-        return format_html_pre("❌ Не удалось получить курсы валют.")
-
-    result_lines = [f"💱 {amount} {base_currency} ="]
-    for code, rate in rates.items():
-        if code == base_currency:
-            continue
-        converted = round(amount * rate, 2)
-        flag = CURRENCIES.get(code, {}).get("flag", "")
-        name = CURRENCIES.get(code, {}).get("name", code)
-        result_lines.append(f"{flag} {converted} {code} — {name}")
-
-    # Собираем многострочный текст и оборачиваем в <pre>
-    full_text = "\n".join(result_lines)
-    return format_html_pre(full_text)
+    return await convert_many([(amount, base_currency.upper())])
 
 
 # FSM для состояния ожидания ввода
@@ -165,27 +174,28 @@ async def callback_conversion(callback: CallbackQuery, state: FSMContext):
 @router.message(ConversionStates.waiting_for_input, F.text)
 async def process_conversion_input(message: Message, state: FSMContext):
     """
-    Обрабатывает текст вида “100 USD”:
+    Обрабатывает текст вида “100 USD” (или несколько пар: “100 USD, 5000 RUB”):
     1) проверяет формат,
     2) конвертирует и форматирует результат (с <pre>),
     3) удаляет инструкцию и отправляет фото + результат,
     4) сбрасывает FSM.
     """
-    text = message.text.strip()
-    parts = text.split()
-    if len(parts) != 2:
-        error = format_html_pre("❌ Неверный формат. Введите, например: 100 USD")
+    pairs = parse_amounts(message.text)
+    if pairs is None:
+        error = format_html_pre("❌ Неверный формат. Введите, например: 100 USD или 100 USD, 5000 RUB")
         return await safe_answer(message, error, parse_mode=ParseMode.HTML)
-
-    amount_str, base_currency = parts
-    try:
-        amount = float(amount_str.replace(",", "."))
-    except ValueError:
-        error = format_html_pre("❌ Неверная сумма. Попробуйте ещё раз.")
+    if len(pairs) > MAX_PAIRS:
+        error = format_html_pre(f"❌ Не больше {MAX_PAIRS} сумм за раз.")
         return await safe_answer(message, error, parse_mode=ParseMode.HTML)
 
     # Получаем результат конвертации (уже обёрнутый в <pre>…</pre>)
-    result = convert_and_format(amount, base_currency)
+    result = await convert_many(pairs)
+
+    # Не влезает в подпись к фото — отправляем обычным сообщением
+    if len(result) > CAPTION_LIMIT:
+        await safe_answer(message, result, parse_mode=ParseMode.HTML)
+        await state.clear()
+        return
 
     # Путь до той же картинки
     photo_path = "photo/IMG_2585.JPG"
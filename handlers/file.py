@@ -2,13 +2,14 @@
 
 from __future__ import annotations
 
-import asyncio
 import logging
 from typing import Final
 
 from aiogram import Router, F, Bot
 from aiogram.types import Message
 
+from utils.deletion_queue import deletion_queue
+
 logger = logging.getLogger(__name__)
 router = Router(name="file_router")
 
@@ -35,16 +36,9 @@ TTL_SECONDS:   Final[int] = 180  # 3 минуты
 
 
 # ────────────────────────────────────── helpers ──────────────────────────────────────
-async def _delete_after(bot: Bot, chat_id: int, msg_id: int, delay: int = TTL_SECONDS):
-    try:
-        await asyncio.sleep(delay)
-        await bot.delete_message(chat_id, msg_id)
-    except Exception as e:
-        logger.debug("Delete failed %s/%s: %s", chat_id, msg_id, e)
-
-
 def _schedule_deletion(bot: Bot, chat_id: int, msg_id: int):
-    asyncio.create_task(_delete_after(bot, chat_id, msg_id))
+    # общий воркер с таблицей pending_deletions вместо задачи на каждое фото
+    deletion_queue.schedule(chat_id, msg_id, TTL_SECONDS)
 
 
 # ───────────────────────────────────── handler ───────────────────────────────────────
@@ -4,15 +4,11 @@ from aiogram import Router, F
 from aiogram.filters.command import Command
 from aiogram.types import Message, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
 import db
+from constants.languages import LANGUAGES
+from utils.user_context import user_contexts
 
 language_router = Router()
 
-LANGUAGES = {
-    'en': 'English',
-    'ru': 'Русский',
-    'zh': '中文',
-}
-
 TRANSLATIONS = {
     # --- КЛЮЧИ ДЛЯ /menu (ПОЛЬЗОВАТЕЛЬСКОЕ МЕНЮ) ---
     'menu_btn_booking': {
@@ -134,6 +130,11 @@ TRANSLATIONS = {
         'ru': 'Вы забронировали слот на {time} ({day}) в группе {group}',
         'zh': '您已在{day}{time}预订了组{group}的时段',
     },
+    'slot_unavailable': {
+        'en': 'This slot is already taken, please choose another time.',
+        'ru': 'Этот слот уже занят, выберите другое время.',
+        'zh': '该时段已被占用，请选择其他时间。',
+    },
     'all_bookings_title': {
         'en': 'All bookings on {day}',
         'ru': 'Все бронирования на {day}',
@@ -425,14 +426,8 @@ TRANSLATIONS = {
 }
 
 async def get_user_language(user_id: int) -> str:
-    if not db.db_pool:
-        return 'ru'
-    async with db.db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            "SELECT language FROM user_settings WHERE user_id=$1", user_id
-        )
-    lang = row.get('language') if row else None
-    return lang if lang in LANGUAGES else 'ru'
+    # язык берётся из кэша UserContext (в апдейте он уже прогрет middleware)
+    return (await user_contexts.get(user_id)).lang
 
 async def set_user_language(user_id: int, lang: str):
     if not db.db_pool or lang not in LANGUAGES:
@@ -447,6 +442,7 @@ async def set_user_language(user_id: int, lang: str):
             """,
             user_id, lang
         )
+    user_contexts.set_lang(user_id, lang)
 
 def get_message(lang: str, key: str, default: str = "", **kwargs) -> str:
     mapping = TRANSLATIONS.get(key)
@@ -53,11 +53,6 @@ async def cmd_menu(message: Message):
 
 @menu_router.callback_query(F.data == "menu_stub|booking")
 async def on_menu_stub_booking(cb: CallbackQuery, state: FSMContext):
-    # Игнорируем колбэки от самого бота
-    me = await cb.bot.get_me()
-    if cb.from_user.id == me.id:
-        return
-
     lang = await get_user_language(cb.from_user.id)
     rows, buf = [], []
     for i, gk in enumerate(groups_data, 1):
@@ -83,10 +78,6 @@ async def on_menu_stub_booking(cb: CallbackQuery, state: FSMContext):
 
 @menu_router.callback_query(F.data == "menu_stub|balance")
 async def on_menu_stub_balance(cb: CallbackQuery, state: FSMContext):
-    me = await cb.bot.get_me()
-    if cb.from_user.id == me.id:
-        return
-
     lang = await get_user_language(cb.from_user.id)
     await safe_answer(
         cb,
@@ -97,10 +88,6 @@ async def on_menu_stub_balance(cb: CallbackQuery, state: FSMContext):
 
 @menu_router.callback_query(F.data == "menu_stub|cancel_booking")
 async def on_menu_stub_cancel_booking(cb: CallbackQuery, state: FSMContext):
-    me = await cb.bot.get_me()
-    if cb.from_user.id == me.id:
-        return
-
     try:
         await cb.message.delete()
     except Exception:
@@ -112,10 +99,6 @@ async def on_menu_stub_cancel_booking(cb: CallbackQuery, state: FSMContext):
 
 @menu_router.callback_query(F.data == "menu_lang")
 async def on_menu_lang(cb: CallbackQuery):
-    me = await cb.bot.get_me()
-    if cb.from_user.id == me.id:
-        return
-
     try:
         await cb.message.delete()
     except Exception:
@@ -127,10 +110,6 @@ async def on_menu_lang(cb: CallbackQuery):
 
 @menu_router.callback_query(F.data.startswith("menu_stub|"))
 async def on_menu_stub_unknown(cb: CallbackQuery, state: FSMContext):
-    me = await cb.bot.get_me()
-    if cb.from_user.id == me.id:
-        return
-
     lang = await get_user_language(cb.from_user.id)
     await safe_answer(
         cb,
@@ -20,6 +20,7 @@ from handlers.booking.cancelbook import cmd_off_admin
 from handlers.leonard import leonard_menu_callback
 from handlers.users import show_users_via_callback
 from handlers.next import prompt_reset_day
+from utils.user_context import UserContext
 
 logger = logging.getLogger(__name__)
 menu_ad_router = Router()
@@ -92,28 +93,24 @@ async def show_admin_menu(message: Message, state: FSMContext):
 
 # 4) Обработчик нажатий админ-меню — только админам
 @menu_ad_router.callback_query(AdminStates.menu)
-async def admin_menu_callback(callback: CallbackQuery, state: FSMContext):
-    me = await callback.bot.get_me()
-    if callback.from_user.id == me.id:
-        return
-
-    lang = await get_user_language(callback.from_user.id)
+async def admin_menu_callback(callback: CallbackQuery, state: FSMContext, user_ctx: UserContext):
+    lang = user_ctx.lang
     action = callback.data
 
     if action == "leonard":
         return await leonard_menu_callback(callback, state)
     if action == "salary":
-        return await salary_command(callback.message, state)
+        return await salary_command(callback.message, state, user_ctx)
     if action == "emoji":
         return await cmd_emoji(callback, callback.bot)
     if action == "money":
-        return await money_command(callback.message, state)
+        return await money_command(callback.message, state, user_ctx)
     if action == "offad":
         return await cmd_off_admin(callback.message)
     if action == "clean":
-        return await clean_via_button(callback, state)
+        return await clean_via_button(callback, state, user_ctx)
     if action == "balances":
-        return await show_users_via_callback(callback, state)
+        return await show_users_via_callback(callback, state, user_ctx)
     if action == "rules":
         from handlers.rules import callback_rules
         return await callback_rules(callback)
@@ -122,7 +119,7 @@ async def admin_menu_callback(callback: CallbackQuery, state: FSMContext):
         return await callback_conversion(callback, state)
 
     if action == "reset_day":
-        return await prompt_reset_day(callback)
+        return await prompt_reset_day(callback, user_ctx)
 
     if action == "back":
         await safe_answer(callback, get_message(lang, "menu_back_confirm", default="Выход из админ-меню."))
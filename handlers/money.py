@@ -1,7 +1,6 @@
 # handlers/money.py
 
 import logging
-import os                                  # ← добавлено
 from aiogram import Router, F
 from aiogram.types import (
     Message,
@@ -9,26 +8,32 @@ from aiogram.types import (
     InlineKeyboardButton,
     InlineKeyboardMarkup,
 )
-from aiogram.types.input_file import FSInputFile   # ← добавлено
 from aiogram.filters.command import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.filters.state import StateFilter
 from aiogram.fsm.state import State, StatesGroup
 
 import db
-from config import is_user_admin
 from constants.booking_const import groups_data
 from handlers.booking.reporting import (
     update_group_message,
     send_financial_report,
 )
-from handlers.language import get_user_language, get_message
+from handlers.language import get_message
 from handlers.states import MoneyStates
+from utils.assets import assets
+from db_access.finance_repo import FinanceRepo
+from utils.lanes import LaneMiddleware, ADMIN
+from utils.user_context import UserContext
 
 logger = logging.getLogger(__name__)
 money_router = Router()
+# Админские сценарии — своя полоса, AI-нагрузка их не задерживает
+money_router.message.middleware(LaneMiddleware(ADMIN))
+money_router.callback_query.middleware(LaneMiddleware(ADMIN))
 
 MONEY_PHOTO = "photo/IMG_2585.JPG"
+finance = FinanceRepo()
 
 
 async def _send_photo(
@@ -54,39 +59,34 @@ async def _send_photo(
     except Exception:
         pass
 
-    # ── подготовить фото-параметр
-    photo: str | FSInputFile = MONEY_PHOTO
-    if isinstance(photo, str) and os.path.exists(photo):      # ★ фикс
-        photo = FSInputFile(photo)
-
-    params: dict = {"photo": photo, "caption": caption}
+    params: dict = {"caption": caption}
     if reply_markup:
         params["reply_markup"] = reply_markup
     if parse_mode:
         params["parse_mode"] = parse_mode
 
-    await target.answer_photo(**params)
+    # картинка — по кэшированному file_id
+    await assets.send_photo(target.bot, target.chat.id, MONEY_PHOTO, **params)
 
 @money_router.message(Command("money"))
-async def money_command(message: Message, state: FSMContext):
+async def money_command(message: Message, state: FSMContext, user_ctx: UserContext):
     """Точка входа: /money"""
-    await _money_init(message, state)
+    await _money_init(message, state, user_ctx)
 
 
 @money_router.callback_query(F.data == "money")
-async def money_via_button(cb: CallbackQuery, state: FSMContext):
+async def money_via_button(cb: CallbackQuery, state: FSMContext, user_ctx: UserContext):
     """Точка входа через инлайн-кнопку “Money”"""
-    await _money_init(cb, state)
+    await _money_init(cb, state, user_ctx)
 
 
-async def _money_init(entry: Message | CallbackQuery, state: FSMContext):
+async def _money_init(entry: Message | CallbackQuery, state: FSMContext, user_ctx: UserContext):
     """
     Шаг 1: выбор типа (salary или cash).
     """
-    user_id = entry.from_user.id
-    lang = await get_user_language(user_id)
+    lang = user_ctx.lang
 
-    if not is_user_admin(user_id):
+    if not user_ctx.is_admin:
         text = get_message(lang, "no_permission")
         if isinstance(entry, CallbackQuery):
             return await entry.answer(text, show_alert=True)
@@ -111,11 +111,11 @@ async def _money_init(entry: Message | CallbackQuery, state: FSMContext):
     F.data.startswith("money_type_"),
     StateFilter(MoneyStates.waiting_for_type),
 )
-async def process_money_type(cb: CallbackQuery, state: FSMContext):
+async def process_money_type(cb: CallbackQuery, state: FSMContext, user_ctx: UserContext):
     """
     Шаг 2: пользователь выбрал salary или cash.
     """
-    lang = await get_user_language(cb.from_user.id)
+    lang = user_ctx.lang
     typ = cb.data.removeprefix("money_type_")
     if typ not in ("salary", "cash"):
         return await cb.answer(get_message(lang, "invalid_data"), show_alert=True)
@@ -137,11 +137,11 @@ async def process_money_type(cb: CallbackQuery, state: FSMContext):
     F.data.startswith("money_group_"),
     StateFilter(MoneyStates.waiting_for_group_choice),
 )
-async def process_money_group(cb: CallbackQuery, state: FSMContext):
+async def process_money_group(cb: CallbackQuery, state: FSMContext, user_ctx: UserContext):
     """
     Шаг 3: пользователь выбрал группу ⇒ показываем ➕/➖.
     """
-    lang = await get_user_language(cb.from_user.id)
+    lang = user_ctx.lang
     group = cb.data.removeprefix("money_group_")
     if group not in groups_data:
         return await cb.answer(get_message(lang, "no_such_group"), show_alert=True)
@@ -164,11 +164,11 @@ async def process_money_group(cb: CallbackQuery, state: FSMContext):
     F.data.startswith("money_op_"),
     StateFilter(MoneyStates.waiting_for_operation),
 )
-async def process_money_op(cb: CallbackQuery, state: FSMContext):
+async def process_money_op(cb: CallbackQuery, state: FSMContext, user_ctx: UserContext):
     """
     Шаг 4: запрашиваем сумму, отправляя фото + жирный emoji-префикс.
     """
-    lang = await get_user_language(cb.from_user.id)
+    lang = user_ctx.lang
     op = cb.data.removeprefix("money_op_")
     await state.update_data(operation=op)
 
@@ -188,11 +188,11 @@ async def process_money_op(cb: CallbackQuery, state: FSMContext):
     F.text,
     StateFilter(MoneyStates.waiting_for_amount),
 )
-async def process_money_amount(message: Message, state: FSMContext):
+async def process_money_amount(message: Message, state: FSMContext, user_ctx: UserContext):
     """
     Финальный шаг: обновляем БД, in-memory, перерисовываем group-сообщение, отправляем отчёт.
     """
-    lang = await get_user_language(message.from_user.id)
+    lang = user_ctx.lang
     data = await state.get_data()
     group = data["group"]
     op = data["operation"]
@@ -204,17 +204,19 @@ async def process_money_amount(message: Message, state: FSMContext):
 
     amount = int(text_)
     col = "salary" if typ == "salary" else "cash"
-    current = groups_data[group].get(col, 0)
-    new_val = current + (amount if op == "add" else -amount)
+    delta = amount if op == "add" else -amount
 
     if db.db_pool:
-        async with db.db_pool.acquire() as conn:
-            await conn.execute(
-                f"UPDATE group_financial_data SET {col}=$1 WHERE group_key=$2",
-                new_val, group
-            )
-
-    groups_data[group][col] = new_val
+        totals = await finance.add_group_totals(
+            group,
+            salary_delta=delta if col == "salary" else 0,
+            cash_delta=delta if col == "cash" else 0,
+            kind="money_adjust",
+            ref=str(message.from_user.id),
+        )
+        groups_data[group][col] = totals[col]
+    else:
+        groups_data[group][col] = groups_data[group].get(col, 0) + delta
 
     # Перерисовываем group-сообщение
     await update_group_message(message.bot, group)
@@ -225,7 +227,7 @@ async def process_money_amount(message: Message, state: FSMContext):
 
 
 @money_router.callback_query(F.data == "money_cancel")
-async def money_cancel(cb: CallbackQuery, state: FSMContext):
+async def money_cancel(cb: CallbackQuery, state: FSMContext, user_ctx: UserContext):
     """
     Отмена: удаляем меню и сбрасываем state.
     """
@@ -234,4 +236,4 @@ async def money_cancel(cb: CallbackQuery, state: FSMContext):
         await cb.message.delete()
     except Exception:
         pass
-    await cb.answer(get_message(await get_user_language(cb.from_user.id), "cancelled"))
+    await cb.answer(get_message(user_ctx.lang, "cancelled"))
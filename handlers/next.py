@@ -4,7 +4,7 @@ import asyncio
 import datetime
 import logging
 import html
-from typing import Dict
+from typing import Any, Dict, Optional
 from zoneinfo import ZoneInfo
 
 from aiogram import Router, F
@@ -12,152 +12,197 @@ from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardBut
 from aiogram.enums.parse_mode import ParseMode
 
 import db
-from config import is_user_admin, FINANCIAL_REPORT_GROUP_ID
-from handlers.language import get_user_language, get_message
+from config import FINANCIAL_REPORT_GROUP_ID
+from handlers.language import get_message
 from utils.bot_utils import safe_answer
 from constants.booking_const import groups_data
 from handlers.booking.reporting import update_group_message
+from handlers.booking.data_manager import BookingDataManager
+from utils.send_scheduler import Priority, send_priority
+from utils.lanes import LaneMiddleware, ADMIN
+from db_access.booking_history import booking_history
+from utils.fin_report import fin_report, RESYNC_INTERVAL
+from utils.job_scheduler import job_scheduler, DailyAt, Every
+from utils.user_context import UserContext
 
 from constants.salary import salary_options
 
 logger = logging.getLogger(__name__)
 router = Router()
+router.message.middleware(LaneMiddleware(ADMIN))
+router.callback_query.middleware(LaneMiddleware(ADMIN))
+data_mgr = BookingDataManager(groups_data)
 
+# Сколько месяцев архива броней остаётся подключённым к bookings_history
+HISTORY_KEEP_MONTHS = 12
 
-async def do_next_core(bot):
+# Рабочий день меняется в DAY_START_HOUR:00 по BUSINESS_TZ
+BUSINESS_TZ = ZoneInfo("Asia/Shanghai")
+DAY_START_HOUR = 3
+
+
+def business_date(now: Optional[datetime.datetime] = None) -> datetime.date:
+    """
+    Календарный рабочий день по часам приложения — тем же, по которым
+    планировщик запускает смену дня, поэтому в 03:00 дата уже новая.
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    return (now.astimezone(BUSINESS_TZ) - datetime.timedelta(hours=DAY_START_HOUR)).date()
+
+
+# Итоги дня одним запросом: каждый набор группировки помечен в колонке grp
+_DAY_SUMMARY_SQL = """
+SELECT CASE
+         WHEN GROUPING(b.user_id) = 0 THEN 'user'
+         WHEN GROUPING(b.status) = 0 THEN 'group_status'
+         WHEN GROUPING(b.group_key) = 0 THEN 'group_method'
+         WHEN GROUPING(b.payment_method) = 0 THEN 'method'
+         ELSE 'total'
+       END AS grp,
+       b.payment_method, b.group_key, b.status, b.user_id,
+       MAX(u.username) AS username,
+       COUNT(*) AS cnt,
+       COALESCE(SUM(b.amount), 0) AS amount
+FROM bookings b
+LEFT JOIN users u ON u.user_id = b.user_id
+WHERE b.slot_date = label_date('Сегодня')
+GROUP BY GROUPING SETS (
+    (),
+    (b.payment_method),
+    (b.group_key, b.status),
+    (b.group_key, b.payment_method),
+    (b.user_id)
+)
+ORDER BY grp, cnt DESC, username
+"""
+
+
+async def load_day_summary(conn) -> Dict[str, Any]:
+    """
+    Итоги «Сегодня»: общее число броней, счётчики/суммы по способам оплаты,
+    заработок и наличные по группам, число броней по пользователям.
+    """
+    summary = {
+        "total": 0,
+        "methods": {},
+        "groups": {gk: {"salary_sum": 0, "cash_sum": 0} for gk in groups_data},
+        "users": [],
+    }
+    for r in await conn.fetch(_DAY_SUMMARY_SQL):
+        grp = r["grp"]
+        if grp == "total":
+            summary["total"] = r["cnt"]
+        elif grp == "method":
+            summary["methods"][r["payment_method"]] = (r["cnt"], r["amount"])
+        elif grp == "user":
+            uname = r["username"] or f"User {r['user_id']}"
+            summary["users"].append((uname, r["cnt"]))
+        else:
+            gk = r["group_key"]
+            report = summary["groups"].get(gk)
+            if report is None:
+                continue
+            if grp == "group_status":
+                opt = groups_data[gk].get("salary_option", 1)
+                base_salary = salary_options.get(opt, {}).get(r["status"] or "", 0)
+                report["salary_sum"] += base_salary * r["cnt"]
+            elif r["payment_method"] == "cash":
+                report["cash_sum"] += r["amount"]
+    return summary
+
+
+async def _send_group_report(bot, gk: str, data: Dict[str, int]):
+    ginfo = groups_data.get(gk)
+    if not ginfo:
+        return
+    grp_lines = [
+        f"📊 <b>Отчет по группе {html.escape(gk)} за сегодня</b>",
+        f"💰 Заработок за день: {data['salary_sum']}¥",
+        f"💵 Наличные за день: {data['cash_sum']}¥",
+    ]
+    try:
+        await bot.send_message(ginfo["chat_id"], "\n".join(grp_lines), parse_mode=ParseMode.HTML)
+    except Exception as e:
+        logger.warning("Не удалось отправить отчет группе %s: %s", gk, e)
+
+
+async def do_next_core(bot, limit: Optional[datetime.date] = None) -> bool:
     """
-    1) Собираем отчёт за «Сегодня», отправляем в FINANCIAL_REPORT_GROUP_ID.
-    2) Отправляем отчёты для каждой группы.
-    3) Удаляем все записи «Сегодня».
-    4) Очищаем in-memory для «Сегодня».
-    5) Переносим «Завтра»→«Сегодня».
-    6) Обновляем групповое сообщение.
+    Закрывает один рабочий день, если business_day.today < limit
+    (по умолчанию — календарный рабочий день business_date()); иначе
+    ничего не делает и возвращает False.
+    1) В одной транзакции под блокировкой строки business_day: итоги
+       «Сегодня» одним запросом (load_day_summary), сдвиг рабочего дня
+       и перенос вчерашних броней в архив bookings_history. Параллельная
+       смена (кнопка и планировщик) ждёт блокировку и видит уже
+       сдвинутый день — день закрывается ровно один раз.
+    2) Сразу после коммита перекатываем день в памяти
+       (BookingDataManager.roll_day) — только если день действительно сдвинут.
+    3) Соединение уже отпущено: отправляем отчёт в FINANCIAL_REPORT_GROUP_ID
+       и отчёты группам — параллельно, через общий планировщик отправок.
+    4) Обновляем групповое сообщение.
     """
+    limit = limit or business_date()
     async with db.db_pool.acquire() as conn:
-        today_bookings = await conn.fetch("SELECT * FROM bookings WHERE day = 'Сегодня'")
-        total_bookings_today = len(today_bookings)
-
-        cash_count = cash_sum = 0
-        beznal_count = beznal_sum = 0
-        agent_count = agent_sum = 0
-
-        user_bookings_count: Dict[int, int] = {}
-        group_reports = {gk: {"salary_sum": 0, "cash_sum": 0} for gk in groups_data.keys()}
-
-        for b in today_bookings:
-            pm = b["payment_method"]
-            amt = b["amount"] or 0
-            uid = b["user_id"]
-            gk = b["group_key"]
-            status = b.get("status") or ""
-
-            user_bookings_count[uid] = user_bookings_count.get(uid, 0) + 1
-            opt = groups_data.get(gk, {}).get("salary_option", 1)
-            base_salary = salary_options.get(opt, {}).get(status, 0)
-            group_reports[gk]["salary_sum"] += base_salary
-
-            if pm == "cash":
-                cash_count += 1
-                cash_sum += amt
-                group_reports[gk]["cash_sum"] += amt
-            elif pm == "beznal":
-                beznal_count += 1
-                beznal_sum += amt
-            elif pm == "agent":
-                agent_count += 1
-                agent_sum += amt
-
-        user_lines = []
-        for uid, cnt in user_bookings_count.items():
-            row = await conn.fetchrow("SELECT username FROM users WHERE user_id = $1", uid)
-            uname = row["username"] if (row and row["username"]) else f"User {uid}"
-            user_lines.append(f"({html.escape(uname)}) {cnt}")
-        user_report = "\n".join(user_lines) if user_lines else "нет"
-
-        report_lines = [
-            "🗂️ <b>Отчет за сегодня</b> 🗂️\n",
-            f"⏰ Брони: {total_bookings_today}\n",
-            f"💵 Нал: {cash_count}  итог: {cash_sum}¥\n",
-            f"💸 Безнал: {beznal_count}  итог: {beznal_sum}¥\n",
-            f"🧮 Агент: {agent_count}  итог: {agent_sum}¥\n",
-            "🏋️‍♂️ Пользователи:",
-            user_report,
-        ]
-        report_text = "\n".join(report_lines)
+        async with conn.transaction():
+            today = await conn.fetchval(
+                "SELECT today FROM business_day WHERE today < $1 FOR UPDATE", limit
+            )
+            if today is None:
+                logger.info("Рабочий день уже не раньше %s — смена не нужна", limit)
+                return False
+            summary = await load_day_summary(conn)
+            await conn.execute("UPDATE business_day SET today = today + 1")
+            await booking_history.archive_closed(conn=conn)
+
+    # «Сегодня» отбрасывается, «Завтра» становится «Сегодня»
+    for gk in groups_data:
+        data_mgr.roll_day(gk, "Завтра", "Сегодня")
+
+    def method_line(method: str):
+        return summary["methods"].get(method, (0, 0))
+
+    cash_count, cash_sum = method_line("cash")
+    beznal_count, beznal_sum = method_line("beznal")
+    agent_count, agent_sum = method_line("agent")
+    user_lines = [f"({html.escape(uname)}) {cnt}" for uname, cnt in summary["users"]]
+    user_report = "\n".join(user_lines) if user_lines else "нет"
+
+    report_lines = [
+        "🗂️ <b>Отчет за сегодня</b> 🗂️\n",
+        f"⏰ Брони: {summary['total']}\n",
+        f"💵 Нал: {cash_count}  итог: {cash_sum}¥\n",
+        f"💸 Безнал: {beznal_count}  итог: {beznal_sum}¥\n",
+        f"🧮 Агент: {agent_count}  итог: {agent_sum}¥\n",
+        "🏋️‍♂️ Пользователи:",
+        user_report,
+    ]
+    report_text = "\n".join(report_lines)
+    with send_priority(Priority.LOW):
         try:
             await bot.send_message(FINANCIAL_REPORT_GROUP_ID, report_text, parse_mode=ParseMode.HTML)
         except Exception as e:
             logger.error("Не удалось отправить фин. отчет: %s", e)
 
-        for gk, data in group_reports.items():
-            ginfo = groups_data.get(gk)
-            if not ginfo:
-                continue
-            chat_id = ginfo["chat_id"]
-            salary_sum = data["salary_sum"]
-            cash_sum_grp = data["cash_sum"]
-            grp_lines = [
-                f"📊 <b>Отчет по группе {html.escape(gk)} за сегодня</b>",
-                f"💰 Заработок за день: {salary_sum}¥",
-                f"💵 Наличные за день: {cash_sum_grp}¥",
-            ]
-            grp_text = "\n".join(grp_lines)
-            try:
-                await bot.send_message(chat_id, grp_text, parse_mode=ParseMode.HTML)
-            except Exception as e:
-                logger.warning("Не удалось отправить отчет группе %s: %s", gk, e)
-
-        await conn.execute("DELETE FROM bookings WHERE day = 'Сегодня'")
-        await conn.execute("DELETE FROM group_time_slot_statuses WHERE day = 'Сегодня'")
-
-    for gk, ginfo in groups_data.items():
-        ginfo["booked_slots"]["Сегодня"] = []
-        ginfo["unavailable_slots"]["Сегодня"] = set()
-        ginfo["time_slot_statuses"] = {
-            (d, ts): st for ((d, ts), st) in ginfo["time_slot_statuses"].items() if d != "Сегодня"
-        }
-        ginfo["slot_bookers"] = {
-            (d, ts): u for ((d, ts), u) in ginfo["slot_bookers"].items() if d != "Сегодня"
-        }
-
-    async with db.db_pool.acquire() as conn:
-        await conn.execute("UPDATE bookings SET day = 'Сегодня' WHERE day = 'Завтра'")
-        await conn.execute("UPDATE group_time_slot_statuses SET day = 'Сегодня' WHERE day = 'Завтра'")
-
-    for gk, ginfo in groups_data.items():
-        ginfo["booked_slots"]["Сегодня"] = ginfo["booked_slots"].get("Завтра", [])
-        ginfo["unavailable_slots"]["Сегодня"] = ginfo["unavailable_slots"].get("Завтра", set())
-        ginfo["booked_slots"]["Завтра"] = []
-        ginfo["unavailable_slots"]["Завтра"] = set()
-
-        new_tss = {}
-        for (d, ts), st in ginfo["time_slot_statuses"].items():
-            new_tss[("Сегодня" if d == "Завтра" else d, ts)] = st
-        ginfo["time_slot_statuses"] = new_tss
-
-        new_sb = {}
-        for (d, ts), u in ginfo["slot_bookers"].items():
-            new_sb[("Сегодня" if d == "Завтра" else d, ts)] = u
-        ginfo["slot_bookers"] = new_sb
+        await asyncio.gather(*(
+            _send_group_report(bot, gk, data) for gk, data in summary["groups"].items()
+        ))
 
     for gk in groups_data.keys():
         try:
             await update_group_message(bot, gk)
         except Exception as e:
             logger.warning("Не удалось обновить сообщение группы %s: %s", gk, e)
+    return True
 
 
 # Обработчик кнопки сброса дня — запрашивает подтверждение
 @router.callback_query(F.data == "reset_day")
-async def prompt_reset_day(callback: CallbackQuery):
-    user_id = callback.from_user.id
-    me = await callback.bot.get_me()
-    if user_id == me.id:
-        return
-    if not is_user_admin(user_id):
+async def prompt_reset_day(callback: CallbackQuery, user_ctx: UserContext):
+    if not user_ctx.is_admin:
         return await callback.answer("⚠️ У вас нет прав для выполнения этого действия", show_alert=True)
 
-    lang = await get_user_language(user_id)
+    lang = user_ctx.lang
     kb = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text=get_message(lang, "confirm_yes", default="Да"), callback_data="confirm_reset_day")],
         [InlineKeyboardButton(text=get_message(lang, "confirm_no",  default="Нет"), callback_data="cancel_reset_day")],
@@ -170,40 +215,80 @@ async def prompt_reset_day(callback: CallbackQuery):
 
 
 @router.callback_query(F.data == "confirm_reset_day")
-async def handle_confirm_reset(callback: CallbackQuery):
-    user_id = callback.from_user.id
-    if not is_user_admin(user_id):
+async def handle_confirm_reset(callback: CallbackQuery, user_ctx: UserContext):
+    if not user_ctx.is_admin:
         return await callback.answer("⚠️ У вас нет прав для выполнения этого действия", show_alert=True)
-    await do_next_core(callback.bot)
-    lang = await get_user_language(user_id)
+    lang = user_ctx.lang
+    # сначала пропущенные дни — по тому же правилу, что у авто-смены;
+    # если их нет, текущий день закрывается досрочно, но не дальше завтрашнего
+    bot = callback.bot
+    if not await advance_business_day(bot) and not await do_next_core(
+        bot, limit=business_date() + datetime.timedelta(days=1)
+    ):
+        return await callback.answer(
+            get_message(lang, "reset_not_needed",
+                        default="ℹ️ День уже закрыт досрочно — следующий сброс после 03:00."),
+            show_alert=True
+        )
     await callback.answer(get_message(lang, "next_done", default="✅ Отчет сформирован, бронирования перенесены."), show_alert=True)
 
 
 @router.callback_query(F.data == "cancel_reset_day")
-async def handle_cancel_reset(callback: CallbackQuery):
-    user_id = callback.from_user.id
-    if not is_user_admin(user_id):
+async def handle_cancel_reset(callback: CallbackQuery, user_ctx: UserContext):
+    if not user_ctx.is_admin:
         return await callback.answer("⚠️ У вас нет прав для выполнения этого действия", show_alert=True)
-    lang = await get_user_language(user_id)
+    lang = user_ctx.lang
     await callback.answer(get_message(lang, "reset_cancelled", default="❌ Сброс дня отменен."), show_alert=True)
 
 
-def register_daily_scheduler(dp, bot):
-    async def _scheduler():
-        while True:
-            try:
-                now = datetime.datetime.now(ZoneInfo("Asia/Shanghai"))
-                if now.hour == 3 and now.minute == 0:
-                    logger.info("Авто‐сброс 03:00 Asia/Shanghai")
-                    await do_next_core(bot)
-                    await asyncio.sleep(61)
-                else:
-                    await asyncio.sleep(60)
-            except Exception as e:
-                logger.error("Ошибка в планировщике: %s", e)
-                await asyncio.sleep(60)
+async def advance_business_day(bot, limit: Optional[datetime.date] = None) -> int:
+    """
+    Догоняет business_day до limit (по умолчанию — календарный рабочий
+    день по часам приложения), закрывая прошедшие дни по одному.
+    Возвращает число закрытых дней: 0 — день уже актуален.
+    """
+    limit = limit or business_date()
+    closed = 0
+    while await do_next_core(bot, limit):
+        closed += 1
+    return closed
+
+
+async def rollover_job(bot):
+    """
+    Смена дня в 03:00 Asia/Shanghai (и догон пропущенных смен после простоя).
+    Если рабочий день так и остался позади календаря, задача падает —
+    планировщик повторит её через JOB_RETRY_DELAY, а не через сутки.
+    """
+    target = business_date()
+    closed = await advance_business_day(bot, target)
+    logger.info("Авто‐сброс 03:00 Asia/Shanghai: закрыто дней — %s", closed)
+    async with db.db_pool.acquire() as conn:
+        today = await conn.fetchval("SELECT today FROM business_day")
+    if today is None or today < target:
+        raise RuntimeError(f"Рабочий день {today} отстаёт от календарного {target}")
+
+
+async def history_cleanup_job(bot):
+    """Отключает секции архива броней старше HISTORY_KEEP_MONTHS месяцев."""
+    today = datetime.date.today()
+    months = today.year * 12 + today.month - 1 - HISTORY_KEEP_MONTHS
+    await booking_history.detach_before(datetime.date(months // 12, months % 12 + 1, 1))
+
+
+async def fin_report_job(bot):
+    """Полная сверка сводного фин. отчёта с БД."""
+    fin_report.invalidate()
+    fin_report.request(bot)
+
+
+def register_scheduled_jobs(dp, bot):
+    job_scheduler.add("rollover", rollover_job, DailyAt(DAY_START_HOUR, 0))
+    job_scheduler.add("bookings_history_cleanup", history_cleanup_job, DailyAt(4, 0))
+    job_scheduler.add("fin_report_resync", fin_report_job, Every(RESYNC_INTERVAL))
 
     async def _on_startup():
-        asyncio.create_task(_scheduler())
+        await job_scheduler.start(bot)
 
     dp.startup.register(_on_startup)
+    dp.shutdown.register(job_scheduler.close)
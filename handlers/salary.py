@@ -14,22 +14,26 @@ from aiogram.types import (
 from aiogram.fsm.context import FSMContext
 
 import db
-from config import is_user_admin
 from constants.booking_const import groups_data
 from constants.salary import salary_options
 from handlers.states import SalaryStates
-from handlers.language import get_user_language, get_message
+from handlers.language import get_message
 from utils.bot_utils import safe_answer  # общая функция для удаления предыдущего сообщения
+from utils.lanes import LaneMiddleware, ADMIN
+from utils.user_context import UserContext
 
 logger = logging.getLogger(__name__)
 salary_router = Router()
+salary_router.message.middleware(LaneMiddleware(ADMIN))
+salary_router.callback_query.middleware(LaneMiddleware(ADMIN))
 
 SALARY_PHOTO = "photo/IMG_2585.JPG"
 
 
 async def load_salary_data_from_db():
     """
-    Загружает из БД настройки salary и cash в groups_data.
+    Загружает из БД настройки salary и cash в groups_data
+    (суммы — балансы счетов журнала).
     Вызывается из main.py перед стартом polling.
     """
     pool = db.db_pool
@@ -41,8 +45,12 @@ async def load_salary_data_from_db():
         async with pool.acquire() as conn:
             rows = await conn.fetch(
                 """
-                SELECT group_key, salary_option, salary, cash, message_id
-                  FROM group_financial_data
+                SELECT g.group_key, g.salary_option, g.message_id,
+                       COALESCE(s.balance, 0)::BIGINT AS salary,
+                       COALESCE(c.balance, 0)::BIGINT AS cash
+                  FROM group_financial_data g
+                  LEFT JOIN account_balances s ON s.account = 'group:' || g.group_key || ':salary'
+                  LEFT JOIN account_balances c ON c.account = 'group:' || g.group_key || ':cash'
                 """
             )
     except Exception as e:
@@ -60,9 +68,9 @@ async def load_salary_data_from_db():
     logger.info("Salary settings loaded from DB.")
 
 
-async def _salary_init(entry: Message | CallbackQuery, state: FSMContext):
-    lang = await get_user_language(entry.from_user.id)
-    if not is_user_admin(entry.from_user.id):
+async def _salary_init(entry: Message | CallbackQuery, state: FSMContext, user_ctx: UserContext):
+    lang = user_ctx.lang
+    if not user_ctx.is_admin:
         if isinstance(entry, CallbackQuery):
             return await entry.answer(
                 "⚠️ У вас нет прав для выполнения этого действия",
@@ -93,20 +101,20 @@ async def _salary_init(entry: Message | CallbackQuery, state: FSMContext):
 
 
 @salary_router.message(Command("salary"))
-async def salary_command(message: Message, state: FSMContext):
-    if not is_user_admin(message.from_user.id):
+async def salary_command(message: Message, state: FSMContext, user_ctx: UserContext):
+    if not user_ctx.is_admin:
         return
-    await _salary_init(message, state)
+    await _salary_init(message, state, user_ctx)
 
 
 @salary_router.callback_query(F.data == "salary")
-async def salary_via_button(cb: CallbackQuery, state: FSMContext):
-    if not is_user_admin(cb.from_user.id):
+async def salary_via_button(cb: CallbackQuery, state: FSMContext, user_ctx: UserContext):
+    if not user_ctx.is_admin:
         return await cb.answer(
             "⚠️ У вас нет прав для выполнения этого действия",
             show_alert=True
         )
-    await _salary_init(cb, state)
+    await _salary_init(cb, state, user_ctx)
     await cb.answer()
 
 
@@ -114,9 +122,9 @@ async def salary_via_button(cb: CallbackQuery, state: FSMContext):
     F.data.startswith("salary_group_"),
     StateFilter(SalaryStates.waiting_for_group_choice),
 )
-async def process_group(callback: CallbackQuery, state: FSMContext):
-    lang = await get_user_language(callback.from_user.id)
-    if not is_user_admin(callback.from_user.id):
+async def process_group(callback: CallbackQuery, state: FSMContext, user_ctx: UserContext):
+    lang = user_ctx.lang
+    if not user_ctx.is_admin:
         return await callback.answer(
             "⚠️ У вас нет прав для выполнения этого действия",
             show_alert=True
@@ -155,9 +163,9 @@ async def process_group(callback: CallbackQuery, state: FSMContext):
     F.data.startswith("salary_opt_"),
     StateFilter(SalaryStates.waiting_for_option_choice),
 )
-async def process_option(callback: CallbackQuery, state: FSMContext):
-    lang = await get_user_language(callback.from_user.id)
-    if not is_user_admin(callback.from_user.id):
+async def process_option(callback: CallbackQuery, state: FSMContext, user_ctx: UserContext):
+    lang = user_ctx.lang
+    if not user_ctx.is_admin:
         return await callback.answer(
             "⚠️ У вас нет прав для выполнения этого действия",
             show_alert=True
@@ -202,13 +210,13 @@ async def process_option(callback: CallbackQuery, state: FSMContext):
     F.data == "salary_cancel",
     StateFilter(SalaryStates.waiting_for_option_choice),
 )
-async def process_cancel(callback: CallbackQuery, state: FSMContext):
+async def process_cancel(callback: CallbackQuery, state: FSMContext, user_ctx: UserContext):
     await state.clear()
     try:
         await callback.message.delete()
     except:
         pass
     await callback.answer(
-        get_message(await get_user_language(callback.from_user.id), "cancelled"),
+        get_message(user_ctx.lang, "cancelled"),
         show_alert=True
     )
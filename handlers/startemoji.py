@@ -18,6 +18,8 @@ import db
 from config import is_user_admin, ADMIN_IDS
 from handlers.language import get_user_language, get_message
 from utils.bot_utils import safe_answer
+from utils.fin_report import fin_report
+from utils.user_context import UserContext, user_contexts
 from handlers.states import EmojiStates
 
 logger = logging.getLogger(__name__)
@@ -67,17 +69,18 @@ async def _save_user_emojis(user_id: int, emojis: List[str]) -> None:
         )
     finally:
         await db.db_pool.release(conn)
+    fin_report.set_user_emojis(user_id, ",".join(emojis))
+    user_contexts.invalidate(user_id)
 
 
 @router.message(Command("allemo"))
-async def cmd_allemo(message: Message):
+async def cmd_allemo(message: Message, user_ctx: UserContext):
     """
     /allemo — показать всех пользователей с назначенными эмодзи (только для админов).
     """
-    uid = message.from_user.id
-    lang = await get_user_language(uid)
+    lang = user_ctx.lang
 
-    if not is_user_admin(uid):
+    if not user_ctx.is_admin:
         return await safe_answer(
             message,
             caption=get_message(lang, "no_permission", default="Недостаточно прав."),
@@ -161,18 +164,14 @@ async def cmd_emoji(
     )
 
 @router.callback_query(F.data.startswith("assign_emoji_"))
-async def callback_assign_emoji(callback: CallbackQuery, state: FSMContext):
+async def callback_assign_emoji(callback: CallbackQuery, state: FSMContext, user_ctx: UserContext):
     """
     Обработка клика “assign_emoji_<target_id>”:
     показываем клавиатуру с CUSTOM_EMOJIS и кнопку с "⚽️🪩🏀".
     """
-    me = await callback.bot.get_me()
-    if callback.from_user.id == me.id:
-        return
-
-    lang = await get_user_language(callback.from_user.id)
+    lang = user_ctx.lang
 
-    if not is_user_admin(callback.from_user.id):
+    if not user_ctx.is_admin:
         return await safe_answer(
             callback,
             get_message(lang, "admin_only", default="Только для админов."),
@@ -223,18 +222,14 @@ async def callback_assign_emoji(callback: CallbackQuery, state: FSMContext):
 @router.callback_query(
     StateFilter(EmojiStates.waiting_for_assign), F.data.startswith("choose_emoji_")
 )
-async def callback_choose_emoji(callback: CallbackQuery, bot: Bot):
+async def callback_choose_emoji(callback: CallbackQuery, bot: Bot, user_ctx: UserContext):
     """
     Обработка клика “choose_emoji_<target_id>_<emoji>”:
     сохраняем ровно один emoji.
     """
-    me = await bot.get_me()
-    if callback.from_user.id == me.id:
-        return
-
-    lang = await get_user_language(callback.from_user.id)
+    lang = user_ctx.lang
 
-    if not is_user_admin(callback.from_user.id):
+    if not user_ctx.is_admin:
         return await safe_answer(
             callback,
             get_message(lang, "admin_only", default="Только для админов."),
@@ -297,19 +292,15 @@ async def callback_choose_emoji(callback: CallbackQuery, bot: Bot):
     StateFilter(EmojiStates.waiting_for_assign), F.data.startswith("assign_emojis_")
 )
 async def assign_multiple_emojis_callback(
-    callback: CallbackQuery, state: FSMContext, bot: Bot
+    callback: CallbackQuery, state: FSMContext, bot: Bot, user_ctx: UserContext
 ):
     """
     Обработка клика “assign_emojis_<target_id>_<e1>_<e2>_…”:
     сохраняем несколько emoji сразу.
     """
-    me = await bot.get_me()
-    if callback.from_user.id == me.id:
-        return
-
-    lang = await get_user_language(callback.from_user.id)
+    lang = user_ctx.lang
 
-    if not is_user_admin(callback.from_user.id):
+    if not user_ctx.is_admin:
         return await safe_answer(
             callback,
             get_message(lang, "admin_only", default="Только для админов."),
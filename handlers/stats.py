@@ -0,0 +1,20 @@
+# handlers/stats.py
+
+from aiogram import Router
+from aiogram.filters import Command
+from aiogram.types import Message
+
+from utils.bot_utils import safe_answer
+from utils.metrics import format_text
+from utils.text_utils import format_html_pre
+from utils.user_context import UserContext
+
+router = Router()
+
+
+@router.message(Command("stats"))
+async def cmd_stats(message: Message, user_ctx: UserContext):
+    """/stats — нагрузка полос, очередь отправок и OpenAI (только для админов)."""
+    if not user_ctx.is_admin:
+        return
+    await safe_answer(message, format_html_pre(format_text()), parse_mode="HTML")
@@ -2,16 +2,19 @@
 
 import os
 import random
-import openai
 import logging
 import html
 
 from aiogram import Router, types
 from aiogram.filters.command import Command
 from aiogram.types import FSInputFile
+from utils.lanes import LaneMiddleware, AI
+from utils.openai_client import openai_client
 
 logger = logging.getLogger(__name__)
 router = Router()
+router.message.middleware(LaneMiddleware(AI))
+router.callback_query.middleware(LaneMiddleware(AI))
 
 # ────────────────────────────── Настройки ──────────────────────────────
 
@@ -132,7 +135,7 @@ def draw_cards(cards_dict: dict, count: int = 3, reversed_chance: float = REVERS
     return results
 
 
-def get_card_interpretation(card_name: str, position: str, is_reversed: bool) -> str:
+async def get_card_interpretation(card_name: str, position: str, is_reversed: bool) -> str:
     """
     Запрашивает ChatCompletion у OpenAI для интерпретации карты `card_name`.
     position — "Прошлое", "Настоящее" или "Будущее".
@@ -146,7 +149,7 @@ def get_card_interpretation(card_name: str, position: str, is_reversed: bool) ->
     )
 
     try:
-        response = openai.ChatCompletion.create(
+        answer_text = (await openai_client.chat(
             model="gpt-4o",  # Или любой другой доступный моделью
             messages=[
                 {
@@ -163,8 +166,7 @@ def get_card_interpretation(card_name: str, position: str, is_reversed: bool) ->
             ],
             temperature=0.7,
             max_tokens=2000
-        )
-        answer_text = response.choices[0].message.content.strip()
+        )).strip()
     except Exception as e:
         logger.error(f"Ошибка при запросе к OpenAI: {e}")
         answer_text = "Извините, произошла ошибка при получении интерпретации."
@@ -196,7 +198,7 @@ async def cmd_taro(message: types.Message):
         full_path = os.path.join(TARO_FOLDER, fname)
 
         # Получаем текст интерпретации через OpenAI
-        interpretation = get_card_interpretation(card_name, pos_text, is_rev)
+        interpretation = await get_card_interpretation(card_name, pos_text, is_rev)
 
         # Пробуем отправить фотографию карты
         try:
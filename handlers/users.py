@@ -6,11 +6,18 @@ from aiogram.fsm.context import FSMContext
 from aiogram.filters.command import Command
 
 import db
-from config import is_user_admin
-from handlers.language import get_user_language, get_message
+from handlers.language import get_message
 from handlers.states import UsersManagementStates
+from utils.fin_report import fin_report
+from utils.lanes import LaneMiddleware, ADMIN
+from utils.user_context import UserContext, user_contexts
+from db_access.finance_repo import FinanceRepo
+from db_access.ledger import ledger, user_account
 
 users_router = Router()
+users_router.message.middleware(LaneMiddleware(ADMIN))
+users_router.callback_query.middleware(LaneMiddleware(ADMIN))
+finance = FinanceRepo()
 
 
 async def _send_users_list(send_func, admin_id: int, lang: str, state: FSMContext):
@@ -22,9 +29,10 @@ async def _send_users_list(send_func, admin_id: int, lang: str, state: FSMContex
     try:
         rows = await conn.fetch(
             """
-            SELECT u.user_id, u.username, u.balance, e.emojis
+            SELECT u.user_id, u.username, COALESCE(ab.balance, 0)::BIGINT AS balance, e.emojis
             FROM users u
             LEFT JOIN user_emojis e ON u.user_id = e.user_id
+            LEFT JOIN account_balances ab ON ab.account = 'user:' || u.user_id
             ORDER BY u.user_id
             """
         )
@@ -69,14 +77,14 @@ async def _send_users_list(send_func, admin_id: int, lang: str, state: FSMContex
 
 
 @users_router.message(Command("users"))
-async def cmd_users(message: Message, state: FSMContext):
+async def cmd_users(message: Message, state: FSMContext, user_ctx: UserContext):
     """
     /users — показать админам список всех пользователей + кнопки “Новый пользователь / Удалить” / “Edit” → переход
     в FSM
     """
     admin_id = message.from_user.id
-    lang = await get_user_language(admin_id)
-    if not is_user_admin(admin_id):
+    lang = user_ctx.lang
+    if not user_ctx.is_admin:
         await message.answer(get_message(lang, "no_permission"))
         return
 
@@ -84,8 +92,8 @@ async def cmd_users(message: Message, state: FSMContext):
 
 
 @users_router.callback_query(F.data == "users_new")
-async def cb_users_new(callback: CallbackQuery, state: FSMContext):
-    if not is_user_admin(callback.from_user.id):
+async def cb_users_new(callback: CallbackQuery, state: FSMContext, user_ctx: UserContext):
+    if not user_ctx.is_admin:
         await callback.answer("Нет прав", show_alert=True)
         return
 
@@ -95,9 +103,8 @@ async def cb_users_new(callback: CallbackQuery, state: FSMContext):
 
 
 @users_router.message(F.state == UsersManagementStates.waiting_for_new_user_id)
-async def process_input_new_user_id(message: Message, state: FSMContext):
-    admin_id = message.from_user.id
-    if not is_user_admin(admin_id):
+async def process_input_new_user_id(message: Message, state: FSMContext, user_ctx: UserContext):
+    if not user_ctx.is_admin:
         await message.answer("Нет прав")
         return
 
@@ -127,6 +134,8 @@ async def process_input_new_user_id(message: Message, state: FSMContext):
         )
     finally:
         await db.db_pool.release(conn)
+    fin_report.invalidate()
+    user_contexts.invalidate(new_id)
 
     await message.answer(
         f"Пользователь {new_id} добавлен (имя и эмодзи пока не заданы)."
@@ -135,8 +144,8 @@ async def process_input_new_user_id(message: Message, state: FSMContext):
 
 
 @users_router.callback_query(F.data == "users_delete")
-async def cb_users_delete(callback: CallbackQuery, state: FSMContext):
-    if not is_user_admin(callback.from_user.id):
+async def cb_users_delete(callback: CallbackQuery, state: FSMContext, user_ctx: UserContext):
+    if not user_ctx.is_admin:
         await callback.answer("Нет прав", show_alert=True)
         return
 
@@ -166,8 +175,8 @@ async def cb_users_delete(callback: CallbackQuery, state: FSMContext):
 @users_router.callback_query(
     F.data.startswith("delete_user_"), UsersManagementStates.waiting_for_delete_choice
 )
-async def process_delete_user_choice(callback: CallbackQuery, state: FSMContext):
-    if not is_user_admin(callback.from_user.id):
+async def process_delete_user_choice(callback: CallbackQuery, state: FSMContext, user_ctx: UserContext):
+    if not user_ctx.is_admin:
         await callback.answer("Нет прав", show_alert=True)
         return
 
@@ -184,6 +193,8 @@ async def process_delete_user_choice(callback: CallbackQuery, state: FSMContext)
         await conn.execute("DELETE FROM users WHERE user_id = $1", user_id_to_delete)
     finally:
         await db.db_pool.release(conn)
+    fin_report.invalidate()
+    user_contexts.invalidate(user_id_to_delete)
 
     await callback.message.edit_text(f"Пользователь {user_id_to_delete} удалён.")
     await state.clear()
@@ -192,8 +203,8 @@ async def process_delete_user_choice(callback: CallbackQuery, state: FSMContext)
 @users_router.callback_query(
     F.data.startswith("edit_user_"), UsersManagementStates.waiting_for_user_selection
 )
-async def cb_edit_user(callback: CallbackQuery, state: FSMContext):
-    if not is_user_admin(callback.from_user.id):
+async def cb_edit_user(callback: CallbackQuery, state: FSMContext, user_ctx: UserContext):
+    if not user_ctx.is_admin:
         await callback.answer("Нет прав", show_alert=True)
         return
 
@@ -208,7 +219,7 @@ async def cb_edit_user(callback: CallbackQuery, state: FSMContext):
     try:
         row = await conn.fetchrow(
             """
-            SELECT u.user_id, u.username, u.balance, e.emojis
+            SELECT u.user_id, u.username, e.emojis
             FROM users u
             LEFT JOIN user_emojis e ON u.user_id = e.user_id
             WHERE u.user_id = $1
@@ -235,7 +246,7 @@ async def cb_edit_user(callback: CallbackQuery, state: FSMContext):
     )
     uname = row["username"] or f"User {row['user_id']}"
     emojis_str = row["emojis"] or ""
-    bal = row["balance"] or 0
+    bal = await ledger.balance(user_account(target_user_id))
 
     await callback.message.edit_text(
         (
@@ -251,8 +262,8 @@ async def cb_edit_user(callback: CallbackQuery, state: FSMContext):
 
 
 @users_router.callback_query(F.data == "edit_name", UsersManagementStates.waiting_for_edit_choice)
-async def cb_edit_name(callback: CallbackQuery, state: FSMContext):
-    if not is_user_admin(callback.from_user.id):
+async def cb_edit_name(callback: CallbackQuery, state: FSMContext, user_ctx: UserContext):
+    if not user_ctx.is_admin:
         await callback.answer("Нет прав", show_alert=True)
         return
 
@@ -262,9 +273,8 @@ async def cb_edit_name(callback: CallbackQuery, state: FSMContext):
 
 
 @users_router.message(F.state == UsersManagementStates.waiting_for_new_name)
-async def process_new_name(message: Message, state: FSMContext):
-    admin_id = message.from_user.id
-    if not is_user_admin(admin_id):
+async def process_new_name(message: Message, state: FSMContext, user_ctx: UserContext):
+    if not user_ctx.is_admin:
         await message.answer("Нет прав")
         return
 
@@ -283,14 +293,16 @@ async def process_new_name(message: Message, state: FSMContext):
         )
     finally:
         await db.db_pool.release(conn)
+    fin_report.invalidate()
+    user_contexts.invalidate(user_id_)
 
     await message.answer(f"Имя пользователя {user_id_} обновлено: {new_name}")
     await state.clear()
 
 
 @users_router.callback_query(F.data == "edit_emoji", UsersManagementStates.waiting_for_edit_choice)
-async def cb_edit_emoji(callback: CallbackQuery, state: FSMContext):
-    if not is_user_admin(callback.from_user.id):
+async def cb_edit_emoji(callback: CallbackQuery, state: FSMContext, user_ctx: UserContext):
+    if not user_ctx.is_admin:
         await callback.answer("Нет прав", show_alert=True)
         return
 
@@ -300,9 +312,8 @@ async def cb_edit_emoji(callback: CallbackQuery, state: FSMContext):
 
 
 @users_router.message(F.state == UsersManagementStates.waiting_for_new_emoji)
-async def process_new_emoji(message: Message, state: FSMContext):
-    admin_id = message.from_user.id
-    if not is_user_admin(admin_id):
+async def process_new_emoji(message: Message, state: FSMContext, user_ctx: UserContext):
+    if not user_ctx.is_admin:
         await message.answer("Нет прав")
         return
 
@@ -327,14 +338,16 @@ async def process_new_emoji(message: Message, state: FSMContext):
         )
     finally:
         await db.db_pool.release(conn)
+    fin_report.set_user_emojis(user_id_, new_emoji_str)
+    user_contexts.invalidate(user_id_)
 
     await message.answer(f"Эмодзи для {user_id_} обновлено: {new_emoji_str}")
     await state.clear()
 
 
 @users_router.callback_query(F.data == "edit_balance", UsersManagementStates.waiting_for_edit_choice)
-async def cb_edit_balance(callback: CallbackQuery, state: FSMContext):
-    if not is_user_admin(callback.from_user.id):
+async def cb_edit_balance(callback: CallbackQuery, state: FSMContext, user_ctx: UserContext):
+    if not user_ctx.is_admin:
         await callback.answer("Нет прав", show_alert=True)
         return
 
@@ -354,8 +367,8 @@ async def cb_edit_balance(callback: CallbackQuery, state: FSMContext):
 @users_router.callback_query(
     F.data.startswith("editbal_"), UsersManagementStates.waiting_for_balance_op
 )
-async def cb_editbal_op(callback: CallbackQuery, state: FSMContext):
-    if not is_user_admin(callback.from_user.id):
+async def cb_editbal_op(callback: CallbackQuery, state: FSMContext, user_ctx: UserContext):
+    if not user_ctx.is_admin:
         await callback.answer("Нет прав", show_alert=True)
         return
 
@@ -372,9 +385,8 @@ async def cb_editbal_op(callback: CallbackQuery, state: FSMContext):
 
 
 @users_router.message(F.state == UsersManagementStates.waiting_for_balance_value)
-async def process_balance_value(message: Message, state: FSMContext):
-    admin_id = message.from_user.id
-    if not is_user_admin(admin_id):
+async def process_balance_value(message: Message, state: FSMContext, user_ctx: UserContext):
+    if not user_ctx.is_admin:
         await message.answer("Нет прав")
         return
 
@@ -398,18 +410,19 @@ async def process_balance_value(message: Message, state: FSMContext):
 
     delta = amount if op == "plus" else -amount
 
-    conn = await db.db_pool.acquire()
-    try:
-        row = await conn.fetchrow("SELECT balance FROM users WHERE user_id = $1", user_id_)
-        if not row:
-            await message.answer("Пользователь не найден в таблице users.")
-            await state.clear()
-            return
-
-        new_balance = (row["balance"] or 0) + delta
-        await conn.execute("UPDATE users SET balance = $1 WHERE user_id = $2", new_balance, user_id_)
-    finally:
-        await db.db_pool.release(conn)
+    async with db.db_pool.acquire() as conn:
+        exists = await conn.fetchval("SELECT 1 FROM users WHERE user_id = $1", user_id_)
+    if not exists:
+        await message.answer("Пользователь не найден в таблице users.")
+        await state.clear()
+        return
+
+    # ручная правка — обычная проводка, журнал и users.balance не расходятся
+    row = await finance.add_user_balance(
+        user_id_, delta, kind="admin_adjust", ref=str(message.from_user.id)
+    )
+    new_balance = row["balance"]
+    fin_report.set_user_balance(user_id_, new_balance)
 
     op_text = "+" if op == "plus" else "-"
     await message.answer(
@@ -419,9 +432,9 @@ async def process_balance_value(message: Message, state: FSMContext):
 
 
 @users_router.callback_query(F.data == "balances")
-async def show_users_via_callback(callback: CallbackQuery, state: FSMContext):
-    lang = await get_user_language(callback.from_user.id)
-    if not is_user_admin(callback.from_user.id):
+async def show_users_via_callback(callback: CallbackQuery, state: FSMContext, user_ctx: UserContext):
+    lang = user_ctx.lang
+    if not user_ctx.is_admin:
         await callback.answer(get_message(lang, "no_permission"), show_alert=True)
         return
 
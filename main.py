@@ -3,10 +3,14 @@
 import asyncio
 import logging
 from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.types import BotCommand
-from aiogram.fsm.storage.memory import MemoryStorage
 
-from config import TELEGRAM_BOT_TOKEN
+from config import (
+    TELEGRAM_BOT_TOKEN, TELEGRAM_API_URL, BOT_MODE,
+    WEBHOOK_BASE_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBAPP_HOST, WEBAPP_PORT, WEBHOOK_WORKERS,
+)
 import db
 
 # Импортируем «сборные» роутеры
@@ -27,9 +31,20 @@ from handlers.file import router as file_router
 from handlers.ai import router as ai_router
 from handlers.rules import router as rules_router
 from handlers.exchange import router as exchange_router
-from handlers.next import router as next_router, register_daily_scheduler
+from handlers.next import router as next_router, register_scheduled_jobs
 from handlers.andry import router as andry_router
+from handlers.stats import router as stats_router
 from db_access.booking_repo import BookingRepo
+from handlers.booking.reporting import drain_group_messages
+from utils.fin_report import fin_report
+from utils.deletion_queue import deletion_queue
+from utils.pg_storage import PgStorage
+from utils.rates import rate_service
+from utils.openai_client import openai_client
+from utils.metrics import metrics_logger
+from utils.send_scheduler import send_scheduler
+from utils.middlewares import IgnoreSelfMiddleware, UserContextMiddleware
+from utils.webhook import run_webhook
 
 async def main():
     logging.basicConfig(
@@ -60,9 +75,22 @@ async def main():
 
     # 4) Создание Bot и Dispatcher
     logger.debug("Создание экземпляра бота и диспетчера...")
-    bot = Bot(token=TELEGRAM_BOT_TOKEN)
-    storage = MemoryStorage()
+    session = None
+    if TELEGRAM_API_URL:
+        # локальный сервер Bot API (или фейковый — для тестов)
+        session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL))
+    bot = Bot(token=TELEGRAM_BOT_TOKEN, session=session)
+    # Все исходящие запросы — через общий планировщик с лимитами и приоритетами
+    bot.session.middleware(send_scheduler)
+    # FSM в памяти с фоновой записью в fsm_storage — сценарии переживают рестарт
+    storage = PgStorage()
     dp = Dispatcher(storage=storage)
+    dp.startup.register(storage.start)
+    # Колбэки от самого бота отсекаются один раз здесь, а не в каждом хендлере
+    dp.callback_query.outer_middleware(IgnoreSelfMiddleware())
+    # Язык/админ/имя пользователя — один раз на апдейт (data["user_ctx"])
+    dp.message.outer_middleware(UserContextMiddleware())
+    dp.callback_query.outer_middleware(UserContextMiddleware())
 
     # 5) Регистрируем on_startup-хендлер GPT (если нужен)
     #dp.startup.register(gpt_on_startup)
@@ -88,13 +116,29 @@ async def main():
     dp.include_router(menu_ad_router)
     dp.include_router(menu_router)
     dp.include_router(file_router)
+    dp.include_router(stats_router)
     #dp.include_router(gpt_router)
     dp.include_router(andry_router)  # В САМОМ КОНЦЕ!
 
     logger.info("Все роутеры успешно подключены.")
 
-    # 7) Регистрируем планировщик (из handlers/next.py)
-    register_daily_scheduler(dp, bot)
+    # 7) Регистрируем периодические задачи: смена дня, уборка архива, фин. отчёт
+    register_scheduled_jobs(dp, bot)
+
+    # Табло групп перерисовываются с задержкой — дорисовываем перед остановкой
+    dp.shutdown.register(drain_group_messages)
+    dp.shutdown.register(fin_report.flush)
+    # Отложенные удаления (handlers/file.py) — один воркер, очередь в БД
+    dp.startup.register(deletion_queue.start)
+    dp.shutdown.register(deletion_queue.close)
+    # Курсы валют для /conversion — в памяти, обновляются в фоне
+    dp.startup.register(rate_service.start)
+    dp.shutdown.register(rate_service.close)
+    dp.shutdown.register(openai_client.close)
+    # метрики полос/отправок/OpenAI — в лог раз в METRICS_INTERVAL и по /stats
+    dp.startup.register(metrics_logger.start)
+    dp.shutdown.register(metrics_logger.close)
+    dp.shutdown.register(send_scheduler.close)
 
     # 8) Устанавливаем список команд бота (меню команд):
     logger.debug("Установка команд бота...")
@@ -119,17 +163,28 @@ async def main():
     await bot.set_my_commands(commands)
     logger.info("Команды бота успешно установлены.")
 
-    # 9) Удаляем webhook (если был) и запускаем polling
-    logger.debug("Удаление webhook (если установлен)...")
-    await bot.delete_webhook(drop_pending_updates=True)
-    logger.info("Webhook удалён. Ждём 2 секунды...")
-    await asyncio.sleep(2)
-
-    logger.info("Запуск polling для получения обновлений от Telegram...")
+    # 9) Приём апдейтов: вебхук или polling (BOT_MODE)
+    allowed_updates = dp.resolve_used_update_types()
     try:
-        await dp.start_polling(bot, skip_updates=True)
+        if BOT_MODE == "webhook":
+            logger.info("Запуск в режиме webhook...")
+            await run_webhook(
+                dp, bot,
+                base_url=WEBHOOK_BASE_URL, path=WEBHOOK_PATH, secret=WEBHOOK_SECRET,
+                host=WEBAPP_HOST, port=WEBAPP_PORT, workers=WEBHOOK_WORKERS,
+                allowed_updates=allowed_updates,
+            )
+        else:
+            logger.debug("Удаление webhook (если установлен)...")
+            await bot.delete_webhook(drop_pending_updates=True)
+            logger.info("Webhook удалён. Ждём 2 секунды...")
+            await asyncio.sleep(2)
+
+            logger.info("Запуск polling для получения обновлений от Telegram...")
+            # chat_member не приходит по умолчанию — запрашиваем все используемые типы апдейтов
+            await dp.start_polling(bot, skip_updates=True, allowed_updates=allowed_updates)
     except Exception as e:
-        logger.error("Ошибка во время polling: %s", e)
+        logger.error("Ошибка во время приёма обновлений: %s", e)
     finally:
         logger.debug("Закрытие подключения к базе данных...")
         await db.close_db_pool()
@@ -0,0 +1,50 @@
+# migrate.py
+#
+# Офлайн-применение миграций перед деплоем:
+#   python migrate.py             — применить все недостающие миграции
+#   python migrate.py --status    — показать текущую версию и список ожидающих
+#   python migrate.py --target 3  — применить миграции только до версии 3
+
+import argparse
+import asyncio
+import logging
+
+import config  # noqa: F401  — загружает .env до обращения к переменным окружения
+import db
+from db_access import migrator
+
+
+async def run(args: argparse.Namespace) -> None:
+    await db.init_db_pool()
+    try:
+        if args.status:
+            async with db.db_pool.acquire() as conn:
+                version = await migrator.current_version(conn)
+            pending = await migrator.pending_migrations(db.db_pool)
+            print(f"Текущая версия схемы: {version}")
+            if pending:
+                print("Ожидают применения:")
+                for m in pending:
+                    print(f"  {m.version:04d}_{m.name}")
+            else:
+                print("Схема актуальна.")
+            return
+
+        version = await migrator.migrate(db.db_pool, target=args.target)
+        print(f"Схема БД на версии {version}.")
+    finally:
+        await db.close_db_pool()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Миграции схемы БД royal_bot")
+    parser.add_argument("--status", action="store_true", help="только показать состояние")
+    parser.add_argument("--target", type=int, default=None, help="применить миграции до этой версии")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
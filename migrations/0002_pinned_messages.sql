@@ -0,0 +1,9 @@
+-- migrations/0002_pinned_messages.sql
+-- Служебные сообщения бота, которые редактируются на месте (сводный фин. отчёт).
+
+CREATE TABLE IF NOT EXISTS pinned_messages (
+    key TEXT PRIMARY KEY,
+    chat_id BIGINT NOT NULL,
+    message_id BIGINT NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
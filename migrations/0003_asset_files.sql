@@ -0,0 +1,11 @@
+-- migrations/0003_asset_files.sql
+-- file_id загруженных в Telegram локальных картинок (по боту: file_id привязан к токену).
+
+CREATE TABLE IF NOT EXISTS asset_files (
+    bot_id BIGINT NOT NULL,
+    path TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    file_id TEXT NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (bot_id, path)
+);
@@ -0,0 +1,10 @@
+-- migrations/0004_balances_chat_unique.sql
+-- Один баланс на чат: нужен для атомарного UPSERT balance = balance + $delta.
+
+-- Дубликаты (остались от прежнего SELECT + INSERT) сводим к последней строке
+DELETE FROM balances b
+USING balances newer
+WHERE b.chat_id = newer.chat_id
+  AND b.id < newer.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS balances_chat_id_uq ON balances (chat_id);
@@ -0,0 +1,54 @@
+-- migrations/0005_ledger.sql
+-- Журнал движения денег (двойная запись) и материализованные балансы счетов.
+--
+-- Счета: user:<user_id>, group:<group_key>:salary, group:<group_key>:cash,
+-- chat:<chat_id> (балансы andry) и встречные equity:* (их баланс не
+-- материализуется — горячая строка, считается суммой по журналу).
+
+CREATE SEQUENCE IF NOT EXISTS ledger_txn_seq;
+
+CREATE TABLE IF NOT EXISTS ledger_entries (
+    id BIGSERIAL PRIMARY KEY,
+    txn_id BIGINT NOT NULL,
+    account TEXT NOT NULL,
+    amount NUMERIC NOT NULL,
+    kind TEXT NOT NULL,
+    ref TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Суммы за период по счёту — index-only scan
+CREATE INDEX IF NOT EXISTS ledger_entries_account_time
+    ON ledger_entries (account, created_at) INCLUDE (amount);
+CREATE INDEX IF NOT EXISTS ledger_entries_txn ON ledger_entries (txn_id);
+
+CREATE TABLE IF NOT EXISTS account_balances (
+    account TEXT PRIMARY KEY,
+    balance NUMERIC NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Входящие остатки из существующих таблиц (одна проводка на счёт)
+WITH opening AS (
+    SELECT 'user:' || user_id AS account, balance::NUMERIC AS amount
+    FROM users WHERE balance <> 0
+    UNION ALL
+    SELECT 'group:' || group_key || ':salary', salary::NUMERIC
+    FROM group_financial_data WHERE salary <> 0
+    UNION ALL
+    SELECT 'group:' || group_key || ':cash', cash::NUMERIC
+    FROM group_financial_data WHERE cash <> 0
+    UNION ALL
+    SELECT 'chat:' || chat_id, balance
+    FROM balances WHERE chat_id IS NOT NULL AND balance <> 0
+), legs AS (
+    SELECT nextval('ledger_txn_seq') AS txn_id, account, amount FROM opening
+), ins AS (
+    INSERT INTO ledger_entries (txn_id, account, amount, kind)
+    SELECT txn_id, account, amount, 'opening' FROM legs
+    UNION ALL
+    SELECT txn_id, 'equity:opening', -amount, 'opening' FROM legs
+)
+INSERT INTO account_balances (account, balance)
+SELECT account, amount FROM opening
+ON CONFLICT (account) DO NOTHING;
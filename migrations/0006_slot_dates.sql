@@ -0,0 +1,57 @@
+-- migrations/0006_slot_dates.sql
+-- Брони и статусы слотов хранятся по календарной дате (Asia/Shanghai),
+-- а не по строкам 'Сегодня'/'Завтра'. Текущий рабочий день — одна строка
+-- business_day; смена дня — UPDATE этой строки, история не удаляется.
+-- Рабочий день длится до 03:00 следующих суток (слоты идут до 02:00).
+
+CREATE TABLE IF NOT EXISTS business_day (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    today DATE NOT NULL
+);
+
+INSERT INTO business_day (today)
+VALUES (((NOW() AT TIME ZONE 'Asia/Shanghai') - INTERVAL '3 hours')::DATE)
+ON CONFLICT (id) DO NOTHING;
+
+-- 'Сегодня' / 'Завтра' → дата относительно текущего рабочего дня
+CREATE OR REPLACE FUNCTION label_date(label TEXT) RETURNS DATE
+LANGUAGE sql STABLE AS $$
+    SELECT today + CASE WHEN label = 'Завтра' THEN 1 ELSE 0 END FROM business_day
+$$;
+
+-- bookings
+ALTER TABLE bookings ADD COLUMN IF NOT EXISTS slot_date DATE;
+UPDATE bookings SET slot_date = label_date(day) WHERE slot_date IS NULL;
+ALTER TABLE bookings ALTER COLUMN slot_date SET NOT NULL;
+ALTER TABLE bookings DROP CONSTRAINT IF EXISTS bookings_pkey;
+DROP INDEX IF EXISTS bookings_uq_slot;
+ALTER TABLE bookings DROP COLUMN IF EXISTS day;
+ALTER TABLE bookings ADD PRIMARY KEY (group_key, slot_date, time_slot, user_id);
+CREATE UNIQUE INDEX IF NOT EXISTS bookings_uq_slot
+    ON bookings (group_key, slot_date, time_slot);
+CREATE INDEX IF NOT EXISTS bookings_slot_date ON bookings (slot_date);
+
+-- group_time_slot_statuses
+ALTER TABLE group_time_slot_statuses ADD COLUMN IF NOT EXISTS slot_date DATE;
+UPDATE group_time_slot_statuses SET slot_date = label_date(day) WHERE slot_date IS NULL;
+ALTER TABLE group_time_slot_statuses ALTER COLUMN slot_date SET NOT NULL;
+ALTER TABLE group_time_slot_statuses DROP CONSTRAINT IF EXISTS group_time_slot_statuses_pkey;
+ALTER TABLE group_time_slot_statuses DROP COLUMN IF EXISTS day;
+ALTER TABLE group_time_slot_statuses ADD PRIMARY KEY (group_key, slot_date, time_slot);
+CREATE INDEX IF NOT EXISTS group_time_slot_statuses_slot_date
+    ON group_time_slot_statuses (slot_date);
+
+-- Текущее окно (сегодня + завтра) с вычисляемой меткой day
+CREATE OR REPLACE VIEW bookings_current AS
+SELECT b.*,
+       CASE WHEN b.slot_date = d.today THEN 'Сегодня' ELSE 'Завтра' END AS day
+FROM bookings b
+CROSS JOIN business_day d
+WHERE b.slot_date BETWEEN d.today AND d.today + 1;
+
+CREATE OR REPLACE VIEW slot_statuses_current AS
+SELECT s.*,
+       CASE WHEN s.slot_date = d.today THEN 'Сегодня' ELSE 'Завтра' END AS day
+FROM group_time_slot_statuses s
+CROSS JOIN business_day d
+WHERE s.slot_date BETWEEN d.today AND d.today + 1;
@@ -0,0 +1,67 @@
+-- migrations/0007_bookings_history.sql
+-- Архив закрытых броней, секционированный по месяцам slot_date.
+-- При смене дня прошедшие брони переносятся сюда одним оператором
+-- (DELETE ... RETURNING → INSERT), горячая таблица bookings держит
+-- только «Сегодня»/«Завтра». Старые месяцы отключаются DETACH PARTITION.
+
+CREATE TABLE IF NOT EXISTS bookings_history (
+    group_key TEXT NOT NULL,
+    slot_date DATE NOT NULL,
+    time_slot TEXT NOT NULL,
+    user_id BIGINT NOT NULL,
+    status TEXT NOT NULL,
+    status_code TEXT,
+    start_time TIMESTAMPTZ,
+    payment_method TEXT,
+    amount INTEGER,
+    emoji TEXT DEFAULT '',
+    archived_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (group_key, slot_date, time_slot, user_id)
+) PARTITION BY RANGE (slot_date);
+
+-- Страховка на случай, если секция месяца не создана
+CREATE TABLE IF NOT EXISTS bookings_history_default
+    PARTITION OF bookings_history DEFAULT;
+
+CREATE INDEX IF NOT EXISTS bookings_history_user_date
+    ON bookings_history (user_id, slot_date);
+
+-- Секция месяца, в который попадает d (bookings_history_YYYYMM)
+CREATE OR REPLACE FUNCTION ensure_bookings_history_partition(d DATE) RETURNS TEXT
+LANGUAGE plpgsql AS $$
+DECLARE
+    start_date DATE := date_trunc('month', d)::DATE;
+    part TEXT := 'bookings_history_' || to_char(start_date, 'YYYYMM');
+BEGIN
+    IF to_regclass(part) IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF bookings_history FOR VALUES FROM (%L) TO (%L)',
+            part, start_date, (start_date + INTERVAL '1 month')::DATE
+        );
+    END IF;
+    RETURN part;
+END
+$$;
+
+-- Перенос уже накопившихся прошедших броней
+SELECT ensure_bookings_history_partition(m)
+FROM (
+    SELECT DISTINCT date_trunc('month', slot_date)::DATE AS m
+    FROM bookings
+    WHERE slot_date < (SELECT today FROM business_day)
+) months;
+
+WITH moved AS (
+    DELETE FROM bookings
+    WHERE slot_date < (SELECT today FROM business_day)
+    RETURNING group_key, slot_date, time_slot, user_id, status, status_code,
+              start_time, payment_method, amount, emoji
+)
+INSERT INTO bookings_history
+    (group_key, slot_date, time_slot, user_id, status, status_code,
+     start_time, payment_method, amount, emoji)
+SELECT * FROM moved
+ON CONFLICT DO NOTHING;
+
+DELETE FROM group_time_slot_statuses
+WHERE slot_date < (SELECT today FROM business_day);
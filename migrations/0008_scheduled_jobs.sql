@@ -0,0 +1,12 @@
+-- migrations/0008_scheduled_jobs.sql
+-- Состояние периодических задач (utils/job_scheduler.py): время следующего
+-- запуска переживает перезапуск бота, пропущенный запуск догоняется.
+
+CREATE TABLE IF NOT EXISTS scheduled_jobs (
+    name TEXT PRIMARY KEY,
+    next_run_at TIMESTAMPTZ NOT NULL,
+    last_run_at TIMESTAMPTZ,
+    last_status TEXT,
+    last_error TEXT,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
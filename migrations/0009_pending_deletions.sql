@@ -0,0 +1,10 @@
+-- migrations/0009_pending_deletions.sql
+-- Отложенные удаления сообщений (utils/deletion_queue.py): очередь
+-- переживает перезапуск бота.
+
+CREATE TABLE IF NOT EXISTS pending_deletions (
+    chat_id BIGINT NOT NULL,
+    message_id BIGINT NOT NULL,
+    delete_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (chat_id, message_id)
+);
@@ -0,0 +1,12 @@
+-- migrations/0010_fsm_storage.sql
+-- Состояния FSM (utils/pg_storage.py): незавершённые сценарии брони,
+-- оплаты, /money и /clean переживают перезапуск бота.
+
+CREATE TABLE IF NOT EXISTS fsm_storage (
+    key TEXT PRIMARY KEY,
+    state TEXT,
+    data JSONB NOT NULL DEFAULT '{}',
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS fsm_storage_updated_at ON fsm_storage (updated_at);
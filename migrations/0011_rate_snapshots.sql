@@ -0,0 +1,9 @@
+-- migrations/0011_rate_snapshots.sql
+-- Последние удачные курсы валют (utils/rates.py): после рестарта и при
+-- недоступности API конвертация работает по сохранённым курсам.
+
+CREATE TABLE IF NOT EXISTS rate_snapshots (
+    base TEXT PRIMARY KEY,
+    rates JSONB NOT NULL,
+    fetched_at TIMESTAMPTZ NOT NULL
+);
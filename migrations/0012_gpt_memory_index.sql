@@ -0,0 +1,6 @@
+-- migrations/0012_gpt_memory_index.sql
+-- Последние N реплик пользователя (utils/gpt_memory.py) — диапазон по индексу
+-- с LIMIT вместо чтения всей истории.
+
+CREATE INDEX IF NOT EXISTS gpt_memory_user_ts
+    ON gpt_memory (user_id, timestamp, id);
@@ -0,0 +1,13 @@
+-- migrations/0013_business_date.sql
+-- Календарный рабочий день: дата в Asia/Shanghai со сменой в 03:00.
+-- business_day.today сдвигается сменой дня, но не может уйти дальше
+-- current_business_date() — лишняя или повторная смена ничего не делает.
+
+CREATE OR REPLACE FUNCTION current_business_date() RETURNS DATE
+LANGUAGE sql STABLE AS $$
+    SELECT ((NOW() AT TIME ZONE 'Asia/Shanghai') - INTERVAL '3 hours')::DATE
+$$;
+
+-- Счётчик, уже убежавший вперёд (ручной сброс в тот же день), — к календарю
+UPDATE business_day SET today = current_business_date()
+WHERE today > current_business_date();
@@ -0,0 +1,55 @@
+# tests/db_access/test_booking_history.py
+
+from datetime import date
+
+import pytest
+
+from db_access.booking_history import BookingHistory
+
+
+class FakeConn:
+    def __init__(self, partitions):
+        self.partitions = partitions
+        self.executed = []
+
+    async def fetch(self, query, *args):
+        return [{"relname": p} for p in self.partitions]
+
+    async def execute(self, query, *args):
+        self.executed.append(query)
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def acquire(self):
+        conn = self.conn
+
+        class Ctx:
+            async def __aenter__(self):
+                return conn
+
+            async def __aexit__(self, *exc):
+                return False
+        return Ctx()
+
+
+@pytest.mark.asyncio
+async def test_detach_before_only_whole_months(monkeypatch):
+    """Отключаются только месяцы, закончившиеся до cutoff; DEFAULT-секция не трогается."""
+    import db
+    monkeypatch.setattr(db, "db_pool", None)
+    conn = FakeConn([
+        "bookings_history_default",
+        "bookings_history_202411",
+        "bookings_history_202412",
+        "bookings_history_202501",
+    ])
+    detached = await BookingHistory(FakePool(conn)).detach_before(date(2025, 1, 1))
+
+    assert detached == ["bookings_history_202411", "bookings_history_202412"]
+    assert conn.executed == [
+        'ALTER TABLE bookings_history DETACH PARTITION "bookings_history_202411"',
+        'ALTER TABLE bookings_history DETACH PARTITION "bookings_history_202412"',
+    ]
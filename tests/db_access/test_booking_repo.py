@@ -0,0 +1,93 @@
+# tests/db_access/test_booking_repo.py
+
+import pytest
+
+import db
+from db_access.booking_repo import BookingRepo
+
+
+class FakeTransaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def __aenter__(self):
+        self.conn.in_transaction = True
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.conn.in_transaction = False
+        return False
+
+
+class FakeConn:
+    """Запоминает запросы; fetchrow возвращает заранее заданную строку."""
+    def __init__(self, row=None):
+        self.row = row
+        self.queries = []
+        self.in_transaction = False
+
+    async def fetchrow(self, query, *args):
+        self.queries.append((query, args, self.in_transaction))
+        return self.row
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def acquire(self):
+        return self.conn
+
+
+@pytest.fixture
+def conn(monkeypatch):
+    c = FakeConn(row={"group_key": "G1", "day": "Сегодня", "time_slot": "12:00",
+                      "user_id": 7, "status": "booked", "status_code": None, "emoji": "🐱"})
+    monkeypatch.setattr(db, "db_pool", FakePool(c))
+    return c
+
+
+@pytest.mark.asyncio
+async def test_book_slot_is_single_statement(conn):
+    """Бронь и статус пишутся одним CTE-оператором, строка возвращается как dict."""
+    row = await BookingRepo(None).book_slot("G1", "Сегодня", "12:00", 7, "🐱")
+    assert row["user_id"] == 7 and row["emoji"] == "🐱"
+    assert len(conn.queries) == 1
+    query = conn.queries[0][0]
+    assert "INSERT INTO bookings" in query
+    assert "INSERT INTO group_time_slot_statuses" in query
+
+
+@pytest.mark.asyncio
+async def test_cancel_and_update_single_statement(conn):
+    repo = BookingRepo(None)
+    await repo.cancel_booking("G1", "Сегодня", "12:00")
+    await repo.update_status("G1", "Сегодня", "12:00", "1", "✅", 7)
+    assert len(conn.queries) == 2
+    cancel_q, update_q = conn.queries[0][0], conn.queries[1][0]
+    assert "DELETE FROM bookings" in cancel_q and "DELETE FROM group_time_slot_statuses" in cancel_q
+    assert "UPDATE bookings" in update_q and "INSERT INTO group_time_slot_statuses" in update_q
+
+
+@pytest.mark.asyncio
+async def test_unit_of_work_shares_transaction(conn):
+    repo = BookingRepo(None)
+    async with repo.unit_of_work() as tx:
+        await repo.cancel_booking("G1", "Сегодня", "12:00", conn=tx)
+        await repo.book_slot("G1", "Сегодня", "13:00", 7, "🐱", conn=tx)
+    assert [in_tx for _, _, in_tx in conn.queries] == [True, True]
+
+
+@pytest.mark.asyncio
+async def test_missing_row_returns_none(conn):
+    conn.row = None
+    assert await BookingRepo(None).cancel_booking("G1", "Сегодня", "12:00") is None
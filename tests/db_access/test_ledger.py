@@ -0,0 +1,113 @@
+# tests/db_access/test_ledger.py
+
+import datetime
+
+import pytest
+
+import db
+from db_access.finance_repo import FinanceRepo
+from db_access.ledger import Ledger
+
+
+class FakeConn:
+    def __init__(self):
+        self.calls = []
+
+    async def fetch(self, query, *args):
+        self.calls.append(args)
+        return [{"account": a, "balance": v} for a, v in zip(args[0], args[1])
+                if not a.startswith("equity:")]
+
+
+@pytest.mark.asyncio
+async def test_post_is_one_sorted_batch_without_zero_legs():
+    conn = FakeConn()
+    balances = await Ledger().post(
+        "booking_payment",
+        {"group:G1:salary": 700, "group:G1:cash": 0, "equity:booking_payment": -700},
+        ref="G1|Сегодня|12:00", conn=conn,
+    )
+    assert len(conn.calls) == 1
+    accounts, amounts, kind, ref = conn.calls[0]
+    assert accounts == ["equity:booking_payment", "group:G1:salary"]
+    assert amounts == [-700, 700]
+    assert balances == {"group:G1:salary": 700}
+
+
+@pytest.mark.asyncio
+async def test_unbalanced_post_is_rejected():
+    conn = FakeConn()
+    with pytest.raises(ValueError):
+        await Ledger().post("x", {"user:1": 100, "equity:x": -90}, conn=conn)
+    assert conn.calls == []
+
+
+class FakeGroupConn(FakeConn):
+    """group_financial_data в памяти + транзакции-заглушки."""
+    def __init__(self, salary, cash):
+        super().__init__()
+        self.row = {"salary": salary, "cash": cash}
+
+    async def fetchrow(self, query, *args):
+        if "FOR UPDATE" in query:
+            return dict(self.row)
+        gk, salary_delta, cash_delta = args
+        self.row["salary"] += salary_delta
+        self.row["cash"] += cash_delta
+        return {"group_key": gk, **self.row}
+
+    def transaction(self):
+        class Tx:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+        return Tx()
+
+
+@pytest.mark.asyncio
+async def test_set_group_totals_posts_difference_as_entry():
+    """Обнуление зарплаты — проводка на -текущее значение, а не UPDATE мимо журнала."""
+    conn = FakeGroupConn(salary=2100, cash=9000)
+    row = await FinanceRepo().set_group_totals("G1", salary=0, kind="clean", conn=conn)
+
+    assert row["salary"] == 0 and row["cash"] == 9000
+    accounts, amounts, kind, _ = conn.calls[0]
+    assert dict(zip(accounts, amounts)) == {"equity:clean": 2100, "group:G1:salary": -2100}
+    assert kind == "clean"
+
+
+class FakePool:
+    def __init__(self, rows):
+        self.rows = rows
+        self.args = None
+
+    def acquire(self):
+        pool = self
+
+        class Ctx:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            async def fetch(self, query, *args):
+                pool.args = args
+                return pool.rows
+        return Ctx()
+
+
+@pytest.mark.asyncio
+async def test_daily_totals_reads_chart_data_from_the_journal(monkeypatch):
+    """Графики andry строятся по проводкам счёта чата, а не по отдельной таблице."""
+    monkeypatch.setattr(db, "db_pool", None)
+    day = datetime.date(2025, 1, 10)
+    pool = FakePool([{"d": day, "plus": 500, "minus": 200}])
+    start = datetime.datetime(2025, 1, 3, tzinfo=datetime.timezone.utc)
+    end = datetime.datetime(2025, 1, 10, tzinfo=datetime.timezone.utc)
+
+    rows = await Ledger(pool).daily_totals("chat:-100", start, end, kind="andry")
+    assert rows == [{"d": day, "plus": 500, "minus": 200}]
+    assert pool.args == ("chat:-100", start, end, "andry")
@@ -0,0 +1,128 @@
+# tests/db_access/test_migrator.py
+
+import pytest
+import asyncpg
+
+from db_access import migrator
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#                        Вспомогательные заглушки
+# ─────────────────────────────────────────────────────────────────────────────
+
+class FakeTransaction:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+class FakeConn:
+    """
+    Эмулирует schema_version: хранит применённые версии,
+    записывает все выполненные SQL для проверок.
+    """
+    def __init__(self, applied=None, has_table=True):
+        self.applied = list(applied or [])
+        self.has_table = has_table
+        self.executed = []
+
+    async def fetchval(self, query, *args):
+        if not self.has_table:
+            raise asyncpg.UndefinedTableError("relation \"schema_version\" does not exist")
+        return max(self.applied) if self.applied else None
+
+    async def execute(self, query, *args):
+        self.executed.append(query)
+        if "CREATE TABLE IF NOT EXISTS schema_version" in query:
+            self.has_table = True
+        if query.startswith("INSERT INTO schema_version"):
+            self.applied.append(args[0])
+
+    def transaction(self):
+        return FakeTransaction()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def acquire(self):
+        return self.conn
+
+
+@pytest.fixture
+def migrations_dir(tmp_path, monkeypatch):
+    (tmp_path / "0001_initial.sql").write_text("CREATE TABLE a (id INT);")
+    (tmp_path / "0002_second.sql").write_text("CREATE TABLE b (id INT);")
+    (tmp_path / "README.txt").write_text("не миграция")
+    monkeypatch.setattr(migrator, "MIGRATIONS_DIR", tmp_path)
+    return tmp_path
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#                                 Тесты
+# ─────────────────────────────────────────────────────────────────────────────
+
+def test_load_migrations_sorted(migrations_dir):
+    migs = migrator.load_migrations()
+    assert [m.version for m in migs] == [1, 2]
+    assert [m.name for m in migs] == ["initial", "second"]
+
+
+def test_load_migrations_duplicate_version(migrations_dir):
+    (migrations_dir / "0002_other.sql").write_text("SELECT 1;")
+    with pytest.raises(RuntimeError):
+        migrator.load_migrations()
+
+
+def test_repo_migrations_are_consistent():
+    """Реальный каталог migrations/ читается без ошибок и начинается с версии 1."""
+    migs = migrator.load_migrations(migrator.MIGRATIONS_DIR)
+    assert migs and migs[0].version == 1
+    assert [m.version for m in migs] == list(range(1, len(migs) + 1))
+
+
+@pytest.mark.asyncio
+async def test_migrate_fast_path_runs_no_ddl(migrations_dir):
+    conn = FakeConn(applied=[1, 2])
+    version = await migrator.migrate(FakePool(conn))
+    assert version == 2
+    assert conn.executed == []
+
+
+@pytest.mark.asyncio
+async def test_migrate_fresh_database(migrations_dir):
+    conn = FakeConn(has_table=False)
+    version = await migrator.migrate(FakePool(conn))
+    assert version == 2
+    assert conn.applied == [1, 2]
+    assert "CREATE TABLE a (id INT);" in conn.executed
+    assert "CREATE TABLE b (id INT);" in conn.executed
+    # lock берётся и обязательно отпускается
+    assert any("pg_advisory_lock" in q for q in conn.executed)
+    assert any("pg_advisory_unlock" in q for q in conn.executed)
+
+
+@pytest.mark.asyncio
+async def test_migrate_applies_only_pending(migrations_dir):
+    conn = FakeConn(applied=[1])
+    version = await migrator.migrate(FakePool(conn))
+    assert version == 2
+    assert "CREATE TABLE a (id INT);" not in conn.executed
+    assert "CREATE TABLE b (id INT);" in conn.executed
+
+
+@pytest.mark.asyncio
+async def test_migrate_respects_target(migrations_dir):
+    conn = FakeConn(has_table=False)
+    version = await migrator.migrate(FakePool(conn), target=1)
+    assert version == 1
+    assert conn.applied == [1]
@@ -0,0 +1,105 @@
+# tests/handlers/booking/test_payment_flow.py
+
+import asyncio
+import pytest
+
+import db
+import handlers.booking.payment_flow as payment_flow_module
+from constants.booking_const import groups_data
+
+
+class FakeConn:
+    """
+    Эмулирует PostgreSQL для group_financial_data: каждый оператор атомарен,
+    но между операторами управление отдаётся другим задачам (как при сетевом round trip).
+    """
+    def __init__(self, tables, ledger):
+        self.tables = tables
+        self.ledger = ledger
+
+    async def fetchrow(self, query, *args):
+        await asyncio.sleep(0)
+        if "INSERT INTO group_financial_data" in query:
+            gk, salary_delta, cash_delta = args
+            row = self.tables.setdefault(gk, {"salary": 0, "cash": 0})
+            row["salary"] += salary_delta
+            row["cash"] += cash_delta
+            return {"group_key": gk, **row}
+        raise AssertionError(f"Неожиданный запрос: {query}")
+
+    async def fetch(self, query, *args):
+        await asyncio.sleep(0)
+        assert "INSERT INTO ledger_entries" in query
+        accounts, amounts, kind, ref = args
+        self.ledger.extend(zip(accounts, amounts))
+        return []
+
+    async def execute(self, query, *args):
+        await asyncio.sleep(0)
+
+    def transaction(self):
+        class Tx:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+        return Tx()
+
+
+class FakePool:
+    def __init__(self):
+        self.tables = {}
+        self.ledger = []
+
+    def acquire(self):
+        pool = self
+
+        class Ctx:
+            async def __aenter__(self):
+                await asyncio.sleep(0)
+                return FakeConn(pool.tables, pool.ledger)
+
+            async def __aexit__(self, *exc):
+                return False
+        return Ctx()
+
+
+@pytest.fixture
+def payment_env(monkeypatch):
+    original = groups_data.copy()
+    groups_data.clear()
+    groups_data["G1"] = {"chat_id": -100, "salary_option": 1, "salary": 0, "cash": 0}
+    pool = FakePool()
+    monkeypatch.setattr(db, "db_pool", pool)
+
+    async def noop(*args, **kwargs):
+        return None
+    monkeypatch.setattr(payment_flow_module, "update_user_financial_info", noop)
+    monkeypatch.setattr(payment_flow_module, "update_group_message", noop)
+    monkeypatch.setattr(payment_flow_module, "send_financial_report", noop)
+    yield pool
+    groups_data.clear()
+    groups_data.update(original)
+
+
+@pytest.mark.asyncio
+async def test_parallel_payments_do_not_lose_updates(payment_env):
+    """20 одновременных оплат наличными: ни одно начисление не потеряно ни в БД, ни в памяти."""
+    n = 20
+    await asyncio.gather(*[
+        payment_flow_module.update_booking_payment(
+            1000 + i, "G1", "Сегодня", "12:00", "cash", 3000, "0", None, "ru"
+        )
+        for i in range(n)
+    ])
+
+    # '0' → '✅' → 700 по salary_option 1
+    assert payment_env.tables["G1"] == {"salary": 700 * n, "cash": 3000 * n}
+    assert groups_data["G1"]["salary"] == payment_env.tables["G1"]["salary"]
+    assert groups_data["G1"]["cash"] == payment_env.tables["G1"]["cash"]
+
+    # каждая оплата проведена в журнале, и журнал сходится с таблицей
+    salary_legs = [a for acc, a in payment_env.ledger if acc == "group:G1:salary"]
+    assert len(salary_legs) == n and sum(salary_legs) == 700 * n
+    assert sum(a for _, a in payment_env.ledger) == 0
@@ -0,0 +1,155 @@
+# tests/handlers/booking/test_reporting.py
+
+import asyncio
+
+import pytest
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import EditMessageText
+
+import db
+import handlers.booking.reporting as reporting_module
+from constants.booking_const import groups_data
+
+
+class FakeBot:
+    """Считает вызовы Telegram API; edit может падать заданной ошибкой."""
+    def __init__(self):
+        self.sent = []
+        self.edited = []
+        self.deleted = []
+        self.edit_error = None
+        self._next_id = 500
+
+    async def send_message(self, chat_id, text=None, **kwargs):
+        self._next_id += 1
+        self.sent.append((chat_id, text))
+
+        class Sent:
+            message_id = self._next_id
+        return Sent()
+
+    async def edit_message_text(self, text=None, chat_id=None, message_id=None, **kwargs):
+        if self.edit_error:
+            raise TelegramBadRequest(
+                method=EditMessageText(text=text, chat_id=chat_id, message_id=message_id),
+                message=self.edit_error,
+            )
+        self.edited.append((chat_id, message_id, text))
+
+    async def delete_message(self, chat_id, message_id):
+        self.deleted.append(message_id)
+
+
+@pytest.fixture(autouse=True)
+def board_group(monkeypatch):
+    """Отдельная группа G1, без БД и с коротким окном склейки."""
+    original = groups_data.copy()
+    groups_data.clear()
+    groups_data["G1"] = {
+        "chat_id": -100,
+        "salary": 0,
+        "cash": 0,
+        "time_slot_statuses": {},
+        "slot_bookers": {},
+        "slot_emojis": {},
+        "message_id": None,
+    }
+    monkeypatch.setattr(db, "db_pool", None)
+    monkeypatch.setattr(reporting_module, "BOARD_DEBOUNCE", 0.01)
+    reporting_module._board_rendered.clear()
+    reporting_module._board_dirty.clear()
+    yield
+    groups_data.clear()
+    groups_data.update(original)
+
+
+@pytest.mark.asyncio
+async def test_burst_is_coalesced_into_one_send():
+    bot = FakeBot()
+    for _ in range(5):
+        await reporting_module.update_group_message(bot, "G1")
+    await reporting_module.drain_group_messages()
+
+    assert len(bot.sent) == 1
+    assert bot.edited == []
+    assert groups_data["G1"]["message_id"] == 501
+
+
+@pytest.mark.asyncio
+async def test_unchanged_board_is_skipped_and_changes_are_edited():
+    bot = FakeBot()
+    await reporting_module.update_group_message(bot, "G1")
+    await reporting_module.drain_group_messages()
+
+    # ничего не поменялось — ни одного запроса
+    await reporting_module.update_group_message(bot, "G1")
+    await reporting_module.drain_group_messages()
+    assert len(bot.sent) == 1 and bot.edited == []
+
+    # изменился статус — редактируем то же сообщение
+    groups_data["G1"]["time_slot_statuses"][("Сегодня", "12:00")] = "booked"
+    await reporting_module.update_group_message(bot, "G1")
+    await reporting_module.drain_group_messages()
+    assert len(bot.sent) == 1
+    assert [m_id for _, m_id, _ in bot.edited] == [501]
+
+
+@pytest.mark.asyncio
+async def test_missing_message_falls_back_to_send():
+    bot = FakeBot()
+    groups_data["G1"]["message_id"] = 42
+    bot.edit_error = "Bad Request: message to edit not found"
+
+    await reporting_module.update_group_message(bot, "G1")
+    await reporting_module.drain_group_messages()
+
+    assert len(bot.sent) == 1
+    assert groups_data["G1"]["message_id"] == 501
+
+
+@pytest.mark.asyncio
+async def test_not_modified_is_not_an_error():
+    bot = FakeBot()
+    groups_data["G1"]["message_id"] = 42
+    bot.edit_error = "Bad Request: message is not modified"
+
+    await reporting_module.update_group_message(bot, "G1")
+    await reporting_module.drain_group_messages()
+
+    assert bot.sent == []
+    assert groups_data["G1"]["message_id"] == 42
+
+
+class SlowBot(FakeBot):
+    """edit_message_text занимает время; считает одновременные вызовы."""
+    def __init__(self):
+        super().__init__()
+        self.active = 0
+        self.peak = 0
+
+    async def edit_message_text(self, text=None, **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.02)
+        self.active -= 1
+        await super().edit_message_text(text=text, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_change_during_render_is_drawn_after_it():
+    """Изменение во время отрисовки не запускает параллельный edit; табло в итоге актуально."""
+    bot = SlowBot()
+    groups_data["G1"]["message_id"] = 42
+
+    await reporting_module.update_group_message(bot, "G1")
+    while not bot.active:           # ждём, пока первая отрисовка начнётся
+        await asyncio.sleep(0.001)
+    groups_data["G1"]["time_slot_statuses"][("Сегодня", "12:00")] = "booked"
+    await reporting_module.update_group_message(bot, "G1")
+    await reporting_module.drain_group_messages()
+
+    assert bot.peak == 1
+    assert len(bot.edited) == 2
+    latest, _, _ = reporting_module._build_group_board("G1")
+    assert bot.edited[-1][2] == latest
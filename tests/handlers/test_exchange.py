@@ -0,0 +1,79 @@
+# tests/handlers/test_exchange.py
+
+import time
+
+import pytest
+
+import handlers.exchange as exchange
+from utils.rates import RateService
+
+
+@pytest.fixture
+def rates(monkeypatch):
+    svc = RateService()
+    # снимок свежий — сетевых запросов нет
+    svc._set_rates({"RUB": 90.0, "UAH": 40.0, "CNY": 7.0, "EUR": 0.9, "USD": 1.0, "USDT": 1.0},
+                   time.time())
+    monkeypatch.setattr(exchange, "rate_service", svc)
+    exchange._format_cache.clear()
+    return svc
+
+
+def test_parse_amounts():
+    assert exchange.parse_amounts("100 usd") == [(100.0, "USD")]
+    assert exchange.parse_amounts("100,5 USD") == [(100.5, "USD")]
+    assert exchange.parse_amounts("100 USD, 5000 RUB") == [(100.0, "USD"), (5000.0, "RUB")]
+    assert exchange.parse_amounts("100USD") is None
+    assert exchange.parse_amounts("abc USD") is None
+
+
+@pytest.mark.asyncio
+async def test_cross_rates_match_per_base_conversion(rates):
+    row = await exchange.get_all_rates("rub")
+    assert row["RUB"] == pytest.approx(1.0)
+    assert row["USD"] == pytest.approx(1 / 90)
+    assert row["CNY"] == pytest.approx(7 / 90)
+
+
+@pytest.mark.asyncio
+async def test_multi_amount_conversion_is_cached(rates):
+    text = await exchange.convert_many([(100.0, "USD"), (9000.0, "RUB")])
+    assert "💱 100.0 USD =" in text and "9000.0 RUB — Рубль" in text
+    assert "💱 9000.0 RUB =" in text and "100.0 USD — Доллар" in text
+    assert await exchange.convert_many([(100.0, "USD"), (9000.0, "RUB")]) is text
+
+    # новый снимок курсов сбрасывает кэш ответов
+    rates._set_rates({**rates.rates, "RUB": 100.0}, time.time() + 1)
+    assert "10000.0 RUB" in await exchange.convert_and_format(100, "usd")
+
+
+@pytest.mark.asyncio
+async def test_unknown_currency(rates):
+    assert "❌" in await exchange.convert_many([(1.0, "XYZ")])
+
+
+class FakeState:
+    async def clear(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_reply_respects_pair_limit_and_caption_size(rates, monkeypatch):
+    sent = []
+
+    async def fake_answer(message, text=None, **kwargs):
+        sent.append((text, kwargs))
+    monkeypatch.setattr(exchange, "safe_answer", fake_answer)
+
+    class Msg:
+        text = "; ".join(["1 USD"] * (exchange.MAX_PAIRS + 1))
+
+    await exchange.process_conversion_input(Msg(), FakeState())
+    assert "❌" in sent[-1][0]
+
+    # длинный ответ уходит текстом, а не подписью к фото
+    monkeypatch.setattr(exchange, "CAPTION_LIMIT", 10)
+    Msg.text = "100 USD"
+    await exchange.process_conversion_input(Msg(), FakeState())
+    text, kwargs = sent[-1]
+    assert "💱 100.0 USD =" in text and "photo" not in kwargs
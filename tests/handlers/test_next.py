@@ -0,0 +1,188 @@
+# tests/handlers/test_next.py
+
+import asyncio
+import datetime
+
+import pytest
+
+import db
+import handlers.next as next_module
+
+
+class FakeConn:
+    """Отдаёт строки GROUPING SETS так, как их вернул бы PostgreSQL."""
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    async def fetch(self, query, *args):
+        self.queries.append(query)
+        return self.rows
+
+
+def _row(grp, cnt, amount=0, payment_method=None, group_key=None, status=None,
+         user_id=None, username=None):
+    return {
+        "grp": grp, "cnt": cnt, "amount": amount, "payment_method": payment_method,
+        "group_key": group_key, "status": status, "user_id": user_id, "username": username,
+    }
+
+
+@pytest.mark.asyncio
+async def test_day_summary_from_single_grouped_query(monkeypatch):
+    """Отчёт дня собирается из одного запроса: без N+1 по пользователям."""
+    monkeypatch.setattr(next_module, "groups_data", {"G1": {"chat_id": -1, "salary_option": 1}})
+    conn = FakeConn([
+        _row("total", 3),
+        _row("method", 2, 6000, payment_method="cash"),
+        _row("method", 1, 2500, payment_method="beznal"),
+        _row("group_status", 3, group_key="G1", status="✅"),
+        _row("group_method", 2, 6000, group_key="G1", payment_method="cash"),
+        _row("group_method", 1, 2500, group_key="G1", payment_method="beznal"),
+        _row("group_status", 1, group_key="UNKNOWN", status="✅"),
+        _row("user", 2, user_id=10, username="anna"),
+        _row("user", 1, user_id=11, username=None),
+    ])
+
+    summary = await next_module.load_day_summary(conn)
+
+    assert len(conn.queries) == 1
+    assert "GROUPING SETS" in conn.queries[0]
+    assert summary["total"] == 3
+    assert summary["methods"] == {"cash": (2, 6000), "beznal": (1, 2500)}
+    # '✅' → 700 по salary_option 1
+    assert summary["groups"] == {"G1": {"salary_sum": 2100, "cash_sum": 6000}}
+    assert summary["users"] == [("anna", 2), ("User 11", 1)]
+
+
+class DayConn(FakeConn):
+    """Строка business_day; транзакция держит её блокировку до коммита."""
+    def __init__(self, today):
+        super().__init__([])
+        self.today = today
+        self.lock = asyncio.Lock()
+
+    async def fetchval(self, query, *args):
+        self.queries.append(query)
+        if "FOR UPDATE" in query:
+            await asyncio.sleep(0)   # даём параллельной смене дойти до проверки
+            return self.today if self.today < args[0] else None
+        return self.today
+
+    async def execute(self, query, *args):
+        self.queries.append(query)
+        if "UPDATE business_day" in query:
+            self.today += datetime.timedelta(days=1)
+
+    def transaction(self):
+        lock = self.lock
+
+        class Tx:
+            async def __aenter__(self):
+                await lock.acquire()
+
+            async def __aexit__(self, *exc):
+                lock.release()
+                return False
+        return Tx()
+
+
+class DayPool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def acquire(self):
+        conn = self.conn
+
+        class Ctx:
+            async def __aenter__(self):
+                return conn
+
+            async def __aexit__(self, *exc):
+                return False
+        return Ctx()
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append(chat_id)
+
+
+class FakeHistory:
+    async def archive_closed(self, conn=None):
+        return 0
+
+
+TODAY = datetime.date(2025, 1, 10)
+
+
+@pytest.fixture
+def day(monkeypatch):
+    monkeypatch.setattr(next_module, "groups_data", {})
+    monkeypatch.setattr(next_module, "booking_history", FakeHistory())
+
+    def make(today):
+        conn = DayConn(today)
+        monkeypatch.setattr(db, "db_pool", DayPool(conn))
+        return conn
+    return make
+
+
+@pytest.mark.asyncio
+async def test_next_core_is_noop_when_day_is_current(day):
+    """Повторная смена дня (сброс после авто-смены) не уводит business_day в будущее."""
+    conn = day(TODAY)
+    bot = FakeBot()
+
+    assert await next_module.do_next_core(bot, limit=TODAY) is False
+    assert conn.today == TODAY and bot.sent == []
+    assert not any("UPDATE business_day" in q for q in conn.queries)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_rollovers_close_the_day_once(day):
+    """Кнопка и планировщик одновременно: отчёт и сдвиг дня — ровно один раз."""
+    conn = day(TODAY - datetime.timedelta(days=1))
+    bot = FakeBot()
+
+    results = await asyncio.gather(
+        next_module.do_next_core(bot, limit=TODAY),
+        next_module.do_next_core(bot, limit=TODAY),
+    )
+    assert sorted(results) == [False, True]
+    assert conn.today == TODAY
+    assert len(bot.sent) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("behind", [0, 1, 3])
+async def test_advance_runs_exactly_the_missing_days(day, behind):
+    """Авто-смена закрывает ровно пропущенные дни — ни одного лишнего."""
+    conn = day(TODAY - datetime.timedelta(days=behind))
+
+    assert await next_module.advance_business_day(FakeBot(), limit=TODAY) == behind
+    assert conn.today == TODAY
+
+
+def test_business_date_changes_at_three_in_shanghai():
+    """03:00 Asia/Shanghai = 19:00 UTC — тот же момент, что у DailyAt(3, 0)."""
+    utc = datetime.timezone.utc
+    assert next_module.business_date(datetime.datetime(2025, 1, 9, 18, 59, tzinfo=utc)) == TODAY - datetime.timedelta(days=1)
+    assert next_module.business_date(datetime.datetime(2025, 1, 9, 19, 0, tzinfo=utc)) == TODAY
+
+
+@pytest.mark.asyncio
+async def test_rollover_job_fails_when_day_stays_behind(day, monkeypatch):
+    """Срок наступил, а день не закрылся — ошибка, чтобы планировщик повторил скоро."""
+    day(TODAY - datetime.timedelta(days=1))
+    monkeypatch.setattr(next_module, "business_date", lambda: TODAY)
+
+    async def stuck(bot, limit=None):
+        return False
+    monkeypatch.setattr(next_module, "do_next_core", stuck)
+
+    with pytest.raises(RuntimeError):
+        await next_module.rollover_job(FakeBot())
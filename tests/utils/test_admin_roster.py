@@ -0,0 +1,63 @@
+# tests/utils/test_admin_roster.py
+
+import pytest
+
+from utils.admin_roster import AdminRoster
+
+
+class Member:
+    def __init__(self, user_id, status="administrator"):
+        class U:
+            id = user_id
+        self.user = U()
+        self.status = status
+
+
+class FakeBot:
+    def __init__(self, admins):
+        self.admins = admins
+        self.admin_calls = 0
+        self.member_calls = 0
+
+    async def get_chat_administrators(self, chat_id):
+        self.admin_calls += 1
+        return [Member(uid) for uid in self.admins]
+
+    async def get_chat_member(self, chat_id, user_id):
+        self.member_calls += 1
+        return Member(user_id, "administrator" if user_id in self.admins else "member")
+
+
+@pytest.mark.asyncio
+async def test_roster_is_loaded_once_and_updated_by_events():
+    roster, bot = AdminRoster(), FakeBot({1, 2})
+    assert await roster.is_admin(bot, -100, 1)
+    assert not await roster.is_admin(bot, -100, 3)
+    assert bot.admin_calls == 1 and bot.member_calls == 0
+
+    # chat_member: 3 стал админом, 1 разжалован
+    roster.update_member(-100, 3, "administrator")
+    roster.update_member(-100, 1, "member")
+    assert await roster.is_admin(bot, -100, 3)
+    assert not await roster.is_admin(bot, -100, 1)
+    assert bot.admin_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_roster_is_reloaded():
+    roster, bot = AdminRoster(ttl=0), FakeBot({1})
+    await roster.is_admin(bot, -100, 1)
+    await roster.is_admin(bot, -100, 1)
+    assert bot.admin_calls == 2
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_get_chat_member():
+    roster, bot = AdminRoster(), FakeBot({1})
+
+    async def broken(chat_id):
+        raise RuntimeError("network")
+    bot.get_chat_administrators = broken
+
+    assert await roster.is_admin(bot, -100, 1)
+    assert bot.member_calls == 1
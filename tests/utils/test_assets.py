@@ -0,0 +1,81 @@
+# tests/utils/test_assets.py
+
+import pytest
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import SendPhoto
+from aiogram.types.input_file import FSInputFile
+
+import db
+from utils.assets import AssetRegistry
+
+
+class FakeBot:
+    """Запоминает, что отправлялось в photo; загрузка возвращает новый file_id."""
+    id = 42
+
+    def __init__(self):
+        self.photos = []
+        self.reject = set()
+        self._uploads = 0
+
+    async def send_photo(self, chat_id, photo, **kwargs):
+        self.photos.append(photo)
+        if isinstance(photo, str) and photo in self.reject:
+            raise TelegramBadRequest(
+                method=SendPhoto(chat_id=chat_id, photo=photo),
+                message="Bad Request: wrong file identifier/HTTP URL specified",
+            )
+
+        class Size:
+            file_id = f"fid-{self._uploads}" if isinstance(photo, FSInputFile) else photo
+
+        if isinstance(photo, FSInputFile):
+            self._uploads += 1
+
+        class Sent:
+            message_id = 1
+            photo = [Size()]
+        return Sent()
+
+
+@pytest.fixture
+def image(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "db_pool", None)
+    path = tmp_path / "img.jpg"
+    path.write_bytes(b"\xff\xd8 fake jpeg")
+    return str(path)
+
+
+@pytest.mark.asyncio
+async def test_file_is_uploaded_once(image):
+    """Вторая отправка идёт по file_id, без загрузки файла."""
+    registry, bot = AssetRegistry(), FakeBot()
+    await registry.send_photo(bot, 1, image)
+    await registry.send_photo(bot, 2, image)
+
+    assert isinstance(bot.photos[0], FSInputFile)
+    assert bot.photos[1] == "fid-0"
+
+
+@pytest.mark.asyncio
+async def test_rejected_file_id_is_reuploaded(image):
+    registry, bot = AssetRegistry(), FakeBot()
+    await registry.send_photo(bot, 1, image)
+    bot.reject.add("fid-0")
+
+    await registry.send_photo(bot, 1, image)
+    assert isinstance(bot.photos[-1], FSInputFile)
+    assert registry.cached_file_id(bot.id, image) == "fid-1"
+
+
+@pytest.mark.asyncio
+async def test_changed_file_is_reuploaded(image):
+    registry, bot = AssetRegistry(), FakeBot()
+    await registry.send_photo(bot, 1, image)
+    with open(image, "ab") as f:
+        f.write(b" v2")
+    registry._digests.clear()
+
+    await registry.send_photo(bot, 1, image)
+    assert isinstance(bot.photos[-1], FSInputFile)
@@ -0,0 +1,38 @@
+# tests/utils/test_deletion_queue.py
+
+import asyncio
+
+import pytest
+
+import db
+from utils.deletion_queue import DeletionQueue
+
+
+class FakeBot:
+    def __init__(self):
+        self.calls = []
+
+    async def delete_messages(self, chat_id, message_ids):
+        self.calls.append((chat_id, list(message_ids)))
+        return True
+
+
+@pytest.mark.asyncio
+async def test_due_messages_are_deleted_in_batches(monkeypatch):
+    """Много сообщений с одним сроком — один вызов deleteMessages на каждые 100 в чате."""
+    monkeypatch.setattr(db, "db_pool", None)
+    queue, bot = DeletionQueue(), FakeBot()
+    for i in range(150):
+        queue.schedule(-1, i, 0.05)
+    queue.schedule(-2, 7, 0.05)
+    queue.schedule(-2, 8, 60)
+
+    await queue.start(bot)
+    await asyncio.sleep(0.2)
+    await queue.close()
+
+    assert sorted(len(ids) for chat, ids in bot.calls if chat == -1) == [50, 100]
+    assert (-2, [7]) in bot.calls
+    assert len(bot.calls) == 3
+    # сообщение с дальним сроком осталось в очереди
+    assert len(queue) == 1
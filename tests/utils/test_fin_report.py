@@ -0,0 +1,112 @@
+# tests/utils/test_fin_report.py
+
+import asyncio
+import pytest
+
+import db
+from utils import fin_report as fin_report_module
+from utils.fin_report import FinancialReport
+from constants.booking_const import groups_data
+
+
+class FakeConn:
+    def __init__(self, users):
+        self.users = users
+        self.fetch_calls = 0
+        self.pinned = None
+
+    async def fetch(self, query, *args):
+        self.fetch_calls += 1
+        if "FROM users" in query:
+            return [dict(u) for u in self.users]
+        return []
+
+    async def fetchrow(self, query, *args):
+        return self.pinned
+
+    async def execute(self, query, *args):
+        if "pinned_messages" in query:
+            self.pinned = {"chat_id": args[1], "message_id": args[2]}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def acquire(self):
+        return self.conn
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+        self.edited = []
+        self.pinned = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append(text)
+
+        class Sent:
+            message_id = 700 + len(self.sent)
+        return Sent()
+
+    async def edit_message_text(self, text=None, chat_id=None, message_id=None, **kwargs):
+        self.edited.append((message_id, text))
+
+    async def pin_chat_message(self, chat_id, message_id, **kwargs):
+        self.pinned.append(message_id)
+
+
+@pytest.fixture
+def conn(monkeypatch):
+    original = groups_data.copy()
+    groups_data.clear()
+    groups_data["G1"] = {"salary": 100, "cash": 500}
+    c = FakeConn([{"user_id": 1, "username": "alice", "balance": 10, "emojis": "🐱"}])
+    monkeypatch.setattr(db, "db_pool", FakePool(c))
+    monkeypatch.setattr(fin_report_module, "FIN_GROUP_IDS", [])
+    yield c
+    groups_data.clear()
+    groups_data.update(original)
+
+
+@pytest.mark.asyncio
+async def test_deltas_do_not_hit_db_and_edit_pinned_message(conn):
+    report = FinancialReport(interval=0)
+    bot = FakeBot()
+
+    await report.render(bot)
+    assert len(bot.sent) == 1 and bot.pinned == [701]
+    loads = conn.fetch_calls
+
+    report.user_delta(1, 15)
+    await report.render(bot)
+    assert conn.fetch_calls == loads          # балансы из памяти, без SELECT
+    assert len(bot.sent) == 1                 # новое сообщение не отправляется
+    assert bot.edited[-1][0] == 701
+    assert "alice: 25¥" in bot.edited[-1][1]
+
+    # ничего не изменилось — ни одного запроса к Telegram
+    await report.render(bot)
+    assert len(bot.edited) == 1
+
+
+@pytest.mark.asyncio
+async def test_requests_within_interval_are_coalesced(conn):
+    report = FinancialReport(interval=0.05)
+    bot = FakeBot()
+    await report.render(bot)
+
+    for amount in (1, 2, 3):
+        report.user_delta(1, amount)
+        report.request(bot)
+    await asyncio.sleep(0.1)
+
+    assert len(bot.edited) == 1
+    assert "alice: 16¥" in bot.edited[0][1]
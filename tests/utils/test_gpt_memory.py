@@ -0,0 +1,49 @@
+# tests/utils/test_gpt_memory.py
+
+import pytest
+
+import db
+from utils.gpt_memory import GptMemory
+
+
+class FakePool:
+    def __init__(self, rows):
+        self.rows = rows
+        self.fetches = []
+        self.executes = []
+
+    async def fetch(self, query, *args):
+        self.fetches.append(args)
+        return self.rows
+
+    async def execute(self, query, *args):
+        self.executes.append((query, args))
+
+
+@pytest.mark.asyncio
+async def test_cold_user_loaded_once_with_limit(monkeypatch):
+    # строки приходят от новых к старым (ORDER BY timestamp DESC LIMIT)
+    pool = FakePool([
+        {"message_type": "assistant_text", "content": "a1"},
+        {"message_type": "user_image_url", "content": "http://img"},
+        {"message_type": "user_text", "content": "q1"},
+    ])
+    monkeypatch.setattr(db, "db_pool", pool)
+    memory = GptMemory(size=4)
+
+    ctx = await memory.context(7)
+    assert ctx == [{"role": "user", "content": "q1"}, {"role": "assistant", "content": "a1"}]
+    assert pool.fetches == [(7, 4)]
+
+    # реплика — один INSERT, буфер обновлён без повторного SELECT
+    await memory.add(7, "u", [("user_text", "q2"), ("assistant_text", "a2")])
+    assert len(pool.executes) == 1 and "INSERT INTO gpt_memory" in pool.executes[0][0]
+    ctx = await memory.context(7)
+    assert [m["content"] for m in ctx] == ["a1", "q2", "a2"]
+    assert len(pool.fetches) == 1
+    memory._trim_task.cancel()
+
+    # обрезка — один DELETE на всех изменившихся пользователей
+    await memory.trim()
+    query, (users, size) = pool.executes[-1]
+    assert "DELETE FROM gpt_memory" in query and users == [7] and size == 4
@@ -0,0 +1,110 @@
+# tests/utils/test_job_scheduler.py
+
+import datetime
+
+import pytest
+
+import db
+from utils.job_scheduler import JobScheduler, DailyAt, JOB_RETRY_DELAY
+
+UTC = datetime.timezone.utc
+
+
+class FakeConn:
+    def __init__(self, due, locked=True):
+        self.due = due
+        self.locked = locked
+        self.updates = []
+        self.unlocked = False
+
+    async def fetchval(self, query, *args):
+        if "pg_try_advisory_lock" in query:
+            return self.locked
+        if "SELECT next_run_at" in query:
+            return self.due
+        raise AssertionError(query)
+
+    async def execute(self, query, *args):
+        if "pg_advisory_unlock" in query:
+            self.unlocked = True
+        elif "UPDATE scheduled_jobs" in query:
+            self.updates.append(args)
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def acquire(self):
+        conn = self.conn
+
+        class Ctx:
+            async def __aenter__(self):
+                return conn
+
+            async def __aexit__(self, *exc):
+                return False
+        return Ctx()
+
+
+def test_daily_at_next_run_in_slot_timezone():
+    """03:00 Asia/Shanghai = 19:00 UTC; после срока — следующие сутки."""
+    sched = DailyAt(3, 0)
+    before = datetime.datetime(2025, 1, 1, 18, 59, tzinfo=UTC)
+    after = datetime.datetime(2025, 1, 1, 19, 0, tzinfo=UTC)
+    assert sched.next_after(before) == datetime.datetime(2025, 1, 1, 19, 0, tzinfo=UTC)
+    assert sched.next_after(after) == datetime.datetime(2025, 1, 2, 19, 0, tzinfo=UTC)
+
+
+@pytest.mark.asyncio
+async def test_missed_run_is_caught_up_once(monkeypatch):
+    """Срок прошёл (бот был выключен) — задача выполняется, следующий срок в будущем."""
+    conn = FakeConn(due=datetime.datetime(2000, 1, 1, tzinfo=UTC))
+    monkeypatch.setattr(db, "db_pool", FakePool(conn))
+    calls = []
+
+    async def job(bot):
+        calls.append(bot)
+
+    sched = JobScheduler()
+    sched.add("rollover", job, DailyAt(3, 0))
+    assert await sched.run_job("BOT", "rollover") is True
+
+    assert calls == ["BOT"]
+    name, next_run, _, status, error = conn.updates[0]
+    assert next_run > datetime.datetime.now(UTC)
+    assert (status, error) == ("ok", None)
+    assert conn.unlocked
+
+
+@pytest.mark.asyncio
+async def test_job_locked_by_other_instance_is_skipped(monkeypatch):
+    conn = FakeConn(due=datetime.datetime(2000, 1, 1, tzinfo=UTC), locked=False)
+    monkeypatch.setattr(db, "db_pool", FakePool(conn))
+    calls = []
+
+    async def job(bot):
+        calls.append(bot)
+
+    sched = JobScheduler()
+    sched.add("rollover", job, DailyAt(3, 0))
+    assert await sched.run_job("BOT", "rollover") is False
+    assert calls == [] and conn.updates == []
+
+
+@pytest.mark.asyncio
+async def test_failed_daily_job_is_retried_soon(monkeypatch):
+    """Упавшая ежедневная задача повторяется через JOB_RETRY_DELAY, а не через сутки."""
+    conn = FakeConn(due=datetime.datetime(2000, 1, 1, tzinfo=UTC))
+    monkeypatch.setattr(db, "db_pool", FakePool(conn))
+
+    async def job(bot):
+        raise RuntimeError("день не закрыт")
+
+    sched = JobScheduler()
+    sched.add("rollover", job, DailyAt(3, 0))
+    assert await sched.run_job("BOT", "rollover") is True
+
+    _, next_run, finished, status, error = conn.updates[0]
+    assert (status, error) == ("error", "день не закрыт")
+    assert next_run == finished + datetime.timedelta(seconds=JOB_RETRY_DELAY)
@@ -0,0 +1,52 @@
+# tests/utils/test_lanes.py
+
+import asyncio
+
+import pytest
+
+from utils.lanes import Lane, LaneMiddleware
+
+
+@pytest.mark.asyncio
+async def test_saturated_low_lane_defers_then_sheds():
+    """Сверх limit — откладывается (воркер не ждёт), сверх queue_limit — отбрасывается."""
+    lane = Lane("ai", limit=1, queue_limit=1)
+    mw = LaneMiddleware(lane)
+    release = asyncio.Event()
+    done = []
+
+    async def slow(event, data):
+        await release.wait()
+        done.append(event)
+        return "ok"
+
+    first = asyncio.create_task(mw(slow, "e1", {}))
+    await asyncio.sleep(0)
+    assert lane.busy
+
+    # второй — отложен: middleware возвращается сразу
+    assert await asyncio.wait_for(mw(slow, "e2", {}), 0.1) is None
+    # третий — отброшен
+    assert await mw(slow, "e3", {}) is None
+
+    release.set()
+    assert await first == "ok"
+    await asyncio.sleep(0.01)
+    assert done == ["e1", "e2"]
+    snap = lane.snapshot()
+    assert (snap["completed"], snap["deferred"], snap["dropped"]) == (2, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_critical_lane_waits_instead_of_dropping():
+    lane = Lane("critical", limit=1)
+    mw = LaneMiddleware(lane)
+    order = []
+
+    async def handler(event, data):
+        await asyncio.sleep(0.01)
+        order.append(event)
+
+    await asyncio.gather(*(mw(handler, i, {}) for i in range(3)))
+    assert order == [0, 1, 2]
+    assert lane.dropped == 0 and lane.max_waiting >= 2
@@ -0,0 +1,18 @@
+# tests/utils/test_metrics.py
+
+from utils import metrics
+from utils.lanes import AI
+
+
+def test_summary_includes_dropped_work_and_openai():
+    """Сводка /stats показывает отброшенные апдейты полос и метрики моделей."""
+    data = metrics.collect()
+    data["lanes"]["ai"] = dict(AI.snapshot(), dropped=7, pending=2)
+    data["openai"] = {"gpt-4o": {
+        "calls": 2, "errors": 1, "retries": 3, "latency_total": 3.0, "latency_max": 2.5,
+        "prompt_tokens": 10, "completion_tokens": 20,
+    }}
+
+    text = metrics.format_text(data)
+    assert "ai: " in text and "отброшено 7" in text
+    assert "gpt-4o: вызовов 2, ошибок 1, повторов 3, ср. 1.5с" in text
@@ -0,0 +1,53 @@
+# tests/utils/test_middlewares.py
+
+import pytest
+
+from aiogram.types import CallbackQuery, User
+
+import utils.middlewares as middlewares
+from utils.middlewares import IgnoreSelfMiddleware, UserContextMiddleware
+
+
+class FakeBot:
+    id = 1000
+
+
+def make_cb(user_id: int) -> CallbackQuery:
+    return CallbackQuery(
+        id="1",
+        from_user=User(id=user_id, is_bot=user_id == FakeBot.id, first_name="X"),
+        chat_instance="ci",
+        data="x",
+    )
+
+
+@pytest.mark.asyncio
+async def test_self_callbacks_are_dropped_without_api_calls():
+    calls = []
+
+    async def handler(event, data):
+        calls.append(event.from_user.id)
+        return "handled"
+
+    mw = IgnoreSelfMiddleware()
+    assert await mw(handler, make_cb(1000), {"bot": FakeBot()}) is None
+    assert await mw(handler, make_cb(5), {"bot": FakeBot()}) == "handled"
+    assert calls == [5]
+
+
+@pytest.mark.asyncio
+async def test_user_ctx_injected_even_when_lookup_fails(monkeypatch):
+    """Ошибка БД не лишает хендлер аргумента user_ctx — подставляется контекст по умолчанию."""
+    async def broken(user_id):
+        raise RuntimeError("db down")
+    monkeypatch.setattr(middlewares.user_contexts, "get", broken)
+
+    seen = {}
+
+    async def handler(event, data):
+        seen.update(data)
+
+    cb = make_cb(5)
+    await UserContextMiddleware()(handler, cb, {"event_from_user": cb.from_user})
+    ctx = seen["user_ctx"]
+    assert ctx.user_id == 5 and not ctx.is_admin
@@ -0,0 +1,170 @@
+# tests/utils/test_openai_client.py
+
+import asyncio
+
+import pytest
+
+import utils.openai_client as oc
+from utils.openai_client import OpenAIClient, OpenAIError
+
+
+class FakeResponse:
+    def __init__(self, status, payload=None, headers=None):
+        self.status = status
+        self.payload = payload or {}
+        self.headers = headers or {}
+
+    async def json(self):
+        return self.payload
+
+    async def read(self):
+        return b"audio"
+
+    async def text(self):
+        return "error"
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """Отдаёт заранее заданные ответы и считает одновременные запросы."""
+    def __init__(self, responses, delay=0):
+        self.responses = list(responses)
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+
+    def request(self, method, url, **kwargs):
+        session = self
+        self.calls += 1
+
+        class Ctx:
+            async def __aenter__(self):
+                session.active += 1
+                session.peak = max(session.peak, session.active)
+                await asyncio.sleep(session.delay)
+                session.active -= 1
+                resp = session.responses.pop(0) if len(session.responses) > 1 else session.responses[0]
+                return resp
+
+            async def __aexit__(self, *exc):
+                return False
+        return Ctx()
+
+
+def chat_ok(text="ок"):
+    return FakeResponse(200, {
+        "choices": [{"message": {"content": text}}],
+        "usage": {"prompt_tokens": 3, "completion_tokens": 5},
+    })
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    sleeps = []
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay, *args):
+        if delay:
+            sleeps.append(delay)
+        await real_sleep(0)
+    monkeypatch.setattr(oc.asyncio, "sleep", fake_sleep)
+    return sleeps
+
+
+def make_client(session, **kwargs):
+    client = OpenAIClient(api_key="test", **kwargs)
+    client._http = lambda: session
+    return client
+
+
+@pytest.mark.asyncio
+async def test_retries_429_honouring_retry_after(no_sleep):
+    """429 с Retry-After повторяется после указанной паузы; метрики учитывают повтор и токены."""
+    session = FakeSession([FakeResponse(429, headers={"Retry-After": "2"}), chat_ok("привет")])
+    client = make_client(session)
+
+    assert await client.chat([{"role": "user", "content": "hi"}], model="gpt-4o") == "привет"
+    assert session.calls == 2
+    assert no_sleep == [2.0]
+    stats = client.snapshot()["gpt-4o"]
+    assert stats["calls"] == 1 and stats["retries"] == 1 and stats["errors"] == 0
+    assert stats["prompt_tokens"] == 3 and stats["completion_tokens"] == 5
+
+
+@pytest.mark.asyncio
+async def test_client_error_is_not_retried():
+    """400 — ошибка запроса: без повторов, сразу OpenAIError."""
+    session = FakeSession([FakeResponse(400)])
+    client = make_client(session)
+
+    with pytest.raises(OpenAIError) as exc:
+        await client.chat([], model="gpt-4o")
+    assert exc.value.status == 400
+    assert session.calls == 1
+    assert client.snapshot()["gpt-4o"]["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_per_model_limit_caps_concurrency(monkeypatch):
+    """Одновременных запросов к модели не больше её лимита."""
+    monkeypatch.setattr(oc.asyncio, "sleep", asyncio.sleep)
+    session = FakeSession([chat_ok()], delay=0.01)
+    client = make_client(session, max_concurrency=10, model_limits={"dall-e-3": 2})
+
+    await asyncio.gather(*(
+        client._request("POST", "/images/generations", "dall-e-3", json={}) for _ in range(6)
+    ))
+    assert session.calls == 6
+    assert session.peak == 2
+
+
+class FakeStream(FakeResponse):
+    def __init__(self, lines):
+        super().__init__(200)
+        self.content = self._iter(lines)
+
+    @staticmethod
+    async def _iter(lines):
+        for line in lines:
+            yield line
+
+
+@pytest.mark.asyncio
+async def test_chat_stream_yields_deltas_and_counts_usage():
+    """SSE-поток разбирается в куски текста; usage из последнего чанка попадает в метрики."""
+    session = FakeSession([FakeStream([
+        b'data: {"choices":[{"delta":{"role":"assistant"}}]}\n',
+        b"\n",
+        'data: {"choices":[{"delta":{"content":"При"}}]}\n'.encode(),
+        'data: {"choices":[{"delta":{"content":"вет"}}]}\n'.encode(),
+        b'data: {"choices":[],"usage":{"prompt_tokens":4,"completion_tokens":2}}\n',
+        b"data: [DONE]\n",
+    ])])
+    client = make_client(session)
+
+    pieces = [p async for p in client.chat_stream([], model="gpt-4o")]
+    assert pieces == ["При", "вет"]
+    stats = client.snapshot()["gpt-4o"]
+    assert stats["calls"] == 1 and stats["completion_tokens"] == 2
+
+
+@pytest.mark.asyncio
+async def test_backoff_releases_concurrency_slots(monkeypatch):
+    """Пока запрос ждёт повтора, его слоты свободны для других запросов."""
+    session = FakeSession([FakeResponse(503), chat_ok()])
+    client = make_client(session, max_concurrency=1, model_limits={"gpt-4o": 1})
+    locked = []
+
+    async def fake_sleep(delay, *args):
+        if delay:
+            locked.append((client._global.locked(), client._model_sem("gpt-4o").locked()))
+    monkeypatch.setattr(oc.asyncio, "sleep", fake_sleep)
+
+    assert await client.chat([], model="gpt-4o") == "ок"
+    assert locked == [(False, False)]
@@ -0,0 +1,86 @@
+# tests/utils/test_pg_storage.py
+
+import json
+import time
+
+import pytest
+from aiogram.fsm.storage.base import StorageKey
+
+import db
+from utils.pg_storage import PgStorage
+
+
+class FakeConn:
+    def __init__(self, log):
+        self.log = log
+
+    async def execute(self, query, *args):
+        self.log.append((query, args))
+
+    def transaction(self):
+        class Tx:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+        return Tx()
+
+
+class FakePool:
+    def __init__(self):
+        self.log = []
+
+    def acquire(self):
+        conn = FakeConn(self.log)
+
+        class Ctx:
+            async def __aenter__(self):
+                return conn
+
+            async def __aexit__(self, *exc):
+                return False
+        return Ctx()
+
+
+KEY = StorageKey(bot_id=1, chat_id=10, user_id=10)
+
+
+@pytest.mark.asyncio
+async def test_changes_are_written_in_one_batch(monkeypatch):
+    """Чтения из памяти; все изменения между записями — один UPSERT."""
+    pool = FakePool()
+    monkeypatch.setattr(db, "db_pool", pool)
+    storage = PgStorage()
+
+    await storage.set_state(KEY, "Booking:day")
+    await storage.update_data(KEY, {"selected_group": "G1"})
+    await storage.update_data(KEY, {"selected_day": "Сегодня"})
+    assert await storage.get_state(KEY) == "Booking:day"
+    assert await storage.get_data(KEY) == {"selected_group": "G1", "selected_day": "Сегодня"}
+    assert pool.log == []
+
+    await storage.flush()
+    assert len(pool.log) == 1
+    query, (keys, states, datas, _) = pool.log[0]
+    assert "INSERT INTO fsm_storage" in query
+    assert states == ["Booking:day"]
+    assert json.loads(datas[0]) == {"selected_group": "G1", "selected_day": "Сегодня"}
+
+    # state.clear() → запись удаляется
+    await storage.set_state(KEY, None)
+    await storage.set_data(KEY, {})
+    await storage.flush()
+    assert "DELETE FROM fsm_storage" in pool.log[-1][0]
+    assert pool.log[-1][1][0] == keys
+
+
+@pytest.mark.asyncio
+async def test_abandoned_flow_expires(monkeypatch):
+    monkeypatch.setattr(db, "db_pool", None)
+    storage = PgStorage(ttl=60)
+    await storage.set_state(KEY, "Money:amount")
+    storage._records[storage._key(KEY)].touched = time.time() - 120
+
+    assert await storage.expire() == 1
+    assert await storage.get_state(KEY) is None
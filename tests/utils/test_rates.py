@@ -0,0 +1,65 @@
+# tests/utils/test_rates.py
+
+import asyncio
+import time
+
+import pytest
+
+import db
+from utils.rates import RateService
+
+
+class FakeRates(RateService):
+    """Источники подменены: считаем запросы, ответ задаём в тесте."""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+        self.fiat = {"USD": 1.0, "RUB": 90.0}
+        self.usdt = {"USDT": 1.0}
+
+    async def _fetch_fiat(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return dict(self.fiat)
+
+    async def _fetch_usdt(self):
+        return dict(self.usdt)
+
+
+@pytest.fixture(autouse=True)
+def no_db(monkeypatch):
+    monkeypatch.setattr(db, "db_pool", None)
+
+
+@pytest.mark.asyncio
+async def test_cold_start_fetches_once_then_serves_from_memory():
+    svc = FakeRates()
+    results = await asyncio.gather(*(svc.get() for _ in range(5)))
+    assert all(r["RUB"] == 90.0 for r in results)
+    assert svc.calls == 1
+
+    await svc.get()
+    assert svc.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_rates_served_while_revalidating():
+    svc = FakeRates(ttl=60)
+    await svc.get()
+    svc.fetched_at = time.time() - 120
+    svc.fiat["RUB"] = 100.0
+
+    assert (await svc.get())["RUB"] == 90.0   # сразу, без ожидания сети
+    await svc._refreshing
+    assert (await svc.get())["RUB"] == 100.0
+    assert svc.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_source_keeps_last_known_rates():
+    svc = FakeRates()
+    await svc.refresh()
+    svc.fiat = {}
+    svc.usdt = {"USDT": 1.01}
+    rates = await svc.refresh()
+    assert rates["RUB"] == 90.0 and rates["USDT"] == 1.01
@@ -0,0 +1,103 @@
+# tests/utils/test_send_scheduler.py
+
+import asyncio
+import pytest
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage, DeleteMessage, EditMessageText, GetMe
+
+from utils.send_scheduler import SendScheduler, Priority, send_priority
+
+
+@pytest.mark.asyncio
+async def test_get_methods_bypass_queue():
+    sched = SendScheduler()
+    calls = []
+
+    async def make_request(bot, method):
+        calls.append(method)
+        return "ok"
+
+    assert await sched(make_request, None, GetMe()) == "ok"
+    assert sched.snapshot()["sent"]["NORMAL"] == 0
+    await sched.close()
+
+
+@pytest.mark.asyncio
+async def test_high_priority_goes_first():
+    """Когда глобальный лимит исчерпан, HIGH получает слот раньше ранее вставших LOW/BULK."""
+    sched = SendScheduler()
+    sched.global_bucket.tokens = 0
+    sched.global_bucket.rate = 20.0
+    order = []
+
+    async def make_request(bot, method):
+        order.append(method.chat_id)
+
+    async def send(chat_id, priority, method_cls=SendMessage):
+        with send_priority(priority):
+            if method_cls is SendMessage:
+                method = SendMessage(chat_id=chat_id, text="x")
+            else:
+                method = DeleteMessage(chat_id=chat_id, message_id=1)
+            await sched(make_request, None, method)
+
+    tasks = [asyncio.create_task(send(10, Priority.LOW))]
+    tasks.append(asyncio.create_task(send(11, Priority.BULK, DeleteMessage)))
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(send(12, Priority.HIGH)))
+    await asyncio.gather(*tasks)
+
+    assert order == [12, 10, 11]
+    snap = sched.snapshot()
+    assert snap["sent"]["HIGH"] == 1
+    assert snap["queue_depth"] == {p.name: 0 for p in Priority}
+    await sched.close()
+
+
+@pytest.mark.asyncio
+async def test_delete_defaults_to_bulk_lane():
+    sched = SendScheduler()
+
+    async def make_request(bot, method):
+        return True
+
+    await sched(make_request, None, DeleteMessage(chat_id=5, message_id=1))
+    assert sched.snapshot()["sent"]["BULK"] == 1
+    await sched.close()
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_retried():
+    sched = SendScheduler()
+    attempts = []
+    method = SendMessage(chat_id=7, text="x")
+
+    async def make_request(bot, m):
+        attempts.append(m)
+        if len(attempts) == 1:
+            raise TelegramRetryAfter(method=m, message="Too Many Requests", retry_after=0)
+        return "sent"
+
+    assert await sched(make_request, None, method) == "sent"
+    assert len(attempts) == 2
+    assert sched.snapshot()["retry_after"] == 1
+    await sched.close()
+
+
+@pytest.mark.asyncio
+async def test_group_edits_and_deletes_skip_send_budget():
+    """Исчерпанный лимит сообщений группы не задерживает правки и удаления в ней."""
+    sched = SendScheduler()
+    group = -100500
+    sched._chat_bucket(group).tokens = 0
+
+    async def make_request(bot, method):
+        return True
+
+    await asyncio.wait_for(asyncio.gather(
+        sched(make_request, None, EditMessageText(chat_id=group, message_id=1, text="x")),
+        *(sched(make_request, None, DeleteMessage(chat_id=group, message_id=i)) for i in range(5)),
+    ), timeout=1)
+    assert sched.chat_buckets[group].tokens < 1
+    await sched.close()
@@ -0,0 +1,87 @@
+# tests/utils/test_slot_board.py
+
+import pytest
+
+from utils.slot_board import SlotBoard, SLOTS, FULL_MASK, slots_from_mask, mask_from_slots
+from utils.time_utils import get_adjacent_time_slots
+from handlers.booking.data_manager import BookingDataManager
+
+
+def _group():
+    return {
+        "booked_slots": {"Сегодня": [], "Завтра": []},
+        "unavailable_slots": {"Сегодня": set(), "Завтра": set()},
+        "time_slot_statuses": {},
+        "slot_bookers": {},
+    }
+
+
+@pytest.mark.parametrize("slot", SLOTS)
+def test_adjacency_matches_time_utils(slot):
+    """Маски соседей совпадают с линейным get_adjacent_time_slots."""
+    board = SlotBoard()
+    board.book("Сегодня", slot)
+    assert board.unavailable_slots("Сегодня") == set(get_adjacent_time_slots(slot))
+
+
+def test_mask_roundtrip_keeps_schedule_order():
+    slots = ["18:00", "12:00", "01:30"]
+    assert slots_from_mask(mask_from_slots(slots)) == ["12:00", "18:00", "01:30"]
+    # слоты вне расписания игнорируются
+    assert mask_from_slots(["10:00"]) == 0
+
+
+def test_can_book_and_free_mask():
+    board = SlotBoard()
+    assert board.free_mask("Сегодня") == FULL_MASK
+    board.book("Сегодня", "14:00")
+    assert not board.can_book("Сегодня", "14:00")
+    assert not board.can_book("Сегодня", "13:30")
+    assert not board.can_book("Сегодня", "14:30")
+    assert board.can_book("Сегодня", "15:00")
+    assert board.can_book("Завтра", "14:00")
+    assert "14:00" not in slots_from_mask(board.free_mask("Сегодня"))
+    assert not board.can_book("Сегодня", "10:00")
+
+
+def test_move_day():
+    board = SlotBoard()
+    board.book("Сегодня", "12:00")
+    board.book("Завтра", "20:00")
+    board.move_day("Завтра", "Сегодня")
+    assert board.booked_slots("Сегодня") == ["20:00"]
+    assert board.booked_slots("Завтра") == []
+
+
+def test_manager_keeps_legacy_views_in_sync():
+    """book/release обновляют booked_slots, unavailable_slots, статусы и bookers."""
+    mgr = BookingDataManager({"G": _group()})
+    g = mgr.get_group_info("G")
+
+    mgr.book_slot("G", "Сегодня", "14:00", 1)
+    mgr.book_slot("G", "Сегодня", "15:00", 2)
+    assert g["booked_slots"]["Сегодня"] == ["14:00", "15:00"]
+    assert g["unavailable_slots"]["Сегодня"] == {"13:30", "14:30", "15:30"}
+    assert g["time_slot_statuses"][("Сегодня", "14:30")] == "unavailable"
+
+    assert mgr.release_slot("G", "Сегодня", "14:00") == 1
+    assert g["booked_slots"]["Сегодня"] == ["15:00"]
+    # 14:30 остаётся заблокированным соседней бронью 15:00
+    assert g["unavailable_slots"]["Сегодня"] == {"14:30", "15:30"}
+    assert ("Сегодня", "13:30") not in g["time_slot_statuses"]
+    assert ("Сегодня", "13:30") not in g["slot_bookers"]
+    assert mgr.can_book("G", "Сегодня", "13:30")
+
+
+def test_manager_roll_day():
+    mgr = BookingDataManager({"G": _group()})
+    g = mgr.get_group_info("G")
+    mgr.book_slot("G", "Сегодня", "12:00", 1)
+    mgr.book_slot("G", "Завтра", "20:00", 2)
+
+    mgr.roll_day("G", "Завтра", "Сегодня")
+    assert g["booked_slots"] == {"Сегодня": ["20:00"], "Завтра": []}
+    assert g["slot_bookers"][("Сегодня", "20:00")] == 2
+    assert ("Сегодня", "12:00") not in g["time_slot_statuses"]
+    assert g["unavailable_slots"]["Сегодня"] == {"19:30", "20:30"}
+    assert mgr.can_book("G", "Завтра", "20:00")
@@ -0,0 +1,93 @@
+# tests/utils/test_stream_reply.py
+
+import pytest
+
+import utils.stream_reply as sr
+from utils.stream_reply import StreamingReply
+
+
+class FakeSent:
+    def __init__(self, log, text, parse_mode):
+        self.log = log
+        self.text = text
+        log.append(("send", text, parse_mode))
+
+    async def edit_text(self, text, parse_mode=None):
+        self.text = text
+        self.log.append(("edit", text, parse_mode))
+
+
+class FakeMessage:
+    def __init__(self):
+        self.log = []
+        self.sent = []
+
+    async def answer(self, text, parse_mode=None):
+        msg = FakeSent(self.log, text, parse_mode)
+        self.sent.append(msg)
+        return msg
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(sr.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.mark.asyncio
+async def test_first_tokens_sent_at_once_then_edits_throttled(clock):
+    """Первый кусок уходит сразу, правки — не чаще интервала, итог — с разметкой."""
+    message = FakeMessage()
+    reply = StreamingReply(message, interval=1.0)
+
+    await reply.feed("При")
+    for piece in ["вет", ",", " мир"]:
+        clock[0] += 0.2
+        await reply.feed(piece)
+    assert message.log == [("send", "При" + sr.CURSOR, None)]
+
+    clock[0] += 1.0
+    await reply.feed("!")
+    assert message.log[-1] == ("edit", "Привет, мир!" + sr.CURSOR, None)
+
+    assert await reply.finish() == "Привет, мир!"
+    assert message.log[-1] == ("edit", "Привет, мир!", "Markdown")
+    assert len(message.sent) == 1
+
+
+@pytest.mark.asyncio
+async def test_long_reply_rolls_over_into_new_messages(clock):
+    """Текст длиннее лимита делится по абзацам на несколько сообщений."""
+    message = FakeMessage()
+    reply = StreamingReply(message, interval=0, limit=18)
+
+    for word in ["первый абзац", "\n\n", "второй абзац", "\n\n", "третий"]:
+        await reply.feed(word)
+    text = await reply.finish()
+
+    assert text == "первый абзац\n\nвторой абзац\n\nтретий"
+    assert [m.text for m in message.sent] == ["первый абзац", "второй абзац", "третий"]
+    assert all(len(m.text) <= 18 for m in message.sent)
+
+
+@pytest.mark.asyncio
+async def test_failed_stream_drops_cursor_and_adds_notice(clock):
+    """Обрыв генерации: курсор убран, пометка об ошибке дописана к показанному тексту."""
+    message = FakeMessage()
+    reply = StreamingReply(message, interval=0)
+    await reply.feed("Начало ответа")
+    assert message.log[-1][1].endswith(sr.CURSOR)
+
+    assert await reply.fail("⚠️ ошибка") == "Начало ответа"
+    assert message.log[-1] == ("edit", "Начало ответа\n\n⚠️ ошибка", "Markdown")
+    assert len(message.sent) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_stream_without_text_sends_notice(clock):
+    message = FakeMessage()
+    reply = StreamingReply(message)
+
+    assert await reply.fail("⚠️ ошибка") == ""
+    assert message.log == [("send", "⚠️ ошибка", None)]
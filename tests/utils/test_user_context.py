@@ -0,0 +1,76 @@
+# tests/utils/test_user_context.py
+
+import pytest
+
+import db
+from utils.user_context import UserContextCache
+
+
+class FakeConn:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def fetchrow(self, query, user_id):
+        self.pool.queries += 1
+        return self.pool.rows.get(user_id)
+
+
+class FakePool:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    def acquire(self):
+        pool = self
+
+        class Ctx:
+            async def __aenter__(self):
+                return FakeConn(pool)
+
+            async def __aexit__(self, *exc):
+                return False
+        return Ctx()
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    p = FakePool({1: {"language": "en", "username": "alice", "emojis": "⚽️"}})
+    monkeypatch.setattr(db, "db_pool", p)
+    return p
+
+
+@pytest.mark.asyncio
+async def test_context_is_loaded_once(pool):
+    cache = UserContextCache()
+    ctx = await cache.get(1)
+    await cache.get(1)
+    assert (ctx.lang, ctx.username, ctx.emoji) == ("en", "alice", "⚽️")
+    assert pool.queries == 1
+
+
+@pytest.mark.asyncio
+async def test_unknown_user_gets_default_language(pool):
+    ctx = await UserContextCache().get(2)
+    assert ctx.lang == "ru" and ctx.username is None
+
+
+@pytest.mark.asyncio
+async def test_set_lang_writes_through_and_invalidate_reloads(pool):
+    cache = UserContextCache()
+    await cache.get(1)
+    cache.set_lang(1, "zh")
+    assert (await cache.get(1)).lang == "zh"
+    assert pool.queries == 1
+
+    cache.invalidate(1)
+    assert (await cache.get(1)).lang == "en"
+    assert pool.queries == 2
+
+
+@pytest.mark.asyncio
+async def test_lru_evicts_oldest(pool):
+    cache = UserContextCache(maxsize=1)
+    await cache.get(1)
+    await cache.get(2)
+    await cache.get(1)
+    assert pool.queries == 3
@@ -0,0 +1,56 @@
+# tests/utils/test_webhook.py
+
+import asyncio
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from aiogram import Dispatcher
+
+from utils.webhook import OrderedWorkerPool, build_webhook_app, SECRET_HEADER
+
+
+class FakeDispatcher(Dispatcher):
+    """Вместо хендлеров — журнал (chat_id, text); чат -1 обрабатывается медленно."""
+    def __init__(self):
+        super().__init__()
+        self.handled = []
+
+    async def feed_update(self, bot, update, **kwargs):
+        msg = update.message
+        if msg.chat.id == -1:
+            await asyncio.sleep(0.05)
+        self.handled.append((msg.chat.id, msg.text))
+
+
+def _update(update_id, chat_id, text):
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": 0, "text": text,
+            "chat": {"id": chat_id, "type": "group", "title": "g"},
+            "from": {"id": 5, "is_bot": False, "first_name": "u"},
+        },
+    }
+
+
+@pytest.mark.asyncio
+async def test_per_chat_order_and_secret():
+    dp = FakeDispatcher()
+    pool = OrderedWorkerPool(dp, bot=None, workers=4)
+    app = build_webhook_app(dp, None, pool, "/hook", "s3cret")
+
+    async with TestClient(TestServer(app)) as client:
+        resp = await client.post("/hook", json=_update(1, -1, "x"))
+        assert resp.status == 401
+        resp = await client.post("/hook", json=_update(1, -1, "x"), headers={SECRET_HEADER: "bad"})
+        assert resp.status == 401
+
+        headers = {SECRET_HEADER: "s3cret"}
+        for i, (chat, text) in enumerate([(-1, "a1"), (-1, "a2"), (-2, "b1"), (-1, "a3")]):
+            resp = await client.post("/hook", json=_update(10 + i, chat, text), headers=headers)
+            assert resp.status == 200
+        await pool.close()
+
+    assert [t for c, t in dp.handled if c == -1] == ["a1", "a2", "a3"]
+    # медленный чат не задерживает другой
+    assert dp.handled[0] == (-2, "b1")
@@ -0,0 +1,68 @@
+# utils/admin_roster.py
+
+import logging
+import time
+from typing import Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+ADMIN_STATUSES = ("administrator", "creator")
+# Страховочная перезагрузка списка админов, если апдейт chat_member потерялся
+ROSTER_TTL = 600
+
+
+class AdminRoster:
+    """
+    Кэш администраторов групп.
+
+    Список админов чата загружается одним get_chat_administrators и дальше
+    поддерживается апдейтами chat_member / my_chat_member (handlers/booking/admins.py).
+    Раз в ROSTER_TTL секунд список перечитывается. Если загрузить его не удалось,
+    проверка откатывается к get_chat_member для одного пользователя.
+    """
+
+    def __init__(self, ttl: float = ROSTER_TTL):
+        self.ttl = ttl
+        self._rosters: Dict[int, Tuple[Set[int], float]] = {}
+
+    def _fresh(self, chat_id: int) -> Optional[Set[int]]:
+        entry = self._rosters.get(chat_id)
+        if entry and time.monotonic() - entry[1] < self.ttl:
+            return entry[0]
+        return None
+
+    async def _load(self, bot, chat_id: int) -> Optional[Set[int]]:
+        try:
+            admins = await bot.get_chat_administrators(chat_id)
+        except Exception as e:
+            logger.warning(f"Не удалось получить админов чата {chat_id}: {e}")
+            return None
+        roster = {m.user.id for m in admins}
+        self._rosters[chat_id] = (roster, time.monotonic())
+        return roster
+
+    async def is_admin(self, bot, chat_id: int, user_id: int) -> bool:
+        roster = self._fresh(chat_id)
+        if roster is None:
+            roster = await self._load(bot, chat_id)
+        if roster is not None:
+            return user_id in roster
+        member = await bot.get_chat_member(chat_id, user_id)
+        return member.status in ADMIN_STATUSES
+
+    # ───── апдейты ─────
+    def update_member(self, chat_id: int, user_id: int, status: str):
+        """Статус участника изменился (chat_member); незагруженные чаты не трогаем."""
+        entry = self._rosters.get(chat_id)
+        if entry is None:
+            return
+        if status in ADMIN_STATUSES:
+            entry[0].add(user_id)
+        else:
+            entry[0].discard(user_id)
+
+    def forget(self, chat_id: int):
+        self._rosters.pop(chat_id, None)
+
+
+admin_roster = AdminRoster()
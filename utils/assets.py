@@ -0,0 +1,137 @@
+# utils/assets.py
+
+import asyncio
+import hashlib
+import logging
+import os
+from typing import Dict, Optional, Tuple, Union
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message
+from aiogram.types.input_file import FSInputFile
+
+import db
+
+logger = logging.getLogger(__name__)
+
+
+class AssetRegistry:
+    """
+    Кэш file_id для локальных картинок (photo/*.JPG).
+
+    Файл загружается в Telegram один раз, полученный file_id сохраняется
+    в таблице asset_files по (bot_id, path) вместе с sha1 содержимого.
+    Дальше фото отправляется по file_id без загрузки. Если Telegram
+    отверг file_id (сменился токен, файл удалён на стороне Telegram) —
+    запись сбрасывается и файл загружается заново.
+    """
+
+    def __init__(self):
+        # (bot_id, path) -> (digest, file_id)
+        self._cache: Dict[Tuple[int, str], Tuple[str, str]] = {}
+        self._digests: Dict[str, Tuple[float, str]] = {}
+        self._loaded_bots: set[int] = set()
+        self._locks: Dict[Tuple[int, str], asyncio.Lock] = {}
+
+    # ───── служебное ─────
+    def _digest(self, path: str) -> str:
+        """sha1 файла; пересчитывается только при смене mtime."""
+        mtime = os.path.getmtime(path)
+        cached = self._digests.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(path, "rb") as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        self._digests[path] = (mtime, digest)
+        return digest
+
+    async def _load(self, bot_id: int):
+        if bot_id in self._loaded_bots or not db.db_pool:
+            return
+        try:
+            async with db.db_pool.acquire() as conn:
+                rows = await conn.fetch(
+                    "SELECT path, digest, file_id FROM asset_files WHERE bot_id=$1", bot_id
+                )
+        except Exception as e:
+            logger.warning(f"Не удалось загрузить кэш file_id: {e}")
+            return
+        for r in rows:
+            self._cache[(bot_id, r["path"])] = (r["digest"], r["file_id"])
+        self._loaded_bots.add(bot_id)
+
+    async def _save(self, bot_id: int, path: str, digest: str, file_id: str):
+        self._cache[(bot_id, path)] = (digest, file_id)
+        if not db.db_pool:
+            return
+        try:
+            async with db.db_pool.acquire() as conn:
+                await conn.execute(
+                    """
+                    INSERT INTO asset_files (bot_id, path, digest, file_id)
+                    VALUES ($1, $2, $3, $4)
+                    ON CONFLICT (bot_id, path) DO UPDATE
+                      SET digest=EXCLUDED.digest, file_id=EXCLUDED.file_id, updated_at=NOW()
+                    """,
+                    bot_id, path, digest, file_id
+                )
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить file_id для {path}: {e}")
+
+    async def _forget(self, bot_id: int, path: str):
+        self._cache.pop((bot_id, path), None)
+        if not db.db_pool:
+            return
+        try:
+            async with db.db_pool.acquire() as conn:
+                await conn.execute(
+                    "DELETE FROM asset_files WHERE bot_id=$1 AND path=$2", bot_id, path
+                )
+        except Exception as e:
+            logger.warning(f"Не удалось удалить file_id для {path}: {e}")
+
+    def cached_file_id(self, bot_id: int, path: str) -> Optional[str]:
+        entry = self._cache.get((bot_id, path))
+        if entry and entry[0] == self._digest(path):
+            return entry[1]
+        return None
+
+    # ───── отправка ─────
+    async def send_photo(self, bot, chat_id: int, photo: Union[str, FSInputFile], **kwargs) -> Message:
+        """
+        bot.send_photo, но локальный путь отправляется по сохранённому file_id.
+        Строка, которой нет на диске, считается file_id/URL и передаётся как есть.
+        """
+        bot_id = getattr(bot, "id", None)
+        if not isinstance(photo, str) or not os.path.exists(photo):
+            return await bot.send_photo(chat_id=chat_id, photo=photo, **kwargs)
+        if not isinstance(bot_id, int):
+            # заглушки бота без токена — кэшировать не к чему
+            return await bot.send_photo(chat_id=chat_id, photo=FSInputFile(photo), **kwargs)
+
+        path = os.path.normpath(photo)
+        await self._load(bot_id)
+        file_id = self.cached_file_id(bot_id, path)
+        if file_id:
+            try:
+                return await bot.send_photo(chat_id=chat_id, photo=file_id, **kwargs)
+            except TelegramBadRequest as e:
+                if "file" not in str(e).lower():
+                    raise
+                logger.info("file_id для %s отвергнут (%s), загружаю заново", path, e)
+                await self._forget(bot_id, path)
+
+        # первая загрузка — под замком, чтобы параллельные экраны не грузили файл повторно
+        lock = self._locks.setdefault((bot_id, path), asyncio.Lock())
+        async with lock:
+            file_id = self.cached_file_id(bot_id, path)
+            if file_id:
+                return await bot.send_photo(chat_id=chat_id, photo=file_id, **kwargs)
+            sent = await bot.send_photo(chat_id=chat_id, photo=FSInputFile(path), **kwargs)
+            sizes = getattr(sent, "photo", None)
+            if sizes:
+                await self._save(bot_id, path, self._digest(path), sizes[-1].file_id)
+            return sent
+
+
+assets = AssetRegistry()
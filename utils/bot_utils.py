@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-import os
 from typing import Any, Mapping, Union, Optional
 
 from aiogram.types import (
@@ -12,6 +11,8 @@ from aiogram.types import (
 )
 from aiogram.types.input_file import FSInputFile
 
+from utils.assets import assets
+
 last_bot_message: dict[int, int] = {}
 
 
@@ -24,12 +25,12 @@ async def _send_photo(
 ) -> Message:
     """
     Упрощённая обёртка вокруг bot.send_photo без лишних параметров.
+    Локальные файлы отправляются по кэшированному file_id (utils.assets).
     """
-    if isinstance(photo, str) and os.path.exists(photo):
-        photo = FSInputFile(photo)
-    return await bot.send_photo(
-        chat_id=chat_id,
-        photo=photo,
+    return await assets.send_photo(
+        bot,
+        chat_id,
+        photo,
         caption=caption,
         reply_markup=reply_markup,
     )
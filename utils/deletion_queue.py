@@ -0,0 +1,152 @@
+# utils/deletion_queue.py
+
+import asyncio
+import heapq
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import db
+from utils.send_scheduler import Priority, send_priority
+
+logger = logging.getLogger(__name__)
+
+# Ограничение Bot API deleteMessages
+DELETE_BATCH = 100
+
+
+class DeletionQueue:
+    """
+    Отложенное удаление сообщений одним воркером.
+
+    Сроки лежат в куче (delete_at, chat_id, message_id); воркер спит до
+    ближайшего срока, забирает все наступившие и удаляет их пачками
+    bot.delete_messages (до 100 на чат) с приоритетом BULK. Очередь
+    дублируется в таблицу pending_deletions: новые записи пишутся одной
+    вставкой при пробуждении воркера, после старта бота очередь
+    восстанавливается из таблицы.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, int]] = []
+        self._unsaved: List[Tuple[float, int, int]] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._bot = None
+
+    def schedule(self, chat_id: int, message_id: int, delay: float) -> None:
+        """Удалить сообщение через delay секунд."""
+        item = (time.time() + delay, chat_id, message_id)
+        heapq.heappush(self._heap, item)
+        self._unsaved.append(item)
+        self._wakeup.set()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    async def start(self, bot) -> None:
+        self._bot = bot
+        await self._restore()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._worker())
+
+    async def close(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await self._persist()
+
+    # ───── таблица ─────
+    async def _restore(self) -> None:
+        if not db.db_pool:
+            return
+        async with db.db_pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT chat_id, message_id, EXTRACT(EPOCH FROM delete_at) AS ts "
+                "FROM pending_deletions"
+            )
+        known = {(c, m) for _, c, m in self._heap}
+        for r in rows:
+            if (r["chat_id"], r["message_id"]) not in known:
+                heapq.heappush(self._heap, (float(r["ts"]), r["chat_id"], r["message_id"]))
+        if rows:
+            logger.info("Восстановлено отложенных удалений: %s", len(rows))
+
+    async def _persist(self) -> None:
+        items, self._unsaved = self._unsaved, []
+        if not items or not db.db_pool:
+            return
+        try:
+            async with db.db_pool.acquire() as conn:
+                await conn.execute(
+                    """
+                    INSERT INTO pending_deletions (chat_id, message_id, delete_at)
+                    SELECT c, m, to_timestamp(t)
+                    FROM unnest($1::BIGINT[], $2::BIGINT[], $3::FLOAT8[]) AS u(c, m, t)
+                    ON CONFLICT (chat_id, message_id) DO UPDATE SET delete_at = EXCLUDED.delete_at
+                    """,
+                    [c for _, c, _ in items], [m for _, _, m in items], [t for t, _, _ in items]
+                )
+        except Exception as e:
+            logger.warning("Не удалось сохранить очередь удалений: %s", e)
+
+    async def _forget(self, done: Dict[int, List[int]]) -> None:
+        if not db.db_pool:
+            return
+        chats = [c for c, ids in done.items() for _ in ids]
+        msgs = [m for ids in done.values() for m in ids]
+        try:
+            async with db.db_pool.acquire() as conn:
+                await conn.execute(
+                    """
+                    DELETE FROM pending_deletions p
+                    USING unnest($1::BIGINT[], $2::BIGINT[]) AS u(c, m)
+                    WHERE p.chat_id = u.c AND p.message_id = u.m
+                    """,
+                    chats, msgs
+                )
+        except Exception as e:
+            logger.warning("Не удалось очистить очередь удалений: %s", e)
+
+    # ───── воркер ─────
+    def _pop_due(self, now: float) -> Dict[int, List[int]]:
+        due: Dict[int, List[int]] = defaultdict(list)
+        while self._heap and self._heap[0][0] <= now:
+            _, chat_id, message_id = heapq.heappop(self._heap)
+            due[chat_id].append(message_id)
+        return due
+
+    async def _delete(self, due: Dict[int, List[int]]) -> None:
+        with send_priority(Priority.BULK):
+            for chat_id, ids in due.items():
+                for i in range(0, len(ids), DELETE_BATCH):
+                    try:
+                        await self._bot.delete_messages(chat_id, ids[i:i + DELETE_BATCH])
+                    except Exception as e:
+                        logger.debug("Delete failed %s/%s: %s", chat_id, ids[i:i + DELETE_BATCH], e)
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                self._wakeup.clear()
+                await self._persist()
+                due = self._pop_due(time.time())
+                if due:
+                    await self._delete(due)
+                    await self._forget(due)
+                    continue
+                timeout = self._heap[0][0] - time.time() if self._heap else None
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Ошибка в очереди удалений: %s", e)
+                await asyncio.sleep(5)
+
+
+deletion_queue = DeletionQueue()
@@ -0,0 +1,253 @@
+# utils/fin_report.py
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from aiogram import Bot
+from aiogram.enums import ParseMode
+from aiogram.exceptions import TelegramBadRequest
+
+import db
+from config import FIN_GROUP_IDS, FIN_REPORT_INTERVAL
+from constants.booking_const import FINANCIAL_REPORT_GROUP_ID, groups_data
+from db_access.ledger import chat_account
+from utils.send_scheduler import Priority, send_priority
+
+logger = logging.getLogger(__name__)
+
+# Ключ закреплённого сообщения в pinned_messages
+PIN_KEY = "financial_report"
+# Полная сверка с БД раз в час — страховка от изменений мимо дельт
+RESYNC_INTERVAL = 3600
+
+
+class FinancialReport:
+    """
+    Сводный финансовый отчёт в памяти.
+
+    Балансы пользователей и фин. групп загружаются из БД один раз, дальше
+    обновляются дельтами из путей оплаты, /money, /users и andry.
+    Зарплата и наличные групп берутся из groups_data в момент отрисовки.
+    request() отрисовывает отчёт не чаще раза в interval секунд и
+    редактирует одно закреплённое сообщение вместо отправки нового.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.users: Dict[int, Dict[str, Any]] = {}
+        self.fin_balances: Dict[int, float] = {}
+        self.message_id: Optional[int] = None
+        self._loaded = False
+        self._loading = False
+        self._stale = False
+        self._loaded_at = 0.0
+        self._last_render = 0.0
+        self._digest: Optional[str] = None
+        self._message_loaded = False
+        self._task: Optional[asyncio.Task] = None
+        self._bot: Optional[Bot] = None
+
+    # ───── дельты ─────
+    def _ready(self) -> bool:
+        if self._loading:
+            # изменение пришло во время загрузки — её результат может быть устаревшим
+            self._stale = True
+            return False
+        return self._loaded
+
+    def user_delta(self, user_id: int, delta, username: Optional[str] = None):
+        if not self._ready():
+            return
+        u = self.users.get(user_id)
+        if u is None:
+            self.users[user_id] = {"username": username, "balance": delta, "emojis": None}
+            return
+        u["balance"] = (u["balance"] or 0) + delta
+        if username:
+            u["username"] = username
+
+    def set_user_balance(self, user_id: int, balance):
+        if self._ready() and user_id in self.users:
+            self.users[user_id]["balance"] = balance
+
+    def set_user_emojis(self, user_id: int, emojis: str):
+        if self._ready() and user_id in self.users:
+            self.users[user_id]["emojis"] = emojis
+
+    def set_fin_balance(self, chat_id: int, balance):
+        if self._ready() and chat_id in FIN_GROUP_IDS:
+            self.fin_balances[chat_id] = balance
+
+    def invalidate(self):
+        """Редкие изменения (новый/удалённый пользователь, имя) — перечитать всё при отрисовке."""
+        self._loaded = False
+        if self._loading:
+            self._stale = True
+
+    # ───── отрисовка ─────
+    def request(self, bot: Bot):
+        """Запросить обновление отчёта; вызовы внутри интервала сливаются в одно."""
+        self._bot = bot
+        if self._task is not None and not self._task.done():
+            return
+        delay = max(0.0, self._last_render + self.interval - time.monotonic())
+        self._task = asyncio.create_task(self._render_later(bot, delay))
+
+    async def _render_later(self, bot: Bot, delay: float):
+        await asyncio.sleep(delay)
+        self._task = None
+        try:
+            with send_priority(Priority.LOW):
+                await self.render(bot)
+        except Exception as e:
+            logger.error(f"Ошибка фин. отчёта: {e}")
+
+    async def flush(self):
+        """Отрисовать отложенное обновление сразу (при остановке бота)."""
+        if self._task is None or self._task.done():
+            return
+        self._task.cancel()
+        self._task = None
+        try:
+            with send_priority(Priority.LOW):
+                await self.render(self._bot)
+        except Exception as e:
+            logger.error(f"Ошибка фин. отчёта: {e}")
+
+    async def _load(self):
+        self._loading = True
+        self._stale = False
+        try:
+            async with db.db_pool.acquire() as conn:
+                # балансы — материализованные по журналу (account_balances)
+                user_rows = await conn.fetch("""
+                    SELECT u.user_id, u.username, COALESCE(ab.balance, 0)::BIGINT AS balance, e.emojis
+                    FROM users u
+                    LEFT JOIN user_emojis e ON u.user_id=e.user_id
+                    LEFT JOIN account_balances ab ON ab.account = 'user:' || u.user_id
+                    ORDER BY u.user_id
+                """)
+                fin_rows = await conn.fetch(
+                    """
+                    SELECT substr(account, 6)::BIGINT AS chat_id, balance
+                    FROM account_balances WHERE account = ANY($1::TEXT[])
+                    """,
+                    [chat_account(gid) for gid in FIN_GROUP_IDS]
+                )
+        finally:
+            self._loading = False
+
+        self.users = {
+            r["user_id"]: {"username": r["username"], "balance": r["balance"], "emojis": r["emojis"]}
+            for r in user_rows
+        }
+        self.fin_balances = {r["chat_id"]: r["balance"] for r in fin_rows}
+        self._loaded = not self._stale
+        self._loaded_at = time.monotonic()
+
+    def build_text(self) -> str:
+        total_sal = sum(g["salary"] for g in groups_data.values())
+        total_cash = sum(g["cash"] for g in groups_data.values())
+        users_total = sum(u["balance"] or 0 for u in self.users.values())
+
+        all_rows = [
+            {"user_id": uid, **u} for uid, u in sorted(self.users.items())
+        ] + [
+            {"user_id": gid, "username": f"Group {gid}",
+             "balance": self.fin_balances.get(gid, 0), "emojis": "🏦"}
+            for gid in FIN_GROUP_IDS
+        ]
+
+        itog1 = total_cash - total_sal
+        lines = ["═══ 📊 Сводный фин. отчёт 📊 ═══\n"]
+        for k, g in groups_data.items():
+            lines += [f"[{k}] Зп: {g['salary']}¥ | Нал: {g['cash']}¥",
+                      "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"]
+        lines += [
+            f"\nИтого зарплата: {total_sal}¥",
+            f"Итого наличные: {total_cash}¥",
+            f"Итог1 (cash - salary): {itog1}¥",
+            "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
+        ]
+        if all_rows:
+            lines.append("═════ 👥 Пользователи 👥 ═════\n")
+            for r in all_rows:
+                emoji = r.get("emojis") or "❓"
+                uname = r["username"] or f"User {r['user_id']}"
+                lines += [f"{emoji} {uname}: {r['balance']}¥",
+                          "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"]
+
+        lines += [
+            "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n",
+            f"Сумма балансов пользователей: {users_total}¥",
+            f"━━━━ TOTAL (итог1 - балансы) = {itog1 - users_total}¥ ━━━━"
+        ]
+        return "<pre>" + "\n".join(lines) + "</pre>"
+
+    async def render(self, bot: Bot):
+        if not db.db_pool:
+            return
+        if not self._loaded or time.monotonic() - self._loaded_at > RESYNC_INTERVAL:
+            await self._load()
+        self._last_render = time.monotonic()
+
+        text = self.build_text()
+        digest = hashlib.sha1(text.encode()).hexdigest()
+        await self._load_message_id()
+        if self.message_id and digest == self._digest:
+            return
+
+        if self.message_id:
+            try:
+                await bot.edit_message_text(
+                    text=text, chat_id=FINANCIAL_REPORT_GROUP_ID,
+                    message_id=self.message_id, parse_mode=ParseMode.HTML
+                )
+                self._digest = digest
+                return
+            except TelegramBadRequest as e:
+                if "message is not modified" in str(e):
+                    self._digest = digest
+                    return
+                logger.info("Фин. отчёт не отредактировать (%s), отправляю новый", e)
+
+        msg = await bot.send_message(FINANCIAL_REPORT_GROUP_ID, text, parse_mode=ParseMode.HTML)
+        try:
+            await bot.pin_chat_message(
+                FINANCIAL_REPORT_GROUP_ID, msg.message_id, disable_notification=True
+            )
+        except Exception as e:
+            logger.warning(f"Не удалось закрепить фин. отчёт: {e}")
+        self.message_id = msg.message_id
+        self._digest = digest
+        await self._save_message_id()
+
+    async def _load_message_id(self):
+        if self._message_loaded:
+            return
+        async with db.db_pool.acquire() as conn:
+            row = await conn.fetchrow(
+                "SELECT chat_id, message_id FROM pinned_messages WHERE key=$1", PIN_KEY
+            )
+        # сообщение в другом чате (сменили FINANCIAL_REPORT_GROUP_ID) не редактируем
+        if row and row["chat_id"] == FINANCIAL_REPORT_GROUP_ID:
+            self.message_id = row["message_id"]
+        self._message_loaded = True
+
+    async def _save_message_id(self):
+        async with db.db_pool.acquire() as conn:
+            await conn.execute(
+                """
+                INSERT INTO pinned_messages (key, chat_id, message_id)
+                VALUES ($1, $2, $3)
+                ON CONFLICT (key) DO UPDATE
+                  SET chat_id=EXCLUDED.chat_id, message_id=EXCLUDED.message_id, updated_at=NOW()
+                """,
+                PIN_KEY, FINANCIAL_REPORT_GROUP_ID, self.message_id
+            )
+
+
+fin_report = FinancialReport(FIN_REPORT_INTERVAL)
@@ -0,0 +1,133 @@
+# utils/gpt_memory.py
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+import db
+
+logger = logging.getLogger(__name__)
+
+# Сколько последних записей хранится на пользователя
+MEMORY_SIZE = 20
+# Сколько пользователей держим в памяти (LRU)
+MAX_USERS = 2000
+# Как часто лишние строки удаляются из gpt_memory
+TRIM_INTERVAL = 60
+
+# Типы записей, которые попадают в контекст модели
+_ROLES = {
+    "user_text": "user",
+    "user_voice_text": "user",
+    "assistant_text": "assistant",
+}
+
+Turn = Tuple[str, str]  # (message_type, content)
+
+
+class GptMemory:
+    """
+    Память диалога GPT: кольцевой буфер последних MEMORY_SIZE записей на
+    пользователя.
+
+    context() читает из буфера; для «холодного» пользователя — один
+    SELECT ... ORDER BY timestamp DESC LIMIT по индексу (user_id, timestamp).
+    add() пишет все записи реплики (вопрос, ответ, голос) одним INSERT.
+    Строки сверх MEMORY_SIZE удаляются фоновой задачей раз в
+    TRIM_INTERVAL — одним DELETE для всех изменившихся пользователей.
+    """
+
+    def __init__(self, size: int = MEMORY_SIZE, max_users: int = MAX_USERS):
+        self.size = size
+        self.max_users = max_users
+        self._buffers: "OrderedDict[int, Deque[Turn]]" = OrderedDict()
+        self._to_trim: Set[int] = set()
+        self._trim_task: Optional[asyncio.Task] = None
+
+    def _remember(self, user_id: int, turns: Iterable[Turn]) -> Deque[Turn]:
+        buf = deque(turns, maxlen=self.size)
+        self._buffers[user_id] = buf
+        self._buffers.move_to_end(user_id)
+        while len(self._buffers) > self.max_users:
+            self._buffers.popitem(last=False)
+        return buf
+
+    async def _load(self, user_id: int) -> Deque[Turn]:
+        buf = self._buffers.get(user_id)
+        if buf is not None:
+            self._buffers.move_to_end(user_id)
+            return buf
+        rows = await db.db_pool.fetch(
+            """
+            SELECT message_type, content
+            FROM gpt_memory
+            WHERE user_id = $1
+            ORDER BY timestamp DESC, id DESC
+            LIMIT $2
+            """,
+            user_id, self.size
+        )
+        return self._remember(user_id, ((r["message_type"], r["content"]) for r in reversed(rows)))
+
+    async def context(self, user_id: int) -> List[Dict[str, str]]:
+        """Сообщения для ChatCompletion из последних записей пользователя."""
+        buf = await self._load(user_id)
+        return [
+            {"role": _ROLES[t], "content": content}
+            for t, content in buf if t in _ROLES
+        ]
+
+    async def add(self, user_id: int, user_name: str, turns: List[Turn]) -> None:
+        """Сохранить записи одной реплики: один INSERT, обрезка — позже в фоне."""
+        if not turns:
+            return
+        buf = self._buffers.get(user_id)
+        if buf is not None:
+            buf.extend(turns)
+        now = int(time.time())
+        await db.db_pool.execute(
+            """
+            INSERT INTO gpt_memory (user_id, user_name, message_type, content, timestamp)
+            SELECT $1, $2, t, c, $3
+            FROM unnest($4::TEXT[], $5::TEXT[]) WITH ORDINALITY AS u(t, c, n)
+            ORDER BY n
+            """,
+            user_id, user_name, now, [t for t, _ in turns], [c for _, c in turns]
+        )
+        self._to_trim.add(user_id)
+        if self._trim_task is None or self._trim_task.done():
+            self._trim_task = asyncio.create_task(self._trim_loop())
+
+    async def trim(self) -> None:
+        """Удалить из БД записи сверх size у всех изменившихся пользователей."""
+        users, self._to_trim = self._to_trim, set()
+        if not users:
+            return
+        try:
+            await db.db_pool.execute(
+                """
+                DELETE FROM gpt_memory g
+                USING (
+                    SELECT id, row_number() OVER (
+                        PARTITION BY user_id ORDER BY timestamp DESC, id DESC
+                    ) AS rn
+                    FROM gpt_memory
+                    WHERE user_id = ANY($1::BIGINT[])
+                ) old
+                WHERE g.id = old.id AND old.rn > $2
+                """,
+                list(users), self.size
+            )
+        except Exception as e:
+            logger.warning("Не удалось обрезать память GPT: %s", e)
+            self._to_trim |= users
+
+    async def _trim_loop(self) -> None:
+        while self._to_trim:
+            await asyncio.sleep(TRIM_INTERVAL)
+            await self.trim()
+
+
+gpt_memory = GptMemory()
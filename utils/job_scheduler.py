@@ -0,0 +1,178 @@
+# utils/job_scheduler.py
+
+import asyncio
+import datetime
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import db
+
+logger = logging.getLogger(__name__)
+
+# Класс ключей pg_advisory_lock для задач (второй ключ — hashtext(имени))
+JOB_LOCK_CLASS = 7_205_002
+
+# Не спим дольше: таблицу мог сдвинуть другой экземпляр, а часы — уйти
+MAX_SLEEP = 300
+# Пауза после ошибки самого цикла (недоступна БД и т.п.)
+ERROR_SLEEP = 60
+# Задача, завершившаяся ошибкой, повторяется не позже чем через столько секунд
+JOB_RETRY_DELAY = 300
+
+JobFunc = Callable[[Any], Awaitable[None]]
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class DailyAt:
+    """Ежедневно в hour:minute по часовому поясу tz."""
+
+    def __init__(self, hour: int, minute: int = 0, tz: str = "Asia/Shanghai"):
+        self.hour = hour
+        self.minute = minute
+        self.tz = ZoneInfo(tz)
+
+    def next_after(self, moment: datetime.datetime) -> datetime.datetime:
+        local = moment.astimezone(self.tz)
+        run = local.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        if run <= local:
+            run = (local + datetime.timedelta(days=1)).replace(
+                hour=self.hour, minute=self.minute, second=0, microsecond=0
+            )
+        return run.astimezone(datetime.timezone.utc)
+
+
+class Every:
+    """Каждые seconds секунд от предыдущего запуска."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def next_after(self, moment: datetime.datetime) -> datetime.datetime:
+        return moment + datetime.timedelta(seconds=self.seconds)
+
+
+class JobScheduler:
+    """
+    Периодические задачи с состоянием в таблице scheduled_jobs.
+
+    Цикл спит до ближайшего next_run_at (не дольше MAX_SLEEP) и запускает
+    все задачи, срок которых наступил. Если бот был остановлен в момент
+    запуска, задача выполняется сразу после старта — один раз, сколько бы
+    запусков ни было пропущено. Задачу выполняет только тот экземпляр,
+    который взял pg_try_advisory_lock; после выполнения next_run_at
+    сдвигается на следующий срок после текущего момента, а после ошибки —
+    не дальше чем на JOB_RETRY_DELAY (ежедневная задача не ждёт сутки).
+    """
+
+    def __init__(self):
+        self._jobs: Dict[str, Tuple[JobFunc, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, name: str, func: JobFunc, schedule) -> None:
+        """func(bot) — корутина; schedule — DailyAt / Every."""
+        self._jobs[name] = (func, schedule)
+
+    async def start(self, bot) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop(bot))
+
+    async def close(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _sync(self, conn) -> Dict[str, datetime.datetime]:
+        """Регистрирует новые задачи и возвращает next_run_at всех зарегистрированных."""
+        now = _utcnow()
+        names = list(self._jobs)
+        await conn.execute(
+            """
+            INSERT INTO scheduled_jobs (name, next_run_at)
+            SELECT * FROM unnest($1::TEXT[], $2::TIMESTAMPTZ[])
+            ON CONFLICT (name) DO NOTHING
+            """,
+            names, [self._jobs[n][1].next_after(now) for n in names]
+        )
+        rows = await conn.fetch(
+            "SELECT name, next_run_at FROM scheduled_jobs WHERE name = ANY($1::TEXT[])",
+            names
+        )
+        return {r["name"]: r["next_run_at"] for r in rows}
+
+    async def _loop(self, bot) -> None:
+        while True:
+            try:
+                async with db.db_pool.acquire() as conn:
+                    schedule = await self._sync(conn)
+                now = _utcnow()
+                for name, due in sorted(schedule.items(), key=lambda kv: kv[1]):
+                    if due <= now:
+                        await self.run_job(bot, name)
+                        now = _utcnow()
+                async with db.db_pool.acquire() as conn:
+                    schedule = await self._sync(conn)
+                nearest = min(schedule.values(), default=None)
+                delay = MAX_SLEEP
+                if nearest is not None:
+                    delay = min(MAX_SLEEP, max(1.0, (nearest - _utcnow()).total_seconds()))
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Ошибка в планировщике задач: %s", e)
+                await asyncio.sleep(ERROR_SLEEP)
+
+    async def run_job(self, bot, name: str) -> bool:
+        """
+        Выполнить задачу, если её срок наступил и её не выполняет другой экземпляр.
+        Возвращает True, если задача запускалась.
+        """
+        func, schedule = self._jobs[name]
+        async with db.db_pool.acquire() as conn:
+            locked = await conn.fetchval(
+                "SELECT pg_try_advisory_lock($1, hashtext($2))", JOB_LOCK_CLASS, name
+            )
+            if not locked:
+                return False
+            try:
+                due = await conn.fetchval(
+                    "SELECT next_run_at FROM scheduled_jobs WHERE name=$1", name
+                )
+                # пока ждали блокировку, задачу мог выполнить другой экземпляр
+                if due is None or due > _utcnow():
+                    return False
+
+                logger.info("Запуск задачи %s (срок %s)", name, due)
+                status, error = "ok", None
+                try:
+                    await func(bot)
+                except Exception as e:
+                    logger.exception("Задача %s завершилась с ошибкой", name)
+                    status, error = "error", str(e)
+
+                finished = _utcnow()
+                next_run = schedule.next_after(finished)
+                if status == "error":
+                    next_run = min(next_run, finished + datetime.timedelta(seconds=JOB_RETRY_DELAY))
+                await conn.execute(
+                    """
+                    UPDATE scheduled_jobs
+                    SET next_run_at=$2, last_run_at=$3, last_status=$4,
+                        last_error=$5, updated_at=NOW()
+                    WHERE name=$1
+                    """,
+                    name, next_run, finished, status, error
+                )
+                return True
+            finally:
+                await conn.execute(
+                    "SELECT pg_advisory_unlock($1, hashtext($2))", JOB_LOCK_CLASS, name
+                )
+
+
+job_scheduler = JobScheduler()
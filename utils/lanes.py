@@ -0,0 +1,130 @@
+# utils/lanes.py
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Set
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, Message
+
+logger = logging.getLogger(__name__)
+
+# Ответ пользователю, когда его запрос отброшен из-за нагрузки
+BUSY_TEXT = "⏳ Сейчас много запросов, попробуйте через минуту."
+
+
+class Lane:
+    """
+    Полоса обработки апдейтов: не больше limit хендлеров одновременно.
+
+    Если полоса занята:
+      - queue_limit=None — хендлер ждёт своей очереди (бронь, админка:
+        такую работу нельзя терять);
+      - иначе хендлер откладывается в фоновую задачу (ingress-воркер
+        освобождается сразу), а сверх queue_limit отложенных —
+        отбрасывается с коротким ответом пользователю.
+    """
+
+    def __init__(self, name: str, limit: int, queue_limit: Optional[int] = None):
+        self.name = name
+        self.limit = limit
+        self.queue_limit = queue_limit
+        self._sem = asyncio.Semaphore(limit)
+        self._deferred: Set[asyncio.Task] = set()
+        self.running = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.completed = 0
+        self.deferred = 0
+        self.dropped = 0
+
+    @property
+    def busy(self) -> bool:
+        return self.running >= self.limit
+
+    @property
+    def pending(self) -> int:
+        """Отложенные хендлеры, ещё не завершившиеся."""
+        return len(self._deferred)
+
+    async def run(self, handler, event, data):
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await self._sem.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        try:
+            return await handler(event, data)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._sem.release()
+
+    def defer(self, handler, event, data) -> None:
+        self.deferred += 1
+        task = asyncio.create_task(self._run_deferred(handler, event, data))
+        self._deferred.add(task)
+        task.add_done_callback(self._deferred.discard)
+
+    async def _run_deferred(self, handler, event, data):
+        try:
+            await self.run(handler, event, data)
+        except Exception as e:
+            logger.error("Ошибка отложенного хендлера (%s): %s", self.name, e)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "waiting": self.waiting,
+            "pending": self.pending,
+            "max_waiting": self.max_waiting,
+            "completed": self.completed,
+            "deferred": self.deferred,
+            "dropped": self.dropped,
+        }
+
+
+class LaneMiddleware(BaseMiddleware):
+    """Inner-middleware роутера: все его хендлеры (и вложенных роутеров) идут через полосу."""
+
+    def __init__(self, lane: Lane):
+        self.lane = lane
+
+    async def __call__(self, handler, event, data):
+        lane = self.lane
+        if lane.queue_limit is None or not lane.busy:
+            return await lane.run(handler, event, data)
+        if lane.pending < lane.queue_limit:
+            lane.defer(handler, event, data)
+            return None
+        lane.dropped += 1
+        logger.warning("Полоса %s перегружена — апдейт отброшен", lane.name)
+        await _answer_busy(event)
+        return None
+
+
+async def _answer_busy(event):
+    try:
+        if isinstance(event, CallbackQuery):
+            await event.answer(BUSY_TEXT, show_alert=True)
+        elif isinstance(event, Message):
+            await event.answer(BUSY_TEXT)
+    except Exception as e:
+        logger.debug("Не удалось ответить об отказе: %s", e)
+
+
+# Бронь и оплаты — ждут, не теряются
+CRITICAL = Lane("critical", limit=100)
+# Админские сценарии (/money, /users, /clean, salary, сброс дня)
+ADMIN = Lane("admin", limit=20)
+# GPT, голос, изображения, таро — откладываются и отбрасываются под нагрузкой
+AI = Lane("ai", limit=3, queue_limit=20)
+
+LANES = (CRITICAL, ADMIN, AI)
+
+
+def lanes_snapshot() -> Dict[str, Dict[str, Any]]:
+    """Метрики всех полос: глубина очереди, отложенные и отброшенные апдейты."""
+    return {lane.name: lane.snapshot() for lane in LANES}
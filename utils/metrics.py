@@ -0,0 +1,92 @@
+# utils/metrics.py
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from utils.lanes import lanes_snapshot
+from utils.openai_client import openai_client
+from utils.send_scheduler import send_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Как часто метрики процесса пишутся в лог
+METRICS_INTERVAL = 300
+
+
+def collect() -> Dict[str, Any]:
+    """Метрики полос обработки, очереди отправок и OpenAI одним словарём."""
+    return {
+        "lanes": lanes_snapshot(),
+        "send": send_scheduler.snapshot(),
+        "openai": openai_client.snapshot(),
+    }
+
+
+def format_text(data: Optional[Dict[str, Any]] = None) -> str:
+    """Краткая сводка для админа (/stats)."""
+    data = data or collect()
+    lines = ["Полосы:"]
+    for name, s in data["lanes"].items():
+        lines.append(
+            f"  {name}: в работе {s['running']}, ждут {s['waiting']} (макс. {s['max_waiting']}), "
+            f"отложено {s['pending']}/{s['deferred']}, отброшено {s['dropped']}, "
+            f"выполнено {s['completed']}"
+        )
+    send = data["send"]
+    depth = ", ".join(f"{k} {v}" for k, v in send["queue_depth"].items())
+    max_wait = ", ".join(f"{k} {v:.1f}с" for k, v in send["max_wait"].items())
+    lines += [
+        "Отправка в Telegram:",
+        f"  очередь: {depth}",
+        f"  макс. ожидание: {max_wait}",
+        f"  RetryAfter: {send['retry_after']}",
+    ]
+    if data["openai"]:
+        lines.append("OpenAI:")
+        for model, s in data["openai"].items():
+            avg = s["latency_total"] / s["calls"] if s["calls"] else 0.0
+            lines.append(
+                f"  {model}: вызовов {s['calls']}, ошибок {s['errors']}, повторов {s['retries']}, "
+                f"ср. {avg:.1f}с / макс. {s['latency_max']:.1f}с, "
+                f"токены {s['prompt_tokens']}+{s['completion_tokens']}"
+            )
+    return "\n".join(lines)
+
+
+class MetricsLogger:
+    """
+    Периодически пишет метрики процесса в лог. Метрики живут в памяти
+    каждого экземпляра бота, поэтому это локальный цикл, а не задача
+    job_scheduler (её выполняет только один экземпляр).
+    """
+
+    def __init__(self, interval: float = METRICS_INTERVAL):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.log()
+
+    def log(self) -> None:
+        try:
+            logger.info("Метрики: %s", json.dumps(collect(), ensure_ascii=False, default=str))
+        except Exception as e:
+            logger.error(f"Не удалось собрать метрики: {e}")
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            self.log()
+
+
+metrics_logger = MetricsLogger()
@@ -0,0 +1,45 @@
+# utils/middlewares.py
+
+import logging
+
+from aiogram import BaseMiddleware
+
+from config import is_user_admin
+from constants.languages import DEFAULT_LANGUAGE
+from utils.user_context import UserContext, user_contexts
+
+logger = logging.getLogger(__name__)
+
+
+class IgnoreSelfMiddleware(BaseMiddleware):
+    """
+    Outer-middleware диспетчера: события от самого бота не доходят до хендлеров.
+    ID бота берётся из bot.id (он зашит в токене), поэтому get_me() не нужен.
+    """
+
+    async def __call__(self, handler, event, data):
+        user = getattr(event, "from_user", None)
+        bot = data.get("bot")
+        if user is not None and bot is not None and user.id == bot.id:
+            return None
+        return await handler(event, data)
+
+
+class UserContextMiddleware(BaseMiddleware):
+    """
+    Outer-middleware: один раз на апдейт собирает UserContext (язык, админ,
+    имя, эмодзи) и кладёт его в data["user_ctx"] — хендлер получает его
+    аргументом user_ctx. Заодно прогревает кэш для get_user_language.
+    Если БД недоступна, кладётся контекст по умолчанию: хендлеры,
+    объявившие user_ctx, получают его всегда.
+    """
+
+    async def __call__(self, handler, event, data):
+        user = data.get("event_from_user")
+        if user is not None:
+            try:
+                data["user_ctx"] = await user_contexts.get(user.id)
+            except Exception as e:
+                logger.error(f"Не удалось загрузить контекст пользователя {user.id}: {e}")
+                data["user_ctx"] = UserContext(user.id, DEFAULT_LANGUAGE, is_user_admin(user.id))
+        return await handler(event, data)
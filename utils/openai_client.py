@@ -0,0 +1,244 @@
+# utils/openai_client.py
+
+import asyncio
+import json as jsonlib
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import aiohttp
+
+from config import OPENAI_API_KEY
+
+logger = logging.getLogger(__name__)
+
+API_BASE = "https://api.openai.com/v1"
+
+# Одновременных запросов к OpenAI на весь бот
+MAX_CONCURRENCY = 8
+# Ограничения по моделям (тяжёлые модели — меньше параллельных запросов)
+MODEL_LIMITS = {
+    "dall-e-3": 2,
+    "gpt-4o-mini-tts": 3,
+    "whisper-1": 3,
+}
+DEFAULT_MODEL_LIMIT = 4
+
+REQUEST_TIMEOUT = 120
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 20.0
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class OpenAIError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(f"OpenAI {status}: {message}")
+        self.status = status
+
+
+class OpenAIClient:
+    """
+    Общий асинхронный клиент OpenAI для всех AI-функций бота.
+
+    Один пул HTTP-соединений (aiohttp), общий семафор на MAX_CONCURRENCY
+    запросов и семафоры по моделям. Ответы 429/5xx и сетевые ошибки
+    повторяются с экспоненциальной задержкой и случайным джиттером
+    (Retry-After учитывается). По каждой модели копятся метрики: число
+    вызовов, ошибок и повторов, задержка, токены.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, max_concurrency: int = MAX_CONCURRENCY,
+                 model_limits: Optional[Dict[str, int]] = None, timeout: float = REQUEST_TIMEOUT,
+                 max_retries: int = MAX_RETRIES):
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.model_limits = dict(MODEL_LIMITS if model_limits is None else model_limits)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._global: Optional[asyncio.Semaphore] = None
+        self._per_model: Dict[str, asyncio.Semaphore] = {}
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    # ───── инфраструктура ─────
+    def _http(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"Authorization": f"Bearer {self.api_key or OPENAI_API_KEY}"},
+            )
+        return self._session
+
+    def _model_sem(self, model: str) -> asyncio.Semaphore:
+        sem = self._per_model.get(model)
+        if sem is None:
+            sem = self._per_model[model] = asyncio.Semaphore(
+                self.model_limits.get(model, DEFAULT_MODEL_LIMIT)
+            )
+        return sem
+
+    def _stat(self, model: str) -> Dict[str, float]:
+        s = self.stats.get(model)
+        if s is None:
+            s = self.stats[model] = {
+                "calls": 0, "errors": 0, "retries": 0,
+                "latency_total": 0.0, "latency_max": 0.0,
+                "prompt_tokens": 0, "completion_tokens": 0,
+            }
+        return s
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return min(BACKOFF_MAX, float(retry_after))
+            except ValueError:
+                pass
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Метрики по моделям (средняя задержка — latency_total / calls)."""
+        return {m: dict(s) for m, s in self.stats.items()}
+
+    def _record(self, stat: Dict[str, float], started: float, usage: Optional[dict]) -> None:
+        elapsed = time.monotonic() - started
+        stat["calls"] += 1
+        stat["latency_total"] += elapsed
+        stat["latency_max"] = max(stat["latency_max"], elapsed)
+        if usage:
+            stat["prompt_tokens"] += usage.get("prompt_tokens", 0)
+            stat["completion_tokens"] += usage.get("completion_tokens", 0)
+
+    @asynccontextmanager
+    async def _response(self, method: str, path: str, model: str, *, json: Any = None,
+                        data: Any = None):
+        """
+        Успешный ответ (status < 400) под семафорами с повторами.
+        Слоты берутся на каждую попытку и отпускаются на время паузы
+        между повторами; на время чтения тела они остаются занятыми.
+        Повторяется только установка ответа: ошибка при чтении уже
+        отданного тела пробрасывается как есть.
+        """
+        if self._global is None:
+            self._global = asyncio.Semaphore(self.max_concurrency)
+        stat = self._stat(model)
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            yielded = False
+            async with self._model_sem(model), self._global:
+                try:
+                    body = data() if callable(data) else data
+                    async with self._http().request(method, API_BASE + path, json=json, data=body) as resp:
+                        if resp.status < 400:
+                            yielded = True
+                            yield resp
+                            return
+                        text = await resp.text()
+                        if resp.status not in RETRY_STATUSES or attempt == self.max_retries:
+                            stat["errors"] += 1
+                            raise OpenAIError(resp.status, text[:500])
+                        retry_after = resp.headers.get("Retry-After")
+                        logger.warning("OpenAI %s %s → %s, повтор %s", model, path, resp.status, attempt + 1)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    if yielded or attempt == self.max_retries:
+                        stat["errors"] += 1
+                        raise
+                    logger.warning("OpenAI %s %s: %s, повтор %s", model, path, e, attempt + 1)
+            stat["retries"] += 1
+            await asyncio.sleep(self._backoff(attempt, retry_after))
+
+    async def _request(self, method: str, path: str, model: str, *, json: Any = None,
+                       data: Any = None, raw: bool = False) -> Any:
+        started = time.monotonic()
+        async with self._response(method, path, model, json=json, data=data) as resp:
+            result = await resp.read() if raw else await resp.json()
+        usage = result.get("usage") if isinstance(result, dict) else None
+        self._record(self._stat(model), started, usage)
+        return result
+
+    # ───── API ─────
+    async def chat(self, messages: List[Dict[str, Any]], model: str = "gpt-4o", **params) -> str:
+        """ChatCompletion; возвращает текст первого ответа."""
+        resp = await self._request(
+            "POST", "/chat/completions", model,
+            json={"model": model, "messages": messages, **params},
+        )
+        return resp["choices"][0]["message"]["content"]
+
+    async def chat_stream(self, messages: List[Dict[str, Any]], model: str = "gpt-4o",
+                          **params) -> AsyncIterator[str]:
+        """
+        ChatCompletion со stream=True: отдаёт куски текста по мере генерации
+        (Server-Sent Events). Слот модели занят до конца потока.
+        """
+        started = time.monotonic()
+        usage = None
+        payload = {
+            "model": model, "messages": messages, "stream": True,
+            "stream_options": {"include_usage": True}, **params,
+        }
+        async with self._response("POST", "/chat/completions", model, json=payload) as resp:
+            async for line in resp.content:
+                line = line.strip()
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    break
+                chunk = jsonlib.loads(data)
+                usage = chunk.get("usage") or usage
+                for choice in chunk.get("choices") or ():
+                    delta = (choice.get("delta") or {}).get("content")
+                    if delta:
+                        yield delta
+        self._record(self._stat(model), started, usage)
+
+    async def transcribe(self, path: str, model: str = "whisper-1") -> str:
+        with open(path, "rb") as f:
+            audio = f.read()
+
+        def form():
+            # FormData одноразовая — собираем заново на каждую попытку
+            fd = aiohttp.FormData()
+            fd.add_field("model", model)
+            fd.add_field("file", audio, filename=path.rsplit("/", 1)[-1])
+            return fd
+
+        resp = await self._request("POST", "/audio/transcriptions", model, data=form)
+        return resp["text"]
+
+    async def speech(self, text: str, model: str = "gpt-4o-mini-tts", voice: str = "ash",
+                     response_format: str = "mp3") -> bytes:
+        return await self._request(
+            "POST", "/audio/speech", model, raw=True,
+            json={"model": model, "input": text, "voice": voice, "response_format": response_format},
+        )
+
+    async def image(self, prompt: str, model: str = "dall-e-3", **params) -> str:
+        """Генерация изображения; возвращает URL."""
+        resp = await self._request(
+            "POST", "/images/generations", model,
+            json={"model": model, "prompt": prompt, "n": 1, **params},
+        )
+        return resp["data"][0]["url"]
+
+    async def embedding(self, text: str, model: str = "text-embedding-3-large") -> List[float]:
+        resp = await self._request(
+            "POST", "/embeddings", model, json={"model": model, "input": text},
+        )
+        return resp["data"][0]["embedding"]
+
+    async def list_models(self) -> List[str]:
+        resp = await self._request("GET", "/models", "models")
+        return [m["id"] for m in resp.get("data", [])]
+
+
+openai_client = OpenAIClient()
@@ -0,0 +1,184 @@
+# utils/pg_storage.py
+
+import asyncio
+import json
+import logging
+import time
+from copy import copy
+from typing import Any, Dict, Optional, Set
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+
+import db
+
+logger = logging.getLogger(__name__)
+
+# Брошенный сценарий (нет изменений за это время) удаляется
+FSM_TTL = 24 * 3600
+# Как часто изменения пишутся в БД
+FLUSH_INTERVAL = 1.0
+# Как часто ищутся брошенные сценарии
+EXPIRE_INTERVAL = 600
+
+
+class _Record:
+    __slots__ = ("state", "data", "touched")
+
+    def __init__(self):
+        self.state: Optional[str] = None
+        self.data: Dict[str, Any] = {}
+        self.touched = time.time()
+
+
+class PgStorage(BaseStorage):
+    """
+    FSM-хранилище aiogram поверх таблицы fsm_storage.
+
+    Все записи живут в памяти процесса: get_state/get_data не обращаются
+    к БД. При старте (start) загружаются незаброшенные записи, изменения
+    помечаются грязными и раз в FLUSH_INTERVAL пишутся в БД одной пачкой
+    (UPSERT через unnest; пустые записи удаляются). Сценарии без изменений
+    дольше FSM_TTL удаляются из памяти и из таблицы. Рассчитано на один
+    процесс на токен (как и long polling): кэш между процессами не
+    согласуется.
+    """
+
+    def __init__(self, ttl: float = FSM_TTL, flush_interval: float = FLUSH_INTERVAL,
+                 key_builder: Optional[KeyBuilder] = None):
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.key_builder = key_builder or DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+        self._records: Dict[str, _Record] = {}
+        self._dirty: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._last_expire = time.monotonic()
+
+    def _key(self, key: StorageKey) -> str:
+        return self.key_builder.build(key)
+
+    def _touch(self, key: StorageKey) -> _Record:
+        k = self._key(key)
+        rec = self._records.get(k)
+        if rec is None:
+            rec = self._records[k] = _Record()
+        rec.touched = time.time()
+        self._dirty.add(k)
+        return rec
+
+    # ───── BaseStorage ─────
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        self._touch(key).state = state.state if isinstance(state, State) else state
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        rec = self._records.get(self._key(key))
+        return rec.state if rec else None
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        self._touch(key).data = data.copy()
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        rec = self._records.get(self._key(key))
+        return rec.data.copy() if rec else {}
+
+    async def get_value(self, storage_key: StorageKey, dict_key: str,
+                        default: Optional[Any] = None) -> Optional[Any]:
+        rec = self._records.get(self._key(storage_key))
+        return copy(rec.data.get(dict_key, default)) if rec else default
+
+    async def close(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await self.flush()
+
+    # ───── БД ─────
+    async def start(self) -> None:
+        """Загрузить сохранённые сценарии и запустить фоновую запись."""
+        if db.db_pool:
+            async with db.db_pool.acquire() as conn:
+                rows = await conn.fetch(
+                    """
+                    SELECT key, state, data::TEXT AS data, EXTRACT(EPOCH FROM updated_at) AS ts
+                    FROM fsm_storage
+                    WHERE updated_at > NOW() - make_interval(secs => $1)
+                    """,
+                    float(self.ttl)
+                )
+            for r in rows:
+                if r["key"] in self._records:
+                    continue
+                rec = _Record()
+                rec.state = r["state"]
+                rec.data = json.loads(r["data"])
+                rec.touched = float(r["ts"])
+                self._records[r["key"]] = rec
+            logger.info("Загружено состояний FSM: %s", len(rows))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._writer())
+
+    async def flush(self) -> None:
+        """Записать накопленные изменения одной пачкой."""
+        if not self._dirty or not db.db_pool:
+            return
+        keys, self._dirty = self._dirty, set()
+        upsert, delete = [], []
+        for k in keys:
+            rec = self._records.get(k)
+            if rec is None or (rec.state is None and not rec.data):
+                self._records.pop(k, None)
+                delete.append(k)
+            else:
+                upsert.append((k, rec.state, json.dumps(rec.data, default=str), rec.touched))
+        try:
+            async with db.db_pool.acquire() as conn:
+                async with conn.transaction():
+                    if upsert:
+                        await conn.execute(
+                            """
+                            INSERT INTO fsm_storage (key, state, data, updated_at)
+                            SELECT k, s, d::JSONB, to_timestamp(t)
+                            FROM unnest($1::TEXT[], $2::TEXT[], $3::TEXT[], $4::FLOAT8[])
+                                 AS u(k, s, d, t)
+                            ON CONFLICT (key) DO UPDATE
+                              SET state = EXCLUDED.state, data = EXCLUDED.data,
+                                  updated_at = EXCLUDED.updated_at
+                            """,
+                            [u[0] for u in upsert], [u[1] for u in upsert],
+                            [u[2] for u in upsert], [u[3] for u in upsert]
+                        )
+                    if delete:
+                        await conn.execute("DELETE FROM fsm_storage WHERE key = ANY($1::TEXT[])", delete)
+        except Exception as e:
+            logger.warning("Не удалось сохранить состояния FSM: %s", e)
+            # повторим при следующей записи
+            self._dirty |= keys
+
+    async def expire(self) -> int:
+        """Удалить сценарии без изменений дольше ttl; возвращает их число."""
+        cutoff = time.time() - self.ttl
+        stale = [k for k, rec in self._records.items() if rec.touched < cutoff]
+        for k in stale:
+            del self._records[k]
+            self._dirty.discard(k)
+        if db.db_pool:
+            async with db.db_pool.acquire() as conn:
+                await conn.execute(
+                    "DELETE FROM fsm_storage WHERE updated_at < NOW() - make_interval(secs => $1)",
+                    float(self.ttl)
+                )
+        return len(stale)
+
+    async def _writer(self) -> None:
+        while True:
+            try:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+                if time.monotonic() - self._last_expire > EXPIRE_INTERVAL:
+                    self._last_expire = time.monotonic()
+                    await self.expire()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Ошибка фоновой записи FSM: %s", e)
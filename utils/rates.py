@@ -0,0 +1,206 @@
+# utils/rates.py
+
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, Optional, Sequence
+
+import aiohttp
+import numpy as np
+
+import db
+
+logger = logging.getLogger(__name__)
+
+FIAT_URL = "https://open.er-api.com/v6/latest/USD"
+USDT_URL = "https://api.coingecko.com/api/v3/simple/price?ids=tether&vs_currencies=usd"
+FIAT_CODES = ("RUB", "UAH", "CNY", "EUR")
+
+# Курсы старше — обновляются в фоне (старые отдаются, пока идёт запрос)
+RATES_TTL = 600
+# Период фонового обновления
+REFRESH_INTERVAL = 600
+REQUEST_TIMEOUT = 10
+
+
+class CrossRates:
+    """
+    Матрица кросс-курсов: matrix[i, j] — сколько codes[j] за 1 codes[i].
+    Строится один раз на снимок курсов; version меняется вместе со снимком.
+    """
+
+    def __init__(self, usd_rates: Dict[str, float], version: float):
+        self.codes = tuple(code for code, r in usd_rates.items() if r)
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        per_usd = np.array([usd_rates[c] for c in self.codes], dtype=np.float64)
+        self.matrix = per_usd[np.newaxis, :] / per_usd[:, np.newaxis]
+        self.version = version
+
+    def row(self, base: str) -> Dict[str, float]:
+        i = self.index.get(base)
+        if i is None:
+            return {}
+        return dict(zip(self.codes, self.matrix[i].tolist()))
+
+    def convert(self, amounts: Sequence[float], bases: Sequence[str]) -> np.ndarray:
+        """Все суммы во все валюты одной операцией: результат (len(amounts), len(codes))."""
+        idx = np.fromiter((self.index[b] for b in bases), dtype=np.intp, count=len(bases))
+        return np.asarray(amounts, dtype=np.float64)[:, np.newaxis] * self.matrix[idx]
+
+
+class RateService:
+    """
+    Курсы валют к USD (сколько единиц валюты за 1 USD).
+
+    get() отдаёт курсы из памяти без сетевых запросов. Если они старше
+    RATES_TTL, запускается одно фоновое обновление (stale-while-revalidate);
+    ждать сеть приходится только при самом первом обращении, когда курсов
+    нет ни в памяти, ни в rate_snapshots. Источники (open.er-api.com и
+    CoinGecko) запрашиваются параллельно через общую aiohttp-сессию;
+    при отказе источника остаются его прежние курсы. Удачный снимок
+    сохраняется в БД и подхватывается при старте; на каждый снимок
+    один раз строится матрица кросс-курсов (cross).
+    """
+
+    def __init__(self, ttl: float = RATES_TTL, refresh_interval: float = REFRESH_INTERVAL):
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self.rates: Dict[str, float] = {}
+        self.fetched_at = 0.0
+        self.cross: Optional[CrossRates] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._refreshing: Optional[asyncio.Task] = None
+        self._loop_task: Optional[asyncio.Task] = None
+
+    # ───── жизненный цикл ─────
+    async def start(self) -> None:
+        await self._load_snapshot()
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._refresh_loop())
+
+    async def close(self) -> None:
+        for task in (self._loop_task, self._refreshing):
+            if task is not None and not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._loop_task = self._refreshing = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _http(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+            )
+        return self._session
+
+    # ───── чтение ─────
+    async def get(self) -> Dict[str, float]:
+        await self._ensure_fresh()
+        return dict(self.rates)
+
+    async def get_cross(self) -> Optional[CrossRates]:
+        """Матрица кросс-курсов текущего снимка (None — курсов нет)."""
+        await self._ensure_fresh()
+        return self.cross
+
+    async def _ensure_fresh(self) -> None:
+        if not self.rates:
+            self.refresh_soon()
+            await asyncio.shield(self._refreshing)
+        elif time.time() - self.fetched_at > self.ttl:
+            self.refresh_soon()
+
+    def _set_rates(self, rates: Dict[str, float], fetched_at: float) -> None:
+        self.rates = rates
+        self.fetched_at = fetched_at
+        self.cross = CrossRates(rates, fetched_at) if rates else None
+
+    def refresh_soon(self) -> None:
+        """Фоновое обновление; параллельные вызовы сливаются в одно."""
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.create_task(self.refresh())
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error("Ошибка фонового обновления курсов: %s", e)
+            await asyncio.sleep(self.refresh_interval)
+
+    # ───── источники ─────
+    async def _fetch_json(self, url: str) -> Optional[dict]:
+        try:
+            async with self._http().get(url) as resp:
+                if resp.status == 200:
+                    return await resp.json(content_type=None)
+                logger.warning("%s ответил %s", url, resp.status)
+        except Exception as e:
+            logger.error("Ошибка запроса курсов %s: %s", url, e)
+        return None
+
+    async def _fetch_fiat(self) -> Dict[str, float]:
+        data = await self._fetch_json(FIAT_URL)
+        if not data:
+            return {}
+        rates = data.get("rates", {})
+        fiat = {code: float(rates[code]) for code in FIAT_CODES if rates.get(code)}
+        fiat["USD"] = 1.0
+        return fiat
+
+    async def _fetch_usdt(self) -> Dict[str, float]:
+        data = await self._fetch_json(USDT_URL)
+        usd_value = (data or {}).get("tether", {}).get("usd")
+        if usd_value:
+            return {"USDT": 1.0 / float(usd_value)}
+        return {}
+
+    async def refresh(self) -> Dict[str, float]:
+        fiat, usdt = await asyncio.gather(self._fetch_fiat(), self._fetch_usdt())
+        fresh = {**fiat, **usdt}
+        if not fresh:
+            logger.warning("Курсы не обновлены — используются последние сохранённые")
+            return dict(self.rates)
+        self._set_rates({**self.rates, **fresh}, time.time())
+        logger.info("Курсы валют обновлены: %s", self.rates)
+        await self._save_snapshot()
+        return dict(self.rates)
+
+    # ───── снимок в БД ─────
+    async def _load_snapshot(self) -> None:
+        if not db.db_pool or self.rates:
+            return
+        try:
+            async with db.db_pool.acquire() as conn:
+                row = await conn.fetchrow(
+                    "SELECT rates::TEXT AS rates, EXTRACT(EPOCH FROM fetched_at) AS ts "
+                    "FROM rate_snapshots WHERE base='USD'"
+                )
+        except Exception as e:
+            logger.warning("Не удалось прочитать сохранённые курсы: %s", e)
+            return
+        if row:
+            self._set_rates(json.loads(row["rates"]), float(row["ts"]))
+
+    async def _save_snapshot(self) -> None:
+        if not db.db_pool:
+            return
+        try:
+            async with db.db_pool.acquire() as conn:
+                await conn.execute(
+                    """
+                    INSERT INTO rate_snapshots (base, rates, fetched_at)
+                    VALUES ('USD', $1::JSONB, to_timestamp($2))
+                    ON CONFLICT (base) DO UPDATE
+                      SET rates = EXCLUDED.rates, fetched_at = EXCLUDED.fetched_at
+                    """,
+                    json.dumps(self.rates), self.fetched_at
+                )
+        except Exception as e:
+            logger.warning("Не удалось сохранить курсы: %s", e)
+
+
+rate_service = RateService()
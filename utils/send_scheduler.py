@@ -0,0 +1,291 @@
+# utils/send_scheduler.py
+
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Dict, List, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+
+logger = logging.getLogger(__name__)
+
+# Лимиты Telegram: ~30 сообщений/сек на бота, ~1/сек в личный чат, ~20/мин в группу
+GLOBAL_RATE, GLOBAL_BURST = 30.0, 30
+PRIVATE_RATE, PRIVATE_BURST = 1.0, 3
+GROUP_RATE, GROUP_BURST = 20 / 60, 5
+# Правки, удаления, закрепы не считаются «сообщениями» в лимитах выше —
+# у них свой, более свободный бакет на чат (плюс общий на бота)
+SERVICE_RATE, SERVICE_BURST = 5.0, 10
+
+# Методы, создающие новые сообщения в чате
+_SEND_PREFIXES = ("Send", "Forward", "Copy")
+
+# Сколько раз повторяем запрос после TelegramRetryAfter
+MAX_RETRIES = 3
+
+
+class Priority(IntEnum):
+    """Полосы очереди: меньше — раньше."""
+    HIGH = 0     # ответы пользователю в сценарии брони
+    NORMAL = 1
+    LOW = 2      # отчёты, табло групп, GPT
+    BULK = 3     # удаления сообщений / уборка
+
+
+_priority: ContextVar[Optional[Priority]] = ContextVar("send_priority", default=None)
+
+
+def set_send_priority(priority: Priority) -> None:
+    """Приоритет всех отправок до конца текущего хендлера (задачи)."""
+    _priority.set(priority)
+
+
+@contextmanager
+def send_priority(priority: Priority):
+    """Приоритет отправок внутри блока with."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class PriorityMiddleware(BaseMiddleware):
+    """Задаёт приоритет отправок для всех хендлеров роутера."""
+
+    def __init__(self, priority: Priority):
+        self.priority = priority
+
+    async def __call__(self, handler, event, data):
+        with send_priority(self.priority):
+            return await handler(event, data)
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated", "blocked_until")
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Через сколько секунд будет доступен токен (0 — уже доступен)."""
+        self._refill(now)
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        return max(wait, self.blocked_until - now)
+
+    def consume(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def block(self, seconds: float):
+        """Telegram попросил подождать (RetryAfter) — бакет закрыт до now + seconds."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+    def is_idle(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity and self.blocked_until <= now
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "chat_id", "future", "enqueued")
+
+    def __init__(self, priority: Priority, seq: int, chat_id: Any, future: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.chat_id = chat_id
+        self.future = future
+        self.enqueued = time.monotonic()
+
+
+class SendScheduler(BaseRequestMiddleware):
+    """
+    Глобальный планировщик исходящих запросов к Telegram.
+
+    Подключается к сессии бота (bot.session.middleware(...)) и пропускает
+    все запросы с chat_id через token bucket на чат и общий на бота.
+    Отправки (send*/forward*/copy*) расходуют лимит сообщений чата,
+    правки/удаления/закрепы — отдельный бакет чата с SERVICE_RATE. Ожидающие запросы выдаются по приоритету
+    (Priority, задаётся ContextVar), внутри полосы — по очереди. Запрос,
+    получивший TelegramRetryAfter, закрывает бакет своего чата на указанное
+    время и повторяется автоматически.
+    """
+
+    def __init__(self):
+        self.global_bucket = TokenBucket(GLOBAL_RATE, GLOBAL_BURST)
+        self.chat_buckets: Dict[Any, TokenBucket] = {}
+        self._waiters: List[_Waiter] = []
+        self._seq = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        # метрики по полосам
+        self.sent = {p: 0 for p in Priority}
+        self.wait_total = {p: 0.0 for p in Priority}
+        self.wait_max = {p: 0.0 for p in Priority}
+        self.retry_after_count = 0
+
+    # ───── middleware ─────
+    @staticmethod
+    def _is_limited(method) -> bool:
+        return (
+            getattr(method, "chat_id", None) is not None
+            and not type(method).__name__.startswith("Get")
+        )
+
+    @staticmethod
+    def _bucket_key(method):
+        """chat_id для отправок, ("service", chat_id) — для остальных методов."""
+        if type(method).__name__.startswith(_SEND_PREFIXES):
+            return method.chat_id
+        return ("service", method.chat_id)
+
+    @staticmethod
+    def _default_priority(method) -> Priority:
+        if type(method).__name__.startswith("Delete"):
+            return Priority.BULK
+        return Priority.NORMAL
+
+    async def __call__(self, make_request, bot, method):
+        if not self._is_limited(method):
+            return await make_request(bot, method)
+
+        chat_id = method.chat_id
+        key = self._bucket_key(method)
+        priority = _priority.get()
+        if priority is None:
+            priority = self._default_priority(method)
+        for attempt in range(MAX_RETRIES + 1):
+            await self._acquire(key, priority)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                self.retry_after_count += 1
+                logger.warning(
+                    "Flood limit в чате %s: ждём %s с (попытка %s)", chat_id, e.retry_after, attempt + 1
+                )
+                self._chat_bucket(key).block(e.retry_after)
+                if attempt == MAX_RETRIES:
+                    raise
+
+    # ───── очередь ─────
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if isinstance(chat_id, tuple):
+                bucket = TokenBucket(SERVICE_RATE, SERVICE_BURST)
+            elif isinstance(chat_id, int) and chat_id > 0:
+                bucket = TokenBucket(PRIVATE_RATE, PRIVATE_BURST)
+            else:
+                bucket = TokenBucket(GROUP_RATE, GROUP_BURST)
+            self.chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def _acquire(self, chat_id, priority: Priority):
+        loop = asyncio.get_running_loop()
+        if (
+            self._loop_task is None
+            or self._loop_task.done()
+            or self._loop_task.get_loop() is not loop
+        ):
+            self._wakeup = asyncio.Event()
+            self._loop_task = asyncio.create_task(self._dispatch_loop())
+        self._seq += 1
+        waiter = _Waiter(priority, self._seq, chat_id, loop.create_future())
+        self._waiters.append(waiter)
+        self._wakeup.set()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    async def _dispatch_loop(self):
+        while True:
+            if not self._waiters:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            now = time.monotonic()
+            global_wait = self.global_bucket.delay(now)
+            if global_wait > 0:
+                await asyncio.sleep(global_wait)
+                continue
+
+            ready = None
+            next_wait = None
+            for w in sorted(self._waiters, key=lambda w: (w.priority, w.seq)):
+                wait = self._chat_bucket(w.chat_id).delay(now)
+                if wait <= 0:
+                    ready = w
+                    break
+                next_wait = wait if next_wait is None else min(next_wait, wait)
+
+            if ready is None:
+                # все ожидающие упёрлись в лимиты своих чатов — ждём токен или новый запрос
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=next_wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._waiters.remove(ready)
+            if ready.future.done():
+                continue
+            self.global_bucket.consume(now)
+            self._chat_bucket(ready.chat_id).consume(now)
+            waited = now - ready.enqueued
+            self.sent[ready.priority] += 1
+            self.wait_total[ready.priority] += waited
+            self.wait_max[ready.priority] = max(self.wait_max[ready.priority], waited)
+            ready.future.set_result(None)
+
+            if len(self.chat_buckets) > 10_000:
+                self.chat_buckets = {
+                    k: b for k, b in self.chat_buckets.items() if not b.is_idle(now)
+                }
+
+    async def close(self):
+        """Останавливает цикл выдачи (ожидающие запросы отменяются)."""
+        for w in self._waiters:
+            w.future.cancel()
+        self._waiters.clear()
+        if self._loop_task is not None and not self._loop_task.done():
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+        self._loop_task = None
+
+    # ───── метрики ─────
+    def snapshot(self) -> Dict[str, Any]:
+        """Глубина очереди и время ожидания по полосам."""
+        depth = {p.name: 0 for p in Priority}
+        for w in self._waiters:
+            depth[w.priority.name] += 1
+        return {
+            "queue_depth": depth,
+            "sent": {p.name: n for p, n in self.sent.items()},
+            "avg_wait": {
+                p.name: (self.wait_total[p] / self.sent[p]) if self.sent[p] else 0.0
+                for p in Priority
+            },
+            "max_wait": {p.name: w for p, w in self.wait_max.items()},
+            "retry_after": self.retry_after_count,
+        }
+
+
+send_scheduler = SendScheduler()
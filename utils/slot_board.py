@@ -0,0 +1,106 @@
+# utils/slot_board.py
+
+from typing import Dict, Iterable, List, Set
+
+from utils.time_utils import generate_daily_time_slots
+
+# Сетка слотов фиксирована, поэтому номера битов и маски соседей считаем один раз
+SLOTS: tuple[str, ...] = tuple(generate_daily_time_slots())
+SLOT_INDEX: Dict[str, int] = {slot: i for i, slot in enumerate(SLOTS)}
+SLOT_BITS: Dict[str, int] = {slot: 1 << i for i, slot in enumerate(SLOTS)}
+FULL_MASK: int = (1 << len(SLOTS)) - 1
+
+# Соседи слота (±30 минут) — это просто соседние биты
+ADJACENT_MASKS: Dict[str, int] = {
+    slot: ((bit << 1) | (bit >> 1)) & FULL_MASK for slot, bit in SLOT_BITS.items()
+}
+
+
+def neighbours(mask: int) -> int:
+    """Маска всех слотов, соседних хотя бы с одним слотом из mask."""
+    return ((mask << 1) | (mask >> 1)) & FULL_MASK
+
+
+def mask_from_slots(slots: Iterable[str]) -> int:
+    mask = 0
+    for slot in slots:
+        mask |= SLOT_BITS.get(slot, 0)
+    return mask
+
+
+def slots_from_mask(mask: int) -> List[str]:
+    """Слоты маски в порядке расписания."""
+    result = []
+    while mask:
+        low = mask & -mask
+        result.append(SLOTS[low.bit_length() - 1])
+        mask ^= low
+    return result
+
+
+class SlotBoard:
+    """
+    Занятость слотов одной группы: одна битовая маска забронированных
+    слотов на каждый день («Сегодня», «Завтра»).
+
+    Недоступные слоты (±30 минут от брони) не хранятся, а вычисляются
+    сдвигом маски, поэтому проверка конфликта, поиск свободных слотов
+    и снятие брони — это несколько битовых операций.
+    """
+    __slots__ = ("_booked",)
+
+    def __init__(self, booked: Dict[str, int] | None = None):
+        self._booked: Dict[str, int] = dict(booked or {})
+
+    @classmethod
+    def from_slots(cls, booked_slots: Dict[str, Iterable[str]]) -> "SlotBoard":
+        return cls({day: mask_from_slots(slots) for day, slots in booked_slots.items()})
+
+    # ───── чтение ─────
+    def booked_mask(self, day: str) -> int:
+        return self._booked.get(day, 0)
+
+    def unavailable_mask(self, day: str) -> int:
+        booked = self._booked.get(day, 0)
+        return neighbours(booked) & ~booked
+
+    def blocked_mask(self, day: str) -> int:
+        booked = self._booked.get(day, 0)
+        return booked | neighbours(booked)
+
+    def free_mask(self, day: str) -> int:
+        return FULL_MASK & ~self.blocked_mask(day)
+
+    def is_booked(self, day: str, slot: str) -> bool:
+        return bool(self._booked.get(day, 0) & SLOT_BITS.get(slot, 0))
+
+    def can_book(self, day: str, slot: str) -> bool:
+        bit = SLOT_BITS.get(slot, 0)
+        return bool(bit) and not (bit & self.blocked_mask(day))
+
+    def booked_slots(self, day: str) -> List[str]:
+        return slots_from_mask(self.booked_mask(day))
+
+    def unavailable_slots(self, day: str) -> Set[str]:
+        return set(slots_from_mask(self.unavailable_mask(day)))
+
+    def days(self) -> List[str]:
+        return list(self._booked)
+
+    # ───── изменение ─────
+    def book(self, day: str, slot: str) -> None:
+        self._booked[day] = self._booked.get(day, 0) | SLOT_BITS.get(slot, 0)
+
+    def release(self, day: str, slot: str) -> None:
+        self._booked[day] = self._booked.get(day, 0) & ~SLOT_BITS.get(slot, 0)
+
+    def clear(self, day: str | None = None) -> None:
+        if day is None:
+            self._booked = {d: 0 for d in self._booked}
+        else:
+            self._booked[day] = 0
+
+    def move_day(self, src: str, dst: str) -> None:
+        """Переносит маску src → dst (старая маска dst отбрасывается), src становится пустым."""
+        self._booked[dst] = self._booked.get(src, 0)
+        self._booked[src] = 0
@@ -0,0 +1,110 @@
+# utils/stream_reply.py
+
+import logging
+import time
+from typing import List, Optional
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message
+
+logger = logging.getLogger(__name__)
+
+MAX_TG_LEN = 4096        # лимит символов Telegram
+EDIT_INTERVAL = 1.5      # не чаще одного редактирования за столько секунд
+CURSOR = " ▌"
+
+
+def _cut_point(text: str, limit: int) -> int:
+    """Где разрезать текст длиннее limit: по абзацу, строке или пробелу."""
+    for sep in ("\n\n", "\n", " "):
+        pos = text.rfind(sep, 0, limit)
+        if pos >= limit // 2:
+            return pos
+    return limit
+
+
+class StreamingReply:
+    """
+    Ответ, который растёт по мере генерации.
+
+    Первое сообщение отправляется сразу с первыми символами, дальше оно
+    редактируется не чаще EDIT_INTERVAL (промежуточный текст — без разметки,
+    с курсором). Когда текст упирается в MAX_TG_LEN, готовая часть
+    фиксируется, а продолжение идёт новым сообщением. finish() выставляет
+    итоговый текст с parse_mode (при ошибке разметки — простым текстом);
+    fail() — то же для оборванной генерации, с пометкой об ошибке.
+    """
+
+    def __init__(self, message: Message, parse_mode: Optional[str] = "Markdown",
+                 interval: float = EDIT_INTERVAL, limit: int = MAX_TG_LEN):
+        self.message = message
+        self.parse_mode = parse_mode
+        self.interval = interval
+        self.limit = limit
+        self.sent: List[Message] = []
+        self._current: Optional[Message] = None
+        self._shown = ""
+        self._buffer = ""
+        self.text = ""
+        self._last_push = 0.0
+
+    async def feed(self, delta: str) -> None:
+        self.text += delta
+        self._buffer += delta
+        while len(self._buffer) > self.limit:
+            cut = _cut_point(self._buffer, self.limit)
+            await self._push(self._buffer[:cut], final=True)
+            self._current, self._shown = None, ""
+            self._buffer = self._buffer[cut:].lstrip()
+
+        if not self._buffer.strip():
+            return
+        if self._current is None or time.monotonic() - self._last_push >= self.interval:
+            shown = self._buffer + CURSOR if len(self._buffer) + len(CURSOR) <= self.limit else self._buffer
+            await self._push(shown)
+
+    async def finish(self) -> str:
+        """Итоговый текст в последнем сообщении; возвращает весь ответ."""
+        if self._buffer.strip():
+            await self._push(self._buffer, final=True)
+        return self.text
+
+    async def fail(self, notice: str) -> str:
+        """
+        Генерация оборвалась: курсор убирается, notice дописывается
+        к последнему сообщению (или уходит отдельным, если ответа ещё нет
+        или пометка не влезает в лимит). Возвращает полученную часть ответа.
+        """
+        text = f"{self._buffer.rstrip()}\n\n{notice}" if self._buffer.strip() else ""
+        if text and len(text) <= self.limit:
+            await self._push(text, final=True)
+        else:
+            await self.finish()
+            await self.message.answer(notice)
+        self._buffer = ""
+        return self.text
+
+    async def _push(self, text: str, final: bool = False) -> None:
+        parse_mode = self.parse_mode if final else None
+        if text == self._shown and not final:
+            return
+        try:
+            await self._send(text, parse_mode)
+        except TelegramBadRequest as e:
+            if "message is not modified" in str(e):
+                pass
+            elif parse_mode:
+                # незакрытая разметка (например, ``` на границе сообщения)
+                logger.debug("Ответ без разметки: %s", e)
+                await self._send(text, None)
+            else:
+                raise
+        self._shown = text
+        self._last_push = time.monotonic()
+
+    async def _send(self, text: str, parse_mode: Optional[str]) -> None:
+        if self._current is None:
+            self._current = await self.message.answer(text, parse_mode=parse_mode)
+            self.sent.append(self._current)
+        else:
+            await self._current.edit_text(text, parse_mode=parse_mode)
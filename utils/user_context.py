@@ -0,0 +1,95 @@
+# utils/user_context.py
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Optional
+
+import db
+from config import is_user_admin
+from constants.languages import LANGUAGES, DEFAULT_LANGUAGE
+
+logger = logging.getLogger(__name__)
+
+# Сколько пользователей держим в памяти и сколько секунд доверяем записи
+USER_CACHE_SIZE = 5000
+USER_CACHE_TTL = 300
+
+
+@dataclass(frozen=True)
+class UserContext:
+    """Всё, что хендлерам нужно знать о пользователе, одним объектом."""
+    user_id: int
+    lang: str
+    is_admin: bool
+    username: Optional[str] = None
+    emoji: Optional[str] = None
+
+
+class UserContextCache:
+    """
+    LRU-кэш UserContext с TTL.
+
+    Язык, имя и эмодзи читаются одним запросом (user_settings + users +
+    user_emojis). Записи обновляются сквозной записью из set_user_language
+    и сбрасываются при правках через /users и /emoji.
+    """
+
+    def __init__(self, maxsize: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items: "OrderedDict[int, tuple[UserContext, float]]" = OrderedDict()
+
+    async def get(self, user_id: int) -> UserContext:
+        item = self._items.get(user_id)
+        if item and time.monotonic() - item[1] < self.ttl:
+            self._items.move_to_end(user_id)
+            return item[0]
+
+        if not db.db_pool:
+            return UserContext(user_id, DEFAULT_LANGUAGE, is_user_admin(user_id))
+
+        async with db.db_pool.acquire() as conn:
+            row = await conn.fetchrow(
+                """
+                SELECT s.language, u.username, e.emojis
+                FROM (SELECT $1::BIGINT AS user_id) k
+                LEFT JOIN user_settings s ON s.user_id = k.user_id
+                LEFT JOIN users u ON u.user_id = k.user_id
+                LEFT JOIN user_emojis e ON e.user_id = k.user_id
+                """,
+                user_id
+            )
+        lang = row["language"] if row else None
+        ctx = UserContext(
+            user_id=user_id,
+            lang=lang if lang in LANGUAGES else DEFAULT_LANGUAGE,
+            is_admin=is_user_admin(user_id),
+            username=row["username"] if row else None,
+            emoji=row["emojis"] if row else None,
+        )
+        self._put(ctx)
+        return ctx
+
+    def _put(self, ctx: UserContext):
+        self._items[ctx.user_id] = (ctx, time.monotonic())
+        self._items.move_to_end(ctx.user_id)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def set_lang(self, user_id: int, lang: str):
+        """Сквозная запись: язык уже сохранён в БД."""
+        item = self._items.get(user_id)
+        if item:
+            self._put(replace(item[0], lang=lang))
+
+    def invalidate(self, user_id: Optional[int] = None):
+        """Сбросить одного пользователя (или всех, если user_id не указан)."""
+        if user_id is None:
+            self._items.clear()
+        else:
+            self._items.pop(user_id, None)
+
+
+user_contexts = UserContextCache()
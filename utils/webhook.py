@@ -0,0 +1,129 @@
+# utils/webhook.py
+
+import asyncio
+import hmac
+import logging
+from typing import Any, List, Optional
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiogram.webhook.aiohttp_server import setup_application
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+# Ёмкость очереди одного воркера: при заполнении ответ Telegram задерживается
+QUEUE_SIZE = 100
+
+
+def update_chat_key(update: Update) -> int:
+    """Чат апдейта (или пользователь, если чата нет) — ключ порядка обработки."""
+    event = update.event
+    chat = getattr(event, "chat", None)
+    if chat is None:
+        message = getattr(event, "message", None)
+        chat = getattr(message, "chat", None)
+    if chat is not None:
+        return chat.id
+    user = getattr(event, "from_user", None)
+    if user is not None:
+        return user.id
+    return update.update_id
+
+
+class OrderedWorkerPool:
+    """
+    Ограниченный пул обработки апдейтов.
+
+    Апдейт попадает в очередь воркера по ключу чата, поэтому апдейты
+    одного чата обрабатываются строго по порядку, а разные чаты —
+    параллельно (до workers одновременно). Очереди ограничены: если
+    воркер не успевает, submit() ждёт, и Telegram получает ответ позже.
+    """
+
+    def __init__(self, dp: Dispatcher, bot: Bot, workers: int, queue_size: int = QUEUE_SIZE):
+        self.dp = dp
+        self.bot = bot
+        self._queues: List[asyncio.Queue] = [asyncio.Queue(queue_size) for _ in range(workers)]
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker(q)) for q in self._queues]
+
+    async def submit(self, update: Update) -> None:
+        queue = self._queues[update_chat_key(update) % len(self._queues)]
+        await queue.put(update)
+
+    async def close(self, *args: Any) -> None:
+        """Дорабатывает принятые апдейты и останавливает воркеры."""
+        await asyncio.gather(*(q.join() for q in self._queues))
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            update = await queue.get()
+            try:
+                await self.dp.feed_update(self.bot, update)
+            except Exception as e:
+                logger.error("Ошибка обработки апдейта %s: %s", update.update_id, e)
+            finally:
+                queue.task_done()
+
+
+def build_webhook_app(dp: Dispatcher, bot: Bot, pool: OrderedWorkerPool,
+                      path: str, secret: str) -> web.Application:
+    async def handle(request: web.Request) -> web.Response:
+        token = request.headers.get(SECRET_HEADER, "")
+        if not secret or not hmac.compare_digest(token, secret):
+            return web.Response(status=401)
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": bot})
+        except Exception as e:
+            logger.warning("Некорректный апдейт во вебхуке: %s", e)
+            return web.Response(status=400)
+        await pool.submit(update)
+        return web.Response()
+
+    async def on_startup(_app: web.Application) -> None:
+        pool.start()
+
+    app = web.Application()
+    app.router.add_post(path, handle)
+    # воркеры дорабатывают очередь до остановки диспетчера (планировщик отправок и т.д.)
+    app.on_startup.append(on_startup)
+    app.on_shutdown.append(pool.close)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot, *, base_url: str, path: str, secret: str,
+                      host: str, port: int, workers: int,
+                      allowed_updates: Optional[List[str]] = None) -> None:
+    """Поднимает aiohttp-сервер, регистрирует вебхук и работает до отмены."""
+    if not secret:
+        raise RuntimeError("WEBHOOK_SECRET не задан — вебхук без проверки не запускаем")
+    pool = OrderedWorkerPool(dp, bot, workers)
+    app = build_webhook_app(dp, bot, pool, path, secret)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    logger.info("Вебхук слушает %s:%s%s", host, port, path)
+
+    # накопленные за время простоя апдейты не сбрасываем
+    await bot.set_webhook(
+        url=base_url.rstrip("/") + path,
+        secret_token=secret,
+        allowed_updates=allowed_updates,
+        drop_pending_updates=False,
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+        await bot.session.close()